@@ -0,0 +1,151 @@
+"""
+Compute Executor
+
+Runs CPU-bound handler work (image analysis, model fitting, plotting) on a
+worker pool so the asyncio event loop stays free for other requests.
+
+Configuration (environment variables):
+    COMPUTE_MODE             'thread' (default) or 'process'
+    COMPUTE_WORKERS          Worker count (default: number of CPU cores)
+    COMPUTE_QUEUE_SIZE       Jobs allowed to wait beyond the running ones
+                             (default: 4 x workers); more are rejected with 503
+    COMPUTE_RETRY_AFTER      Seconds suggested in the Retry-After header (default: 2)
+    COMPUTE_ENDPOINT_LIMITS  Per-endpoint concurrency, e.g. "knn.train=1,glcm.analyze=2"
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# Endpoints that should never monopolize the pool, unless overridden
+DEFAULT_ENDPOINT_LIMITS = {
+    "knn.train": 2,
+    "decision_tree.train": 1,
+    "glcm.feature_map": 2
+}
+
+
+class ComputeExecutor:
+    """Bounded worker pool with admission control and per-endpoint limits"""
+
+    def __init__(self, max_workers=None, max_queue=None, mode="thread", endpoint_limits=None, retry_after=2):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"mode must be 'thread' or 'process', got {mode}")
+        self.mode = mode
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.max_queue = max(0, max_queue if max_queue is not None else 4 * self.max_workers)
+        self.retry_after = retry_after
+        self.endpoint_limits = {**DEFAULT_ENDPOINT_LIMITS, **(endpoint_limits or {})}
+
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._semaphores = {}
+        self._pending = 0
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+    @classmethod
+    def from_env(cls):
+        """Build an executor from the COMPUTE_* environment variables"""
+        limits = {}
+        for item in os.environ.get("COMPUTE_ENDPOINT_LIMITS", "").split(","):
+            if "=" in item:
+                name, value = item.split("=", 1)
+                limits[name.strip()] = int(value)
+
+        workers = os.environ.get("COMPUTE_WORKERS")
+        queue = os.environ.get("COMPUTE_QUEUE_SIZE")
+        return cls(
+            max_workers=int(workers) if workers else None,
+            max_queue=int(queue) if queue else None,
+            mode=os.environ.get("COMPUTE_MODE", "thread"),
+            endpoint_limits=limits,
+            retry_after=int(os.environ.get("COMPUTE_RETRY_AFTER", 2))
+        )
+
+    @property
+    def pool(self):
+        """The underlying pool, created on first use"""
+        with self._pool_lock:
+            if self._pool is None:
+                if self.mode == "process":
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="compute")
+                logger.info(f"Compute executor started: {self.mode} pool with {self.max_workers} workers")
+            return self._pool
+
+    def shutdown(self):
+        """Stop the pool; queued jobs are cancelled"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _semaphore(self, endpoint):
+        limit = self.endpoint_limits.get(endpoint)
+        if limit is None:
+            return None
+        if endpoint not in self._semaphores:
+            self._semaphores[endpoint] = asyncio.Semaphore(limit)
+        return self._semaphores[endpoint]
+
+    async def run(self, endpoint, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) on the pool and await its result.
+
+        Raises HTTPException(503) with a Retry-After header when the number of
+        running plus waiting jobs already fills the workers and the queue.
+        In process mode fn, its arguments and its result must be picklable.
+        """
+        if self._pending >= self.max_workers + self.max_queue:
+            self._stats["rejected"] += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy, please retry shortly.",
+                headers={"Retry-After": str(self.retry_after)}
+            )
+
+        self._pending += 1
+        self._stats["submitted"] += 1
+        try:
+            semaphore = self._semaphore(endpoint)
+            loop = asyncio.get_running_loop()
+            call = functools.partial(fn, *args, **kwargs)
+            if semaphore is None:
+                result = await loop.run_in_executor(self.pool, call)
+            else:
+                async with semaphore:
+                    result = await loop.run_in_executor(self.pool, call)
+            self._stats["completed"] += 1
+            return result
+        except Exception:
+            self._stats["failed"] += 1
+            raise
+        finally:
+            self._pending -= 1
+
+    def stats(self):
+        """Pool configuration and job counters"""
+        return {
+            **self._stats,
+            "mode": self.mode,
+            "workers": self.max_workers,
+            "queue_size": self.max_queue,
+            "pending": self._pending,
+            "endpoint_limits": self.endpoint_limits
+        }
+
+
+compute = ComputeExecutor.from_env()
+
+
+async def run_compute(endpoint, fn, *args, **kwargs):
+    """Run CPU-bound work for an endpoint on the shared compute executor"""
+    return await compute.run(endpoint, fn, *args, **kwargs)
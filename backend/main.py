@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
+from contextlib import asynccontextmanager
 import os
 import sys
 import logging
@@ -24,7 +25,28 @@ except ImportError as e:
     print(f"Warning: GLCM module not available: {e}")
     GLCM_AVAILABLE = False
 
-app = FastAPI(title="VisKom WebGL Clone")
+from backend.compute import compute
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start the compute pool up front so the first heavy request doesn't pay for it
+    compute.pool
+    # Load the newest KNN model versions so the first /predict is fast (KNN_WARM_MODELS)
+    try:
+        knn.model_registry.warm(int(os.environ.get("KNN_WARM_MODELS", 2)))
+    except Exception as e:
+        logger.warning(f"Could not warm-load KNN models: {e}")
+    yield
+    compute.shutdown()
+    from backend.modules.knn_cv import shutdown_pool as shutdown_cv_pool
+    shutdown_cv_pool()
+    if GLCM_AVAILABLE:
+        from backend.modules.texture_batch import shutdown_pool
+        shutdown_pool()
+
+
+app = FastAPI(title="VisKom WebGL Clone", lifespan=lifespan)
 
 # Security Headers Middleware
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
@@ -82,6 +104,10 @@ app.include_router(decision_tree.router, prefix="/api")
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/api/compute/stats")
+async def compute_stats():
+    return compute.stats()
+
 # Serve Frontend Static Files (Production Mode)
 # In dev, we use Vite's dev server. In prod, we serve the 'dist' folder.
 frontend_dist = os.path.join(os.path.dirname(__file__), "../frontend/dist")
@@ -0,0 +1,444 @@
+"""
+GLCM Engine Module
+
+Shared numerical helpers for Gray Level Co-occurrence Matrix analysis,
+used by both the FastAPI router and the Streamlit GLCM module.
+"""
+
+import base64
+import io
+
+import numpy as np
+from PIL import Image
+
+from .utils.image_ingest import load_image
+from .utils.grayscale import image_to_gray
+
+
+# Supported gray-level counts; all are powers of two so re-binning is a bit shift
+GLCM_LEVELS = (8, 16, 32, 64, 128, 256)
+
+
+def decode_gray(source, max_pixels: int = None) -> tuple:
+    """
+    Decode an image into a uint8 grayscale array at the analysis resolution.
+
+    Args:
+        source: Path, file-like object or raw bytes of an encoded image
+        max_pixels: Optional pixel budget; larger images are downscaled on load
+
+    Returns:
+        tuple: (grayscale array, resolution info dict)
+    """
+    image, resolution = load_image(source, max_pixels)
+    return image_to_gray(image), resolution
+
+
+def quantize_gray(img_gray: np.ndarray, levels: int = 256) -> np.ndarray:
+    """
+    Re-bin an 8-bit grayscale image to a smaller number of gray levels.
+
+    Args:
+        img_gray: uint8 grayscale image
+        levels: Target number of gray levels (one of GLCM_LEVELS)
+
+    Returns:
+        uint8 image with values in [0, levels)
+    """
+    if levels not in GLCM_LEVELS:
+        raise ValueError(f"levels must be one of {list(GLCM_LEVELS)}, got {levels}")
+
+    img_gray = np.asarray(img_gray, dtype=np.uint8)
+    if levels == 256:
+        return img_gray
+
+    shift = 8 - int(levels).bit_length() + 1
+    return np.right_shift(img_gray, shift)
+
+
+# Supported serialization formats for co-occurrence matrices
+MATRIX_FORMATS = ("dense", "sparse", "base64", "none")
+MATRIX_DTYPES = ("float32", "float16")
+
+
+def encode_array_base64(array: np.ndarray, dtype: str = "float32") -> dict:
+    """Encode an array as a little-endian base64 blob with its shape and dtype"""
+    blob = np.ascontiguousarray(array, dtype=np.dtype(dtype).newbyteorder("<"))
+    return {
+        "shape": list(array.shape),
+        "dtype": dtype,
+        "data": base64.b64encode(blob.tobytes()).decode("ascii")
+    }
+
+
+def encode_array_png(array: np.ndarray) -> dict:
+    """Encode a 2-D array as a min-max scaled 8-bit PNG, keeping the value range"""
+    lo, hi = float(np.min(array)), float(np.max(array))
+    scaled = ((array - lo) / (hi - lo + 1e-10) * 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(scaled).save(buffer, format="PNG")
+    return {
+        "shape": list(array.shape),
+        "min": lo,
+        "max": hi,
+        "data": base64.b64encode(buffer.getvalue()).decode("ascii")
+    }
+
+
+def encode_glcm_matrices(glcm: np.ndarray, degree_list: list, matrix_format: str = "dense",
+                         matrix_dtype: str = "float32", distance_index: int = 0) -> dict:
+    """
+    Serialize the per-angle co-occurrence matrices of one distance.
+
+    Args:
+        glcm: 4-D GLCM array (levels, levels, n_distances, n_angles)
+        degree_list: Angles in degrees, in the same order as the GLCM angles axis
+        matrix_format: 'dense' (nested lists), 'sparse' (COO of non-zero cells),
+                       'base64' (raw little-endian blob) or 'none'
+        matrix_dtype: Element type for the 'base64' format ('float32' or 'float16')
+        distance_index: Which distance of the GLCM to serialize
+
+    Returns:
+        Dictionary keyed by the angle in degrees (empty for 'none')
+    """
+    if matrix_format not in MATRIX_FORMATS:
+        raise ValueError(f"matrix_format must be one of {list(MATRIX_FORMATS)}, got {matrix_format}")
+    if matrix_dtype not in MATRIX_DTYPES:
+        raise ValueError(f"matrix_dtype must be one of {list(MATRIX_DTYPES)}, got {matrix_dtype}")
+
+    matrices = {}
+    if matrix_format == "none":
+        return matrices
+
+    for i, deg in enumerate(degree_list):
+        matrix = glcm[:, :, distance_index, i]
+
+        if matrix_format == "dense":
+            matrices[str(deg)] = matrix.tolist()
+        elif matrix_format == "sparse":
+            rows, cols = np.nonzero(matrix)
+            matrices[str(deg)] = {
+                "shape": list(matrix.shape),
+                "rows": rows.tolist(),
+                "cols": cols.tolist(),
+                "values": matrix[rows, cols].tolist()
+            }
+        else:
+            matrices[str(deg)] = encode_array_base64(matrix, matrix_dtype)
+
+    return matrices
+
+
+# Properties matching skimage.feature.graycoprops
+GLCM_PROPERTIES = ('contrast', 'dissimilarity', 'homogeneity', 'energy', 'correlation', 'ASM')
+
+# Additional Haralick statistics computed from the same marginals
+GLCM_EXTENDED_PROPERTIES = (
+    'entropy', 'variance', 'sum_average', 'sum_variance', 'sum_entropy',
+    'difference_variance', 'difference_entropy', 'imc1', 'imc2'
+)
+
+
+def _entropy(p: np.ndarray, axis) -> np.ndarray:
+    """Shannon entropy (natural log) along the given axis, treating 0*log(0) as 0"""
+    ln = np.log(p, where=(p > 0), out=np.zeros_like(p))
+    return 0.0 - np.sum(p * ln, axis=axis)
+
+
+def glcm_features(glcm: np.ndarray, extended: bool = False) -> dict:
+    """
+    Compute Haralick texture features for every distance and angle at once.
+
+    The six graycoprops properties are taken from one weighted reduction over
+    the matrix plus its marginals, instead of one full pass per property.
+
+    Args:
+        glcm: 4-D GLCM array (levels, levels, n_distances, n_angles)
+        extended: Also compute entropy, variance, sum/difference statistics
+                  and the information measures of correlation
+
+    Returns:
+        Dictionary mapping property name to an (n_distances, n_angles) array
+    """
+    num_level = glcm.shape[0]
+    num_dist, num_angle = glcm.shape[2], glcm.shape[3]
+    n = num_dist * num_angle
+
+    # Flatten to (cells, glcms) and normalize each GLCM
+    P = glcm.reshape(num_level * num_level, n).astype(np.float64)
+    glcm_sums = P.sum(axis=0)
+    glcm_sums[glcm_sums == 0] = 1
+    P = P / glcm_sums
+
+    levels = np.arange(num_level, dtype=np.float64)
+    diff = np.abs(levels[:, None] - levels[None, :]).ravel()
+
+    # One matrix product gives every linearly weighted sum over the cells
+    weights = np.stack([diff ** 2, diff, 1.0 / (1.0 + diff ** 2)])
+    contrast, dissimilarity, homogeneity = weights @ P
+    asm = np.einsum('ij,ij->j', P, P)
+
+    # Marginals and moments for correlation
+    P3 = P.reshape(num_level, num_level, n)
+    px = P3.sum(axis=1)
+    py = P3.sum(axis=0)
+    mean_i = levels @ px
+    mean_j = levels @ py
+    diff_i = levels[:, None] - mean_i
+    diff_j = levels[:, None] - mean_j
+    var_i = np.sum(px * diff_i ** 2, axis=0)
+    var_j = np.sum(py * diff_j ** 2, axis=0)
+    cov = np.einsum('in,jn,ijn->n', diff_i, diff_j, P3)
+    std_i = np.sqrt(var_i)
+    std_j = np.sqrt(var_j)
+
+    # Same special case as graycoprops: constant images have correlation 1
+    correlation = np.ones(n, dtype=np.float64)
+    mask = (std_i >= 1e-15) & (std_j >= 1e-15)
+    correlation[mask] = cov[mask] / (std_i[mask] * std_j[mask])
+
+    results = {
+        'contrast': contrast,
+        'dissimilarity': dissimilarity,
+        'homogeneity': homogeneity,
+        'energy': np.sqrt(asm),
+        'correlation': correlation,
+        'ASM': asm
+    }
+
+    if extended:
+        # p_{x+y} and p_{x-y} for all GLCMs in one bincount each
+        sum_idx = (levels[:, None] + levels[None, :]).astype(np.intp).ravel()
+        diff_idx = diff.astype(np.intp)
+        columns = np.arange(n, dtype=np.intp)
+        p_sum = np.bincount((sum_idx[:, None] * n + columns).ravel(), weights=P.ravel(),
+                            minlength=(2 * num_level - 1) * n).reshape(2 * num_level - 1, n)
+        p_diff = np.bincount((diff_idx[:, None] * n + columns).ravel(), weights=P.ravel(),
+                             minlength=num_level * n).reshape(num_level, n)
+
+        sum_levels = np.arange(2 * num_level - 1, dtype=np.float64)
+        sum_average = sum_levels @ p_sum
+        diff_mean = levels @ p_diff
+
+        hxy = _entropy(P, axis=0)
+        hx = _entropy(px, axis=0)
+        hy = _entropy(py, axis=0)
+        # HXY1 and HXY2 both reduce to HX + HY for a normalized GLCM
+        mutual_info = hx + hy - hxy
+        max_h = np.maximum(hx, hy)
+        imc1 = np.zeros(n, dtype=np.float64)
+        np.divide(-mutual_info, max_h, out=imc1, where=max_h > 0)
+
+        results.update({
+            'entropy': hxy,
+            'variance': var_i,
+            'sum_average': sum_average,
+            'sum_variance': (sum_levels ** 2) @ p_sum - sum_average ** 2,
+            'sum_entropy': _entropy(p_sum, axis=0),
+            'difference_variance': (levels ** 2) @ p_diff - diff_mean ** 2,
+            'difference_entropy': _entropy(p_diff, axis=0),
+            'imc1': imc1,
+            'imc2': np.sqrt(np.clip(1 - np.exp(-2 * mutual_info), 0, None))
+        })
+
+    return {name: values.reshape(num_dist, num_angle) for name, values in results.items()}
+
+
+# Feature maps keep one co-occurrence histogram per window row, so levels are capped
+FEATURE_MAP_MAX_LEVELS = 64
+
+
+def _pair_images(img_q: np.ndarray, offset_row: int, offset_col: int) -> tuple:
+    """Return aligned (reference, neighbour) views for every in-bounds pixel pair"""
+    h, w = img_q.shape
+    r0, r1 = max(0, -offset_row), h - max(0, offset_row)
+    c0, c1 = max(0, -offset_col), w - max(0, offset_col)
+    first = img_q[r0:r1, c0:c1].astype(np.intp)
+    second = img_q[r0 + offset_row:r1 + offset_row, c0 + offset_col:c1 + offset_col].astype(np.intp)
+    return first, second
+
+
+def _box_sums(values: np.ndarray, rows: np.ndarray, cols: np.ndarray, height: int, width: int) -> np.ndarray:
+    """Sum of values over every (row, col)-anchored box using an integral image"""
+    sat = np.zeros((values.shape[0] + 1, values.shape[1] + 1), dtype=values.dtype)
+    np.cumsum(np.cumsum(values, axis=0), axis=1, out=sat[1:, 1:])
+    return (sat[np.ix_(rows + height, cols + width)] - sat[np.ix_(rows, cols + width)]
+            - sat[np.ix_(rows + height, cols)] + sat[np.ix_(rows, cols)])
+
+
+def _sliding_sum_of_squares(first: np.ndarray, second: np.ndarray, levels: int, rows: np.ndarray,
+                            height: int, width: int, stride: int, n_cols: int) -> np.ndarray:
+    """
+    Sum of squared symmetric co-occurrence counts for every window.
+
+    Keeps one histogram per window row and slides it across the image,
+    adding the entering columns and removing the leaving ones. The running
+    sum of squares is updated from the touched bins only, using
+    sum((c + m)^2 - c^2) = sum over added items of (c_before + c_after).
+    """
+    n_rows = len(rows)
+    n_bins = levels * levels
+    counts = np.zeros(n_rows * n_bins, dtype=np.int64)
+    sum_sq = np.zeros(n_rows, dtype=np.int64)
+    result = np.zeros((n_rows, n_cols), dtype=np.int64)
+
+    band_rows = (rows[:, None] + np.arange(height))[:, :, None]
+    band_offset = (np.arange(n_rows) * n_bins)[:, None, None]
+    codes_ij = first * levels + second
+    codes_ji = second * levels + first
+
+    def update(start, stop, sign):
+        if stop <= start:
+            return
+        cols = np.arange(start, stop)[None, None, :]
+        idx = np.concatenate([
+            (band_offset + codes_ij[band_rows, cols]).reshape(n_rows, -1),
+            (band_offset + codes_ji[band_rows, cols]).reshape(n_rows, -1)
+        ], axis=1)
+        before = counts[idx]
+        np.add.at(counts, idx.ravel(), sign)
+        sum_sq[:] += sign * (before + counts[idx]).sum(axis=1)
+
+    for b in range(n_cols):
+        start = b * stride
+        if b == 0:
+            update(0, width, 1)
+        else:
+            prev = start - stride
+            update(prev, min(prev + width, start), -1)
+            update(max(prev + width, start), start + width, 1)
+        result[:, b] = sum_sq
+
+    return result
+
+
+def glcm_feature_maps(img_q: np.ndarray, levels: int, window: int, stride: int = 1,
+                      distance: int = 1, angles: list = (0.0,), properties: list = GLCM_PROPERTIES) -> dict:
+    """
+    Compute sliding-window GLCM texture maps.
+
+    Each output pixel holds the features of the symmetric GLCM of one
+    window x window tile, averaged over the requested angles. Linear
+    properties (contrast, dissimilarity, homogeneity, correlation) come from
+    integral images of per-pair values; ASM/energy use incrementally updated
+    co-occurrence histograms.
+
+    Args:
+        img_q: Quantized uint8 grayscale image with values in [0, levels)
+        levels: Number of gray levels (at most FEATURE_MAP_MAX_LEVELS)
+        window: Window edge length in pixels
+        stride: Step between consecutive windows
+        distance: Pixel pair distance
+        angles: Angles in radians
+        properties: Subset of GLCM_PROPERTIES to compute
+
+    Returns:
+        Dictionary mapping property name to a 2-D float64 map
+    """
+    if levels > FEATURE_MAP_MAX_LEVELS:
+        raise ValueError(f"levels must be at most {FEATURE_MAP_MAX_LEVELS} for feature maps")
+    unknown = [p for p in properties if p not in GLCM_PROPERTIES]
+    if unknown:
+        raise ValueError(f"Unknown properties: {unknown}")
+    h, w = img_q.shape
+    if window > min(h, w):
+        raise ValueError(f"window ({window}) is larger than the image ({w}x{h})")
+    if stride < 1:
+        raise ValueError("stride must be at least 1")
+
+    n_rows = (h - window) // stride + 1
+    n_cols = (w - window) // stride + 1
+    rows = np.arange(n_rows) * stride
+    cols = np.arange(n_cols) * stride
+
+    maps = {prop: np.zeros((n_rows, n_cols), dtype=np.float64) for prop in properties}
+    for angle in angles:
+        offset_row, offset_col = glcm_offset(distance, angle)
+        height, width = window - abs(offset_row), window - abs(offset_col)
+        if height < 1 or width < 1:
+            raise ValueError(f"window ({window}) must be larger than the pixel distance ({distance})")
+
+        first, second = _pair_images(img_q, offset_row, offset_col)
+        n_pairs = height * width
+        diff = first - second
+
+        if 'contrast' in maps:
+            maps['contrast'] += _box_sums(diff * diff, rows, cols, height, width) / n_pairs
+        if 'dissimilarity' in maps:
+            maps['dissimilarity'] += _box_sums(np.abs(diff), rows, cols, height, width) / n_pairs
+        if 'homogeneity' in maps:
+            maps['homogeneity'] += _box_sums(1.0 / (1.0 + diff * diff), rows, cols, height, width) / n_pairs
+        if 'correlation' in maps:
+            # Integer sums keep var/cov numerators exact; both orders count for a symmetric GLCM
+            s1 = _box_sums(first + second, rows, cols, height, width)
+            s2 = _box_sums(first * first + second * second, rows, cols, height, width)
+            sij = _box_sums(first * second, rows, cols, height, width)
+            var_num = 2 * n_pairs * s2 - s1 * s1
+            cov_num = 4 * n_pairs * sij - s1 * s1
+            corr = np.ones(var_num.shape, dtype=np.float64)
+            np.divide(cov_num, var_num, out=corr, where=var_num > 0)
+            maps['correlation'] += corr
+        if 'ASM' in maps or 'energy' in maps:
+            sum_sq = _sliding_sum_of_squares(first, second, levels, rows, height, width, stride, n_cols)
+            asm = sum_sq / float(2 * n_pairs) ** 2
+            if 'ASM' in maps:
+                maps['ASM'] += asm
+            if 'energy' in maps:
+                maps['energy'] += np.sqrt(asm)
+
+    for prop in maps:
+        maps[prop] /= len(angles)
+    return maps
+
+
+def glcm_offset(distance: int, angle: float) -> tuple:
+    """
+    Pixel (row, col) offset used by skimage.feature.graycomatrix for a distance/angle pair.
+
+    skimage rounds as floor(x + 0.5), not round(x): at 30 and 150 degrees
+    sin(angle) is 0.49999999999999994, which that rounds up to 1.
+    """
+    return int(np.floor(np.sin(angle) * distance + 0.5)), int(np.floor(np.cos(angle) * distance + 0.5))
+
+
+def glcm_sweep(img_q: np.ndarray, levels: int, distances: list, angles: list, symmetric: bool = True) -> np.ndarray:
+    """
+    Build co-occurrence counts for every (distance, angle) pair.
+
+    Each offset is one bincount over aligned shifted views of the image,
+    with no per-pixel Python work; offsets that round to the same pixel
+    shift (e.g. d=1 and d=2 at 45 degrees) are counted once.
+
+    Args:
+        img_q: Quantized uint8 grayscale image with values in [0, levels)
+        levels: Number of gray levels
+        distances: Pixel pair distances
+        angles: Angles in radians
+
+    Returns:
+        uint32 count array (levels, levels, n_distances, n_angles), same
+        layout as graycomatrix(..., normed=False)
+    """
+    glcm = np.zeros((levels, levels, len(distances), len(angles)), dtype=np.uint32)
+    computed = {}
+    h, w = img_q.shape
+
+    for d, distance in enumerate(distances):
+        for a, angle in enumerate(angles):
+            offset = glcm_offset(distance, angle)
+            if offset not in computed:
+                dr, dc = offset
+                r0, r1 = max(0, -dr), h - max(0, dr)
+                c0, c1 = max(0, -dc), w - max(0, dc)
+                # uint16 codes (levels <= 256) keep the temporary at 2 bytes per pair
+                codes = img_q[r0:r1, c0:c1].astype(np.uint16)
+                codes *= levels
+                codes += img_q[r0 + dr:r1 + dr, c0 + dc:c1 + dc]
+                counts = np.bincount(codes.ravel(), minlength=levels * levels)
+                counts = counts.reshape(levels, levels).astype(np.uint32)
+                if symmetric:
+                    counts = counts + counts.T
+                computed[offset] = counts
+            glcm[:, :, d, a] = computed[offset]
+
+    return glcm
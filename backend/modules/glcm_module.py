@@ -1,9 +1,10 @@
 import streamlit as st
 import numpy as np
 from PIL import Image
-from skimage.feature import graycomatrix, graycoprops
-from skimage import color
+from skimage.feature import graycomatrix
 import pandas as pd
+from modules.glcm_engine import glcm_features
+from modules.utils.grayscale import image_to_gray
 
 
 def glcm_analysis():
@@ -18,15 +19,9 @@ def glcm_analysis():
     if uploaded_file is not None:
         # Load dan konversi gambar
         image = Image.open(uploaded_file)
-        img_array = np.array(image)
 
         # Konversi ke grayscale
-        if len(img_array.shape) == 3:
-            img_gray = color.rgb2gray(img_array)
-        else:
-            img_gray = img_array
-
-        img_gray = (img_gray * 255).astype(np.uint8)
+        img_gray = image_to_gray(image)
 
         # Tampilkan gambar
         _display_images(image, img_gray)
@@ -111,15 +106,8 @@ def _process_glcm(img_gray, degrees, distance):
 
 
 def _extract_glcm_features(glcm):
-    """Ekstrak semua fitur GLCM"""
-    return {
-        'contrast': graycoprops(glcm, 'contrast')[0],
-        'dissimilarity': graycoprops(glcm, 'dissimilarity')[0],
-        'homogeneity': graycoprops(glcm, 'homogeneity')[0],
-        'energy': graycoprops(glcm, 'energy')[0],
-        'correlation': graycoprops(glcm, 'correlation')[0],
-        'ASM': graycoprops(glcm, 'ASM')[0]
-    }
+    """Ekstrak semua fitur GLCM dalam satu kali proses"""
+    return {name: values[0] for name, values in glcm_features(glcm).items()}
 
 
 def _display_results(features, degrees):
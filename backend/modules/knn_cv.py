@@ -0,0 +1,110 @@
+"""
+KNN Cross-Validation Module
+
+Runs (repeated) stratified k-fold evaluation of a KNN classifier with the
+folds spread over a process pool. The encoded feature matrix and labels are
+placed in one shared-memory block that every worker maps directly, so only
+the fold indices travel through pickling.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+from sklearn.model_selection import RepeatedStratifiedKFold
+
+from .knn_index import KNNIndexClassifier
+
+
+_pool = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Return the shared cross-validation process pool (KNN_CV_WORKERS, default: CPU count)"""
+    global _pool
+    if _pool is None:
+        workers = int(os.environ.get("KNN_CV_WORKERS", os.cpu_count() or 1))
+        _pool = ProcessPoolExecutor(max_workers=max(1, workers))
+    return _pool
+
+
+def shutdown_pool():
+    """Shut down the cross-validation pool if it was started"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _fold_worker(shm_name: str, n_rows: int, n_features: int, train_idx, test_idx,
+                 params: dict, n_classes: int) -> np.ndarray:
+    """Fit on one fold's training rows and return its (n_classes, n_classes) confusion matrix"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        X = np.ndarray((n_rows, n_features), dtype=np.float64, buffer=shm.buf)
+        y = np.ndarray((n_rows,), dtype=np.int64, buffer=shm.buf, offset=X.nbytes)
+
+        # Fancy indexing copies the fold out of shared memory
+        knn = KNNIndexClassifier(**params).fit(X[train_idx], y[train_idx])
+        predicted = knn.predict(X[test_idx])
+        actual = y[test_idx]
+        del X, y
+    finally:
+        shm.close()
+
+    return np.bincount(actual * n_classes + predicted, minlength=n_classes * n_classes).reshape(n_classes, n_classes)
+
+
+def cross_validate(X: np.ndarray, y_codes: np.ndarray, params: dict, n_folds: int = 5, n_repeats: int = 1,
+                   random_state: int = 42) -> list:
+    """
+    Stratified k-fold (optionally repeated) evaluation on the process pool.
+
+    Args:
+        X: (n, d) encoded features
+        y_codes: (n,) integer class codes 0..C-1
+        params: KNNIndexClassifier parameters (n_neighbors, scaling, index, ...)
+        n_folds: Folds per repetition
+        n_repeats: Number of reshuffled repetitions
+
+    Returns:
+        One dict per fold (repeat, fold, train_size, test_size,
+        confusion_matrix), in split order
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y_codes = np.ascontiguousarray(y_codes, dtype=np.int64)
+    n_classes = int(y_codes.max()) + 1
+    splitter = RepeatedStratifiedKFold(n_splits=n_folds, n_repeats=n_repeats, random_state=random_state)
+    splits = list(splitter.split(X, y_codes))
+
+    shm = shared_memory.SharedMemory(create=True, size=X.nbytes + y_codes.nbytes)
+    try:
+        np.ndarray(X.shape, dtype=np.float64, buffer=shm.buf)[:] = X
+        np.ndarray(y_codes.shape, dtype=np.int64, buffer=shm.buf, offset=X.nbytes)[:] = y_codes
+
+        try:
+            futures = [
+                get_pool().submit(_fold_worker, shm.name, len(X), X.shape[1], train_idx, test_idx, params, n_classes)
+                for train_idx, test_idx in splits
+            ]
+            matrices = [future.result() for future in futures]
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next request
+            shutdown_pool()
+            raise
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return [
+        {
+            "repeat": i // n_folds + 1,
+            "fold": i % n_folds + 1,
+            "train_size": len(train_idx),
+            "test_size": len(test_idx),
+            "confusion_matrix": cm
+        }
+        for i, ((train_idx, test_idx), cm) in enumerate(zip(splits, matrices))
+    ]
@@ -0,0 +1,375 @@
+"""
+KNN Index Module
+
+Feature scaling plus interchangeable neighbor-search backends behind one
+classifier. The exact backends ('auto', 'brute', 'kd_tree', 'ball_tree')
+delegate to scikit-learn's NearestNeighbors; 'ivf' is a pure-NumPy
+inverted-file index that clusters the training rows with k-means and, per
+query, scans only the n_probe closest clusters, so recall is traded for
+latency through n_probe. Rows can be appended to a fitted classifier
+without a full refit.
+"""
+
+import threading
+import time
+
+import numpy as np
+from sklearn.neighbors import NearestNeighbors
+
+
+SCALERS = ('none', 'standard', 'minmax')
+INDEX_BACKENDS = ('auto', 'brute', 'kd_tree', 'ball_tree', 'ivf')
+
+# Query rows per distance block in the IVF scan
+QUERY_BLOCK = 1024
+# Training rows per block in exact scans
+DATA_BLOCK = 65536
+KMEANS_SAMPLE_PER_LIST = 256
+
+
+def fit_scaler(X: np.ndarray, kind: str = 'none'):
+    """
+    Per-column (offset, scale) so that (X - offset) / scale is the scaled matrix.
+
+    'standard' centers to zero mean and unit variance, 'minmax' maps to
+    [0, 1]; constant columns keep a scale of 1.
+    """
+    if kind not in SCALERS:
+        raise ValueError(f"scaling must be one of {list(SCALERS)}")
+    n_features = X.shape[1]
+    if kind == 'none' or len(X) == 0:
+        return np.zeros(n_features), np.ones(n_features)
+    if kind == 'standard':
+        offset, scale = X.mean(axis=0), X.std(axis=0)
+    else:
+        offset = X.min(axis=0)
+        scale = X.max(axis=0) - offset
+    scale = np.where(scale > 0, scale, 1.0)
+    return offset, scale
+
+
+def _sq_distances(queries, queries_sq, data, data_sq):
+    """Squared Euclidean distances between two row sets, clipped at zero"""
+    d = queries_sq[:, None] - 2.0 * (queries @ data.T) + data_sq[None, :]
+    np.maximum(d, 0, out=d)
+    return d
+
+
+def _merge_top_k(best_d, best_i, d, idx, k):
+    """Merge candidate distances d (rows, m) with global ids idx (m,) into the running top-k"""
+    all_d = np.concatenate([best_d, d], axis=1)
+    all_i = np.concatenate([best_i, np.broadcast_to(idx, d.shape)], axis=1)
+    if all_d.shape[1] > k:
+        top = np.argpartition(all_d, k - 1, axis=1)[:, :k]
+        all_d = np.take_along_axis(all_d, top, axis=1)
+        all_i = np.take_along_axis(all_i, top, axis=1)
+    return all_d, all_i
+
+
+class IVFIndex:
+    """
+    Inverted-file index with exact distances inside the probed lists.
+
+    Rows are reordered so every list is one contiguous slice of the data
+    matrix; a query computes distances to the centroids, keeps the n_probe
+    nearest lists and scans only their rows.
+    """
+
+    def __init__(self, n_lists=None, n_probe=8, n_iter=10, random_state=42):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.random_state = random_state
+
+    def fit(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        n = len(X)
+        n_lists = min(self.n_lists or max(1, int(np.sqrt(n))), n)
+        rng = np.random.default_rng(self.random_state)
+
+        # k-means on a sample is enough to place the coarse centroids
+        sample = X[rng.choice(n, min(n, n_lists * KMEANS_SAMPLE_PER_LIST), replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(self.n_iter):
+            assign = self._assign(sample, centroids)
+            counts = np.bincount(assign, minlength=n_lists)
+            for j in range(X.shape[1]):
+                sums = np.bincount(assign, weights=sample[:, j], minlength=n_lists)
+                # Empty lists keep their previous centroid
+                np.divide(sums, counts, out=centroids[:, j], where=counts > 0)
+
+        assign = self._assign(X, centroids)
+        self.order = np.argsort(assign, kind="stable")
+        self.data = X[self.order]
+        self.data_sq = np.einsum("ij,ij->i", self.data, self.data)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=n_lists))])
+        self.centroids = centroids
+        self.centroids_sq = np.einsum("ij,ij->i", centroids, centroids)
+        self.n_lists_ = n_lists
+        return self
+
+    @staticmethod
+    def _assign(X, centroids):
+        """Nearest centroid for every row, in query blocks"""
+        centroids_sq = np.einsum("ij,ij->i", centroids, centroids)
+        out = np.empty(len(X), dtype=np.intp)
+        for start in range(0, len(X), QUERY_BLOCK):
+            block = X[start:start + QUERY_BLOCK]
+            # ||x||^2 is constant per row and does not change the argmin
+            out[start:start + QUERY_BLOCK] = np.argmin(centroids_sq[None, :] - 2.0 * (block @ centroids.T), axis=1)
+        return out
+
+    def exact_kneighbors(self, queries, k, queries_sq=None):
+        """Brute-force (squared distances, reordered row ids) of the k nearest rows, scanned in data blocks"""
+        if queries_sq is None:
+            queries_sq = np.einsum("ij,ij->i", queries, queries)
+        best_d = np.full((len(queries), 0), np.inf)
+        best_i = np.full((len(queries), 0), -1, dtype=np.intp)
+        for lo in range(0, len(self.data), DATA_BLOCK):
+            hi = min(lo + DATA_BLOCK, len(self.data))
+            d = _sq_distances(queries, queries_sq, self.data[lo:hi], self.data_sq[lo:hi])
+            best_d, best_i = _merge_top_k(best_d, best_i, d, np.arange(lo, hi), k)
+        return best_d, best_i
+
+    def kneighbors(self, X, k):
+        """(distances, indices) of the k nearest training rows found in the probed lists"""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        n_probe = min(self.n_probe, self.n_lists_)
+        distances = np.empty((len(X), k))
+        indices = np.empty((len(X), k), dtype=np.intp)
+
+        for start in range(0, len(X), QUERY_BLOCK):
+            queries = X[start:start + QUERY_BLOCK]
+            queries_sq = np.einsum("ij,ij->i", queries, queries)
+            to_centroids = _sq_distances(queries, queries_sq, self.centroids, self.centroids_sq)
+            if n_probe < self.n_lists_:
+                probes = np.argpartition(to_centroids, n_probe - 1, axis=1)[:, :n_probe]
+            else:
+                probes = np.broadcast_to(np.arange(self.n_lists_), (len(queries), self.n_lists_))
+
+            best_d = np.full((len(queries), k), np.inf)
+            best_i = np.full((len(queries), k), -1, dtype=np.intp)
+
+            # Scan list by list, each against all queries of the block that probe it
+            probed = np.zeros((len(queries), self.n_lists_), dtype=bool)
+            probed[np.arange(len(queries))[:, None], probes] = True
+            for list_id in np.flatnonzero(probed.any(axis=0)):
+                lo, hi = self.offsets[list_id], self.offsets[list_id + 1]
+                if lo == hi:
+                    continue
+                rows = np.flatnonzero(probed[:, list_id])
+                d = _sq_distances(queries[rows], queries_sq[rows], self.data[lo:hi], self.data_sq[lo:hi])
+                best_d[rows], best_i[rows] = _merge_top_k(best_d[rows], best_i[rows], d, np.arange(lo, hi), k)
+
+            # Probed lists holding fewer than k rows: fall back to an exact scan for those queries
+            short = np.flatnonzero((best_i < 0).any(axis=1))
+            if len(short):
+                best_d[short], best_i[short] = self.exact_kneighbors(queries[short], k, queries_sq[short])
+
+            order = np.argsort(best_d, axis=1, kind="stable")
+            distances[start:start + len(queries)] = np.sqrt(np.take_along_axis(best_d, order, axis=1))
+            indices[start:start + len(queries)] = self.order[np.take_along_axis(best_i, order, axis=1)]
+
+        return distances, indices
+
+
+class GrowableRows:
+    """Array with amortized O(1) appends along axis 0 (capacity doubles when full)"""
+
+    def __init__(self, initial):
+        initial = np.asarray(initial)
+        self.array = np.empty((max(len(initial), 16),) + initial.shape[1:], dtype=initial.dtype)
+        self.array[:len(initial)] = initial
+        self.size = len(initial)
+
+    def __len__(self):
+        return self.size
+
+    def append(self, rows):
+        rows = np.asarray(rows, dtype=self.array.dtype)
+        needed = self.size + len(rows)
+        if needed > len(self.array):
+            # Views of the old buffer (held by readers) stay valid; only new rows go to the new one
+            grown = np.empty((max(needed, 2 * len(self.array)),) + self.array.shape[1:], dtype=self.array.dtype)
+            grown[:self.size] = self.array[:self.size]
+            self.array = grown
+        self.array[self.size:needed] = rows
+        self.size = needed
+
+    def view(self):
+        return self.array[:self.size]
+
+
+class KNNIndexClassifier:
+    """
+    Majority-vote KNN classifier over a scaled feature space and a selectable index.
+
+    Mirrors the parts of KNeighborsClassifier the app uses (fit, predict,
+    predict_proba, kneighbors, score, classes_) and records build and query
+    timings for reporting.
+
+    Rows added with partial_fit are searched exactly next to the index
+    until rebuild_threshold of them have accumulated; the index is then
+    rebuilt over all rows on a background thread and swapped in. The
+    scaling fitted on the original rows is kept.
+    """
+
+    def __init__(self, n_neighbors=5, scaling='none', index='auto', n_lists=None, n_probe=8,
+                 rebuild_threshold=1000):
+        if scaling not in SCALERS:
+            raise ValueError(f"scaling must be one of {list(SCALERS)}")
+        if index not in INDEX_BACKENDS:
+            raise ValueError(f"index must be one of {list(INDEX_BACKENDS)}")
+        self.n_neighbors = n_neighbors
+        self.scaling = scaling
+        self.index = index
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.rebuild_threshold = rebuild_threshold
+        self.build_seconds = None
+        self.last_query = None  # {"rows", "seconds"} of the most recent neighbor search
+        self.rebuilds = 0
+        self._lock = threading.Lock()
+        self._rebuilding = False
+
+    def _build_index(self, scaled):
+        if self.index == 'ivf':
+            return IVFIndex(n_lists=self.n_lists, n_probe=self.n_probe).fit(scaled)
+        return NearestNeighbors(algorithm=self.index).fit(scaled)
+
+    def fit(self, X, y):
+        start = time.perf_counter()
+        X = np.asarray(X, dtype=np.float64)
+        self.classes_, y_codes = np.unique(np.asarray(y), return_inverse=True)
+        self._offset, self._scale = fit_scaler(X, self.scaling)
+        scaled = (X - self._offset) / self._scale
+
+        self._rows = GrowableRows(scaled)
+        self._codes = GrowableRows(y_codes)
+        self._index = self._build_index(scaled)
+        self._indexed = len(X)
+        self.build_seconds = time.perf_counter() - start
+        return self
+
+    @property
+    def n_samples_fit_(self):
+        return len(self._rows)
+
+    def transform(self, X):
+        """Apply the fitted feature scaling"""
+        return (np.asarray(X, dtype=np.float64) - self._offset) / self._scale
+
+    def partial_fit(self, X, y):
+        """
+        Add labelled rows; they are searched from the next query on.
+
+        Labels must be among classes_. Returns True if this call started a
+        background index rebuild.
+        """
+        y = np.asarray(y)
+        codes = np.searchsorted(self.classes_, y)
+        unknown = (codes >= len(self.classes_)) | (self.classes_[np.minimum(codes, len(self.classes_) - 1)] != y)
+        if unknown.any():
+            raise ValueError(f"Unknown class labels: {sorted(set(y[unknown].tolist()))}")
+        scaled = self.transform(X)
+
+        with self._lock:
+            self._rows.append(scaled)
+            self._codes.append(codes)
+            start = (not self._rebuilding and self.rebuild_threshold is not None
+                     and len(self._rows) - self._indexed >= self.rebuild_threshold)
+            if start:
+                self._rebuilding = True
+        if start:
+            threading.Thread(target=self._rebuild, name="knn-index-rebuild", daemon=True).start()
+        return start
+
+    def _rebuild(self):
+        try:
+            with self._lock:
+                rows = self._rows.view()
+            started = time.perf_counter()
+            index = self._build_index(rows)
+            with self._lock:
+                self._index, self._indexed = index, len(rows)
+                self.build_seconds = time.perf_counter() - started
+                self.rebuilds += 1
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+    def kneighbors(self, X, n_neighbors=None, return_distance=True):
+        with self._lock:
+            index, indexed, rows = self._index, self._indexed, self._rows.view()
+        k = min(n_neighbors or self.n_neighbors, len(rows))
+        start = time.perf_counter()
+        queries = self.transform(X)
+        distances, indices = index.kneighbors(queries, min(k, indexed))
+
+        if len(rows) > indexed:
+            # Rows appended since the last build: exact scan, merged into the index results
+            pending = rows[indexed:]
+            d = _sq_distances(queries, np.einsum("ij,ij->i", queries, queries),
+                              pending, np.einsum("ij,ij->i", pending, pending))
+            best_d, indices = _merge_top_k(distances ** 2, indices, d, np.arange(indexed, len(rows)), k)
+            order = np.argsort(best_d, axis=1, kind="stable")
+            distances = np.sqrt(np.take_along_axis(best_d, order, axis=1))
+            indices = np.take_along_axis(indices, order, axis=1)
+
+        self.last_query = {"rows": len(indices), "seconds": time.perf_counter() - start}
+        return (distances, indices) if return_distance else indices
+
+    def predict_proba(self, X):
+        neighbors = self.kneighbors(X, return_distance=False)
+        codes = self._codes.view()
+        n_classes = len(self.classes_)
+        rows = np.arange(len(neighbors))[:, None] * n_classes
+        votes = np.bincount((rows + codes[neighbors]).ravel(), minlength=len(neighbors) * n_classes)
+        return votes.reshape(len(neighbors), n_classes) / neighbors.shape[1]
+
+    def predict(self, X):
+        # argmax keeps the first maximum, so ties go to the smallest label like sklearn
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def score(self, X, y):
+        return float(np.mean(self.predict(X) == np.asarray(y)))
+
+    def recall_at_k(self, X, k=None, sample=200, random_state=0):
+        """
+        Fraction of the exact k nearest neighbors that the index returns,
+        measured on up to `sample` rows of X (1.0 for the exact backends).
+        """
+        if self.index != 'ivf' or len(X) == 0:
+            return 1.0
+        index = self._index
+        k = min(k or self.n_neighbors, len(index.data))
+        X = np.asarray(X, dtype=np.float64)
+        rows = np.random.default_rng(random_state).choice(len(X), min(sample, len(X)), replace=False)
+        queries = self.transform(X[rows])
+
+        _, approx = index.kneighbors(queries, k)
+        _, exact = index.exact_kneighbors(queries, k)
+        exact = index.order[exact]
+        hits = sum(len(np.intersect1d(a, e)) for a, e in zip(approx, exact))
+        return hits / (len(rows) * k)
+
+    def stats(self):
+        """Index configuration and timings"""
+        with self._lock:
+            indexed, total = self._indexed, len(self._rows)
+        info = {
+            "index": self.index,
+            "scaling": self.scaling,
+            "n_samples": total,
+            "indexed_rows": indexed,
+            "pending_rows": total - indexed,
+            "rebuilds": self.rebuilds,
+            "rebuilding": self._rebuilding,
+            "build_ms": round(self.build_seconds * 1000, 3)
+        }
+        if self.index == 'ivf':
+            info.update(n_lists=self._index.n_lists_, n_probe=min(self.n_probe, self._index.n_lists_))
+        if self.last_query:
+            info["query_ms"] = round(self.last_query["seconds"] * 1000, 3)
+            info["query_ms_per_row"] = round(self.last_query["seconds"] * 1000 / max(self.last_query["rows"], 1), 6)
+        return info
@@ -0,0 +1,304 @@
+"""
+KNN Out-of-Core Module
+
+Training and evaluation for datasets larger than memory. A CSV is read in
+chunks and written as a row-major float32 feature matrix plus int32 target
+codes; neighbor search then streams that matrix in blocks sized to a fixed
+memory budget, keeping only a running top-k per query.
+"""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .knn_index import SCALERS, _merge_top_k, _sq_distances
+
+
+# Rows parsed per CSV chunk (KNN_OOC_CHUNK_ROWS)
+CHUNK_ROWS = int(os.environ.get("KNN_OOC_CHUNK_ROWS", 100_000))
+# Peak working memory of one block during a scan (KNN_OOC_MEMORY_BYTES)
+MEMORY_BUDGET = int(os.environ.get("KNN_OOC_MEMORY_BYTES", 256 * 1024 * 1024))
+# Held-out rows actually scored; every one of them costs a full scan's worth of distances
+MAX_EVAL_ROWS = int(os.environ.get("KNN_OOC_MAX_EVAL_ROWS", 5000))
+
+CATEGORICAL_DTYPES = ['object', 'string', 'category', 'bool']
+
+
+def ingest_csv(csv_path, directory, target, drop_columns=('Loan_ID',), chunk_rows=CHUNK_ROWS):
+    """
+    Encode a CSV into features.f32 / target.i32 in `directory`, one chunk at a time.
+
+    Missing values follow the in-memory upload (forward fill, then back
+    fill, then 0) with the fill carried across chunk boundaries. Categorical
+    columns get LabelEncoder codes: labels are numbered as they appear and
+    renumbered in sorted order once the whole file has been seen.
+
+    Returns:
+        Dataset description for DatasetRegistry.commit_matrix, plus raw and
+        encoded previews of the first rows
+    """
+    features_path = os.path.join(directory, "features.f32")
+    target_path = os.path.join(directory, "target.i32")
+
+    # Column types come from the first chunk; categorical columns are then read as text
+    # throughout, so a later chunk of digit-only labels is not parsed as numbers
+    head = pd.read_csv(csv_path, nrows=chunk_rows)
+    head = head.drop(columns=[col for col in drop_columns if col in head.columns])
+    if target not in head.columns:
+        raise ValueError(f"Dataset has no '{target}' column")
+    if head.empty:
+        raise ValueError("The CSV file has no rows")
+    feature_columns = [col for col in head.columns if col != target]
+    categorical = set(head.select_dtypes(include=CATEGORICAL_DTYPES).columns) | {target}
+    preview = head.head()
+    del head
+
+    labels = {col: {} for col in categorical}  # categorical column -> {label: provisional code}
+    last = None  # last non-missing value per column, carried into the next chunk
+    leading = {col: 0 for col in feature_columns + [target]}  # rows before the first non-missing value
+    first_values = {}
+    rows = 0
+
+    reader = pd.read_csv(csv_path, chunksize=chunk_rows, dtype={col: str for col in categorical})
+    with open(features_path, "wb") as features_file, open(target_path, "wb") as target_file:
+        for chunk in reader:
+            chunk = chunk.drop(columns=[col for col in drop_columns if col in chunk.columns])
+            chunk = chunk.ffill()
+            if last is not None:
+                chunk = chunk.fillna(last)
+            last = chunk.ffill().iloc[-1]
+
+            encoded = np.empty((len(chunk), len(feature_columns) + 1), dtype=np.float64)
+            for j, col in enumerate(feature_columns + [target]):
+                values = chunk[col]
+                missing = values.isna().to_numpy()
+                if col not in first_values:
+                    # Still inside the column's leading gap: back-filled once a value shows up
+                    gap = int(np.argmin(missing)) if not missing.all() else len(values)
+                    leading[col] += gap
+                if col in categorical:
+                    seen = labels[col]
+                    for label in pd.unique(values[~missing].astype(str)):
+                        seen.setdefault(label, len(seen))
+                    # np.array copies: to_numpy() may return a read-only view under copy-on-write
+                    codes = np.array(values.astype(str).map(seen), dtype=np.float64)
+                    codes[missing] = np.nan
+                else:
+                    codes = pd.to_numeric(values, errors="raise").to_numpy(dtype=np.float64)
+                if col not in first_values and not missing.all():
+                    first_values[col] = codes[np.argmin(missing)]
+                encoded[:, j] = codes
+
+            features_file.write(np.nan_to_num(encoded[:, :-1], nan=0.0).astype(np.float32).tobytes())
+            target_file.write(np.nan_to_num(encoded[:, -1], nan=0.0).astype(np.int32).tobytes())
+            rows += len(chunk)
+
+    features = np.memmap(features_path, dtype=np.float32, mode="r+", shape=(rows, len(feature_columns)))
+    target_codes = np.memmap(target_path, dtype=np.int32, mode="r+", shape=(rows,))
+    columns = {col: (features, j) for j, col in enumerate(feature_columns)}
+
+    # Back fill each leading gap with the column's first value (0 if it never had one)
+    for col, gap in leading.items():
+        if gap:
+            fill = first_values.get(col, np.nan)
+            if col == target:
+                target_codes[:gap] = 0 if np.isnan(fill) else fill
+            else:
+                matrix, j = columns[col]
+                matrix[:gap, j] = 0 if np.isnan(fill) else fill
+
+    # Renumber provisional codes into LabelEncoder's sorted order
+    encoders = {}
+    for col, seen in labels.items():
+        if not seen:
+            # Never had a value: filled with 0, which the in-memory path encodes as the label "0"
+            encoders[col] = ["0"]
+            continue
+        classes = sorted(seen)
+        lut = np.empty(len(seen), dtype=np.int64)
+        lut[[seen[label] for label in classes]] = np.arange(len(seen))
+        for start in range(0, rows, chunk_rows):
+            stop = min(start + chunk_rows, rows)
+            if col == target:
+                target_codes[start:stop] = lut[target_codes[start:stop]]
+            else:
+                matrix, j = columns[col]
+                matrix[start:stop, j] = lut[matrix[start:stop, j].astype(np.int64)]
+        encoders[col] = classes
+    features.flush()
+    target_codes.flush()
+
+    encoded_preview = pd.DataFrame(np.asarray(features[:len(preview)]), columns=feature_columns)
+    encoded_preview[target] = np.asarray(target_codes[:len(preview)])
+    return {
+        "columns": feature_columns + [target],
+        "feature_columns": feature_columns,
+        "target": target,
+        "rows": rows,
+        "dtypes": {col: "int32" if col == target else "float32" for col in feature_columns + [target]},
+        "encoders": encoders,
+        "preview": preview,
+        "encoded_preview": encoded_preview
+    }
+
+
+def _test_mask(start, stop, test_fraction, seed):
+    """Held-out rows of [start, stop); derived from the position so no global mask is stored"""
+    rng = np.random.default_rng([seed, start])
+    return rng.random(stop - start) < test_fraction
+
+
+# Peak 8-byte values held per block row, per query and per feature. Per query: the
+# distance block, its concatenation with the running top-k, the matching id array and
+# argpartition's index array (the matmul temporaries are freed before the merge). Per
+# feature: the float64 cast, the offset and scaled copies and the row-mask selection.
+BLOCK_VALUES_PER_QUERY = 4
+BLOCK_VALUES_PER_FEATURE = 4
+
+
+def _block_rows(n_queries, n_features, memory_budget):
+    """
+    Training rows per block so a block's peak working memory fits the budget
+    (at least 1024 rows, so very small budgets can still be exceeded)
+    """
+    per_row = 8 * (BLOCK_VALUES_PER_QUERY * n_queries + BLOCK_VALUES_PER_FEATURE * n_features + 2)
+    return max(1024, memory_budget // per_row)
+
+
+def _scaler_from_stream(features, block_rows, train_mask, kind):
+    """fit_scaler over the training rows of a memory-mapped matrix, one block at a time"""
+    n_features = features.shape[1]
+    if kind == 'none':
+        return np.zeros(n_features), np.ones(n_features)
+    count = 0
+    total, total_sq = np.zeros(n_features), np.zeros(n_features)
+    low, high = np.full(n_features, np.inf), np.full(n_features, -np.inf)
+    for start in range(0, len(features), block_rows):
+        stop = min(start + block_rows, len(features))
+        block = np.asarray(features[start:stop], dtype=np.float64)[train_mask(start, stop)]
+        count += len(block)
+        total += block.sum(axis=0)
+        total_sq += np.einsum("ij,ij->j", block, block)
+        low = np.minimum(low, block.min(axis=0, initial=np.inf))
+        high = np.maximum(high, block.max(axis=0, initial=-np.inf))
+    if count == 0:
+        return np.zeros(n_features), np.ones(n_features)
+    if kind == 'standard':
+        offset = total / count
+        scale = np.sqrt(np.maximum(total_sq / count - offset ** 2, 0))
+    else:
+        offset, scale = low, high - low
+    return offset, np.where(scale > 0, scale, 1.0)
+
+
+def blockwise_kneighbors(features, queries, k, offset, scale, row_mask=None, memory_budget=MEMORY_BUDGET):
+    """
+    Exact k nearest rows of a (possibly memory-mapped) matrix, scanned in blocks.
+
+    Args:
+        features: (n, d) matrix
+        queries: (q, d) query rows, already scaled
+        k: Number of neighbors
+        offset, scale: Scaling applied to each block of features
+        row_mask: Optional row_mask(start, stop) -> bool array of rows to search
+        memory_budget: Bytes of working memory for one block (see _block_rows)
+
+    Returns:
+        (distances, indices), each (q, k), nearest first
+    """
+    queries = np.ascontiguousarray(queries, dtype=np.float64)
+    queries_sq = np.einsum("ij,ij->i", queries, queries)
+    block_rows = _block_rows(len(queries), features.shape[1], memory_budget)
+
+    best_d = np.full((len(queries), 0), np.inf)
+    best_i = np.full((len(queries), 0), -1, dtype=np.intp)
+    for start in range(0, len(features), block_rows):
+        stop = min(start + block_rows, len(features))
+        block = (np.asarray(features[start:stop], dtype=np.float64) - offset) / scale
+        ids = np.arange(start, stop)
+        if row_mask is not None:
+            keep = row_mask(start, stop)
+            block, ids = block[keep], ids[keep]
+        if len(ids):
+            d = _sq_distances(queries, queries_sq, block, np.einsum("ij,ij->i", block, block))
+            best_d, best_i = _merge_top_k(best_d, best_i, d, ids, k)
+
+    order = np.argsort(best_d, axis=1, kind="stable")
+    return np.sqrt(np.take_along_axis(best_d, order, axis=1)), np.take_along_axis(best_i, order, axis=1)
+
+
+def evaluate_holdout(features, target, n_classes, k, test_fraction, scaling='standard',
+                     max_eval_rows=MAX_EVAL_ROWS, memory_budget=MEMORY_BUDGET, seed=42):
+    """
+    Holdout evaluation of majority-vote KNN on a memory-mapped dataset.
+
+    Each row is held out with probability test_fraction (seeded by its
+    block, so the split is reproducible without storing it). Up to
+    max_eval_rows held-out rows are scored against every training row.
+
+    Returns:
+        dict with the confusion matrix over the scored rows, split sizes,
+        scaling, block size and timings
+    """
+    if scaling not in SCALERS:
+        raise ValueError(f"scaling must be one of {list(SCALERS)}")
+    started = time.perf_counter()
+    n_rows = len(features)
+    # Split granularity is fixed so the split does not depend on the memory budget
+    split_rows = CHUNK_ROWS
+
+    def is_test(start, stop):
+        # Blocks may straddle split chunks; stitch the per-chunk masks together
+        parts = []
+        for chunk_start in range(start - start % split_rows, stop, split_rows):
+            chunk_stop = min(chunk_start + split_rows, n_rows)
+            mask = _test_mask(chunk_start, chunk_stop, test_fraction, seed)
+            parts.append(mask[max(start, chunk_start) - chunk_start:min(stop, chunk_stop) - chunk_start])
+        return np.concatenate(parts)
+
+    def is_train(start, stop):
+        return ~is_test(start, stop)
+
+    test_rows = np.concatenate([
+        np.flatnonzero(is_test(start, min(start + split_rows, n_rows))) + start
+        for start in range(0, n_rows, split_rows)
+    ]) if n_rows else np.zeros(0, dtype=np.intp)
+    n_test = len(test_rows)
+    n_train = n_rows - n_test
+    if n_train == 0 or n_test == 0:
+        raise ValueError("The split leaves no training or no test rows; adjust test_size")
+    k = min(k, n_train)
+
+    if n_test > max_eval_rows:
+        test_rows = np.sort(np.random.default_rng(seed).choice(test_rows, max_eval_rows, replace=False))
+
+    block_rows = _block_rows(len(test_rows), features.shape[1], memory_budget)
+    offset, scale = _scaler_from_stream(features, block_rows, is_train, scaling)
+    scaled_at = time.perf_counter()
+
+    queries = (np.asarray(features[test_rows], dtype=np.float64) - offset) / scale
+    _, neighbors = blockwise_kneighbors(features, queries, k, offset, scale, is_train, memory_budget)
+    searched_at = time.perf_counter()
+
+    # Majority vote; argmax keeps the first maximum so ties go to the smallest code
+    neighbor_codes = np.asarray(target[neighbors.ravel()], dtype=np.int64).reshape(neighbors.shape)
+    votes = np.bincount((np.arange(len(neighbors))[:, None] * n_classes + neighbor_codes).ravel(),
+                        minlength=len(neighbors) * n_classes).reshape(len(neighbors), n_classes)
+    predicted = votes.argmax(axis=1)
+    actual = np.asarray(target[test_rows], dtype=np.int64)
+    cm = np.bincount(actual * n_classes + predicted, minlength=n_classes * n_classes).reshape(n_classes, n_classes)
+
+    return {
+        "confusion_matrix": cm,
+        "train_size": int(n_train),
+        "test_size": int(n_test),
+        "evaluated_rows": int(len(test_rows)),
+        "k_value": int(k),
+        "scaling": scaling,
+        "block_rows": int(block_rows),
+        "memory_budget": int(memory_budget),
+        "scaling_ms": round((scaled_at - started) * 1000, 3),
+        "search_ms": round((searched_at - scaled_at) * 1000, 3)
+    }
@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from sklearn.metrics import accuracy_score, confusion_matrix
+from modules.utils.metrics import evaluate
 import seaborn as sns
 import matplotlib.pyplot as plt
 
@@ -28,11 +28,19 @@ def render():
 
 def _show_evaluation(y_test, y_pred):
     """Tampilkan evaluasi model"""
-    acc = accuracy_score(y_test, y_pred)
-    st.metric("Accuracy", f"{acc * 100:.2f}%")
+    evaluation = evaluate(y_test, y_pred, n_resamples=2000)
+    # Empty when there is nothing to resample (no test rows)
+    intervals = evaluation.get("confidence_intervals", {})
+
+    cols = st.columns(4)
+    for col, (name, label) in zip(cols, [("accuracy", "Accuracy"), ("precision", "Precision"),
+                                         ("recall", "Recall"), ("f1_score", "F1-Score")]):
+        col.metric(label, f"{evaluation[name] * 100:.2f}%")
+        if intervals:
+            col.caption(f"95% CI: {intervals[name]['low'] * 100:.1f}% – {intervals[name]['high'] * 100:.1f}%")
 
     # Confusion Matrix
-    cm = confusion_matrix(y_test, y_pred)
+    cm = evaluation["confusion_matrix"]
     fig, ax = plt.subplots(figsize=(6, 4))
     sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', ax=ax)
     ax.set_xlabel('Predicted')
@@ -6,10 +6,389 @@ LBP labels pixels by thresholding the neighborhood of each pixel and creates
 a binary pattern from the result.
 """
 
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 from PIL import Image
 from skimage.feature import local_binary_pattern
-from skimage import color
+
+from .lbp_engine import lbp_codes, supports_native
+from .utils.grayscale import to_gray_uint8
+
+
+def _lbp_labels(image_array: np.ndarray, radius: int, n_points: int, method: str) -> np.ndarray:
+    """LBP label image; integer for every method except 'var'"""
+    # Convert to grayscale if needed (integer luma, no float64 copy)
+    img_gray = to_gray_uint8(image_array)
+
+    # Table-driven engine for the common neighborhoods, skimage otherwise
+    if supports_native(n_points, radius, method):
+        return lbp_codes(img_gray, n_points, radius, method)
+
+    lbp = local_binary_pattern(img_gray, n_points, radius, method=method)
+    if method == 'var':
+        return lbp
+    # skimage returns whole numbers as float64; integer labels allow bincount statistics
+    return lbp.astype(np.uint8 if lbp.max(initial=0) < 256 else np.uint32)
+
+
+def pattern_counts(lbp_array: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Distinct LBP values and their pixel counts, in ascending order.
+
+    Integer label images use a single np.bincount pass; floating point
+    ('var') images fall back to np.unique.
+    """
+    if not np.issubdtype(lbp_array.dtype, np.integer):
+        return np.unique(lbp_array, return_counts=True)
+    counts = np.bincount(lbp_array.ravel())
+    values = np.flatnonzero(counts)
+    return values, counts[values]
+
+
+def _normalize_for_display(lbp_array: np.ndarray, lbp_min, lbp_max) -> np.ndarray:
+    """Stretch LBP values to 0-255, through a lookup table for integer labels"""
+    scale = lbp_max - lbp_min + 1e-10
+    if np.issubdtype(lbp_array.dtype, np.integer):
+        table = ((np.arange(lbp_max + 1) - lbp_min) / scale * 255).astype(np.uint8)
+        return table[lbp_array]
+    return ((lbp_array - lbp_min) / scale * 255).astype(np.uint8)
+
+
+def _histogram_from_counts(values: np.ndarray, counts: np.ndarray, total: int, n_bins: int) -> dict:
+    """Same result as np.histogram(lbp, bins=n_bins, range=(0, n_bins)) for integer labels"""
+    hist = np.zeros(n_bins, dtype=np.int64)
+    # The last bin is closed, so a value equal to n_bins lands in it
+    inside = values < n_bins
+    hist[values[inside]] = counts[inside]
+    hist[-1] += counts[values == n_bins].sum()
+    bin_edges = np.linspace(0, n_bins, n_bins + 1)
+
+    # Normalize histogram
+    hist_normalized = hist.astype(float) / (hist.sum() + 1e-10)
+
+    return {
+        "histogram": hist.tolist(),
+        "histogram_normalized": hist_normalized.tolist(),
+        "bin_edges": bin_edges.tolist(),
+        "total_pixels": int(total),
+        "entropy": float(-np.sum(hist_normalized * np.log2(hist_normalized + 1e-10)))
+    }
+
+
+def _uniformity_from_counts(values: np.ndarray, counts: np.ndarray, total: int, top_k: int = 5) -> dict:
+    """Uniformity metrics from distinct values and their counts"""
+    # Find dominant patterns (only the top_k need ordering)
+    if len(counts) > top_k:
+        candidates = np.argpartition(counts, -top_k)[-top_k:]
+        candidates = candidates[np.argsort(counts[candidates], kind="stable")[::-1]]
+    else:
+        candidates = np.argsort(counts, kind="stable")[::-1]
+    top_patterns = [{
+        "pattern": int(values[idx]),
+        "count": int(counts[idx]),
+        "percentage": float(counts[idx] / total * 100)
+    } for idx in candidates]
+
+    # Calculate uniformity score (how concentrated the distribution is)
+    probs = counts / total
+    entropy = -np.sum(probs * np.log2(probs + 1e-10))
+    max_entropy = np.log2(len(values)) if len(values) > 1 else 1
+    uniformity_score = 1 - (entropy / max_entropy) if max_entropy > 0 else 1
+
+    return {
+        "unique_patterns": len(values),
+        "top_patterns": top_patterns,
+        "entropy": float(entropy),
+        "uniformity_score": float(uniformity_score),
+        "texture_type": "uniform" if uniformity_score > 0.7 else ("moderate" if uniformity_score > 0.4 else "complex")
+    }
+
+
+def default_histogram_bins(n_points: int, method: str) -> int:
+    """Histogram size used by the API: P + 2 bins for 'uniform', 256 otherwise"""
+    return n_points + 2 if method == 'uniform' else 256
+
+
+def analyze_lbp(image_array: np.ndarray, radius: int = 1, n_points: int = 8, method: str = 'uniform',
+                n_bins: int = None) -> dict:
+    """
+    Compute LBP and all of its statistics from a single pattern count.
+
+    Args:
+        image_array: NumPy array of the image (RGB or grayscale)
+        radius: Radius of circle for neighbor sampling
+        n_points: Number of circularly symmetric neighbor points
+        method: LBP method ('default', 'ror', 'uniform', 'nri_uniform', 'var')
+        n_bins: Histogram bins (default_histogram_bins if None)
+
+    Returns:
+        Dictionary with lbp_image (uint8), lbp (raw labels), info,
+        histogram and uniformity (same fields as compute_lbp,
+        compute_lbp_histogram and analyze_texture_uniformity)
+    """
+    lbp = _lbp_labels(image_array, radius, n_points, method)
+    values, counts = pattern_counts(lbp)
+    lbp_min, lbp_max = values[0], values[-1]
+
+    if np.issubdtype(lbp.dtype, np.integer):
+        histogram = _histogram_from_counts(values, counts, lbp.size, n_bins or default_histogram_bins(n_points, method))
+    else:
+        histogram = compute_lbp_histogram(lbp, n_bins or default_histogram_bins(n_points, method))
+
+    return {
+        "lbp_image": _normalize_for_display(lbp, lbp_min, lbp_max),
+        "lbp": lbp,
+        "info": {
+            "radius": radius,
+            "n_points": n_points,
+            "method": method,
+            "unique_patterns": int(len(values)),
+            "lbp_min": float(lbp_min),
+            "lbp_max": float(lbp_max)
+        },
+        "histogram": histogram,
+        "uniformity": _uniformity_from_counts(values, counts, lbp.size)
+    }
+
+
+# Output encodings for the LBP visualization ('none' skips it)
+LBP_IMAGE_FORMATS = ('png', 'png_fast', 'webp', 'raw', 'none')
+LBP_IMAGE_MEDIA_TYPES = {
+    'png': 'image/png',
+    'png_fast': 'image/png',
+    'webp': 'image/webp',
+    'raw': 'application/octet-stream'
+}
+
+
+def encode_lbp_image(lbp_image: np.ndarray, image_format: str = 'png', max_edge: int = None):
+    """
+    Encode the uint8 LBP visualization.
+
+    Args:
+        lbp_image: 2D uint8 image (analyze_lbp()["lbp_image"])
+        image_format: 'png' (default compression), 'png_fast' (lossless,
+            lowest compression effort), 'webp' (lossless), 'raw' (row-major
+            uint8 bytes) or 'none'
+        max_edge: Downscale so the longer edge is at most this many pixels
+
+    Returns:
+        Tuple of (bytes or None, media type or None, [height, width])
+    """
+    if image_format not in LBP_IMAGE_FORMATS:
+        raise ValueError(f"image_format must be one of {list(LBP_IMAGE_FORMATS)}")
+    if image_format == 'none':
+        return None, None, list(lbp_image.shape)
+
+    img = Image.fromarray(lbp_image)
+    if max_edge and max(img.size) > max_edge:
+        img.thumbnail((max_edge, max_edge), Image.BILINEAR)
+    shape = [img.size[1], img.size[0]]
+
+    if image_format == 'raw':
+        return img.tobytes(), LBP_IMAGE_MEDIA_TYPES['raw'], shape
+
+    buffer = io.BytesIO()
+    if image_format == 'png':
+        img.save(buffer, format="PNG")
+    elif image_format == 'png_fast':
+        img.save(buffer, format="PNG", compress_level=1)
+    else:
+        # quality is the effort knob in lossless mode; 0 is fastest and still smaller than PNG here
+        img.save(buffer, format="WEBP", lossless=True, method=0, quality=0)
+    return buffer.getvalue(), LBP_IMAGE_MEDIA_TYPES[image_format], shape
+
+
+# Methods whose label count stays small enough for a fixed-length descriptor
+MULTISCALE_METHODS = ('uniform', 'nri_uniform')
+DEFAULT_SCALES = ((1, 8), (2, 16), (3, 24))
+
+
+def n_labels(n_points: int, method: str) -> int:
+    """Number of distinct labels an LBP method can produce"""
+    if method == 'uniform':
+        return n_points + 2
+    if method == 'nri_uniform':
+        return n_points * (n_points - 1) + 3
+    return 1 << n_points
+
+
+def _scale_histogram(img_gray: np.ndarray, radius: int, n_points: int, method: str) -> dict:
+    """Normalized label histogram for one (radius, n_points) scale"""
+    lbp = _lbp_labels(img_gray, radius, n_points, method)
+    values, counts = pattern_counts(lbp)
+    hist = np.zeros(n_labels(n_points, method))
+    hist[values] = counts
+    hist /= lbp.size
+    return {
+        "radius": radius,
+        "n_points": n_points,
+        "n_bins": len(hist),
+        "unique_patterns": int(len(values)),
+        "entropy": float(-np.sum(hist[values] * np.log2(hist[values]))),
+        "histogram": hist
+    }
+
+
+def compute_multiscale_lbp(image_array: np.ndarray, scales=DEFAULT_SCALES, method: str = 'uniform',
+                           max_workers: int = None) -> dict:
+    """
+    Multi-scale LBP descriptor: one histogram per (radius, n_points) scale.
+
+    The image is converted to grayscale once and the scales are computed
+    concurrently on threads (the LBP kernels release the GIL).
+
+    Args:
+        image_array: NumPy array of the image (RGB or grayscale)
+        scales: Sequence of (radius, n_points) pairs
+        method: 'uniform' or 'nri_uniform'
+        max_workers: Thread count (default: one per scale, at most the CPU count)
+
+    Returns:
+        Dictionary with per-scale histograms and the concatenated
+        feature_vector, L1-normalized so every scale carries equal weight
+    """
+    if method not in MULTISCALE_METHODS:
+        raise ValueError(f"method must be one of {list(MULTISCALE_METHODS)}")
+    if not scales:
+        raise ValueError("At least one scale is required")
+
+    img_gray = to_gray_uint8(image_array)
+    workers = max_workers or min(len(scales), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lbp_scale") as pool:
+        results = list(pool.map(
+            lambda scale: _scale_histogram(img_gray, scale[0], scale[1], method), scales
+        ))
+
+    feature_vector = np.concatenate([result["histogram"] for result in results]) / len(results)
+    return {
+        "method": method,
+        "scales": results,
+        "feature_vector": feature_vector
+    }
+
+
+# Largest integral histogram (bins x (H+1) x (W+1) int32) built before falling back to bincount
+INTEGRAL_HISTOGRAM_MAX_BYTES = int(os.environ.get("LBP_INTEGRAL_MAX_BYTES", 512 * 1024 * 1024))
+
+
+class IntegralHistogram:
+    """
+    Per-bin summed-area tables over an LBP label image.
+
+    Built once in O(bins * pixels); the histogram of any axis-aligned
+    rectangle then costs four lookups per bin.
+    """
+
+    def __init__(self, labels: np.ndarray, n_bins: int):
+        rows, cols = labels.shape
+        self.n_bins = n_bins
+        self.shape = (rows, cols)
+        self.table = np.zeros((n_bins, rows + 1, cols + 1), dtype=np.int32)
+        for b in range(n_bins):
+            mask = labels == b
+            np.cumsum(mask, axis=0, dtype=np.int32, out=self.table[b, 1:, 1:])
+            np.cumsum(self.table[b, 1:, 1:], axis=1, out=self.table[b, 1:, 1:])
+
+    @staticmethod
+    def nbytes_for(shape, n_bins: int) -> int:
+        """Memory an integral histogram of this size would take"""
+        return n_bins * (shape[0] + 1) * (shape[1] + 1) * 4
+
+    def regions(self, boxes: np.ndarray) -> np.ndarray:
+        """(k, bins) counts for (top, left, bottom, right) boxes, bottom/right exclusive"""
+        top, left, bottom, right = np.asarray(boxes, dtype=np.intp).T
+        t = self.table
+        return (t[:, bottom, right] - t[:, top, right] - t[:, bottom, left] + t[:, top, left]).T
+
+    def grid(self, grid_rows: int, grid_cols: int) -> np.ndarray:
+        """(grid_rows, grid_cols, bins) counts for an even partition of the image"""
+        row_edges, col_edges = _grid_edges(self.shape, grid_rows, grid_cols)
+        corners = self.table[:, row_edges][:, :, col_edges]
+        cells = corners[:, 1:, 1:] - corners[:, :-1, 1:] - corners[:, 1:, :-1] + corners[:, :-1, :-1]
+        return np.moveaxis(cells, 0, -1)
+
+
+def _grid_edges(shape, grid_rows: int, grid_cols: int):
+    """Cell boundaries of an even grid (cells differ by at most one pixel)"""
+    row_edges = np.linspace(0, shape[0], grid_rows + 1).astype(np.intp)
+    col_edges = np.linspace(0, shape[1], grid_cols + 1).astype(np.intp)
+    return row_edges, col_edges
+
+
+def grid_histograms(labels: np.ndarray, n_bins: int, grid_rows: int, grid_cols: int,
+                    integral: IntegralHistogram = None) -> np.ndarray:
+    """(grid_rows, grid_cols, bins) label counts per grid cell"""
+    if integral is not None:
+        return integral.grid(grid_rows, grid_cols)
+
+    # One bincount over (cell, label) pairs
+    row_edges, col_edges = _grid_edges(labels.shape, grid_rows, grid_cols)
+    row_cell = np.searchsorted(row_edges, np.arange(labels.shape[0]), side="right") - 1
+    col_cell = np.searchsorted(col_edges, np.arange(labels.shape[1]), side="right") - 1
+    cell_ids = (row_cell[:, None] * grid_cols + col_cell[None, :]) * n_bins
+    counts = np.bincount((cell_ids + labels).ravel(), minlength=grid_rows * grid_cols * n_bins)
+    return counts.reshape(grid_rows, grid_cols, n_bins)
+
+
+def roi_histograms(labels: np.ndarray, n_bins: int, boxes, integral: IntegralHistogram = None) -> np.ndarray:
+    """(k, bins) label counts for (top, left, bottom, right) boxes"""
+    if integral is not None:
+        return integral.regions(boxes)
+    return np.array([
+        np.bincount(labels[top:bottom, left:right].ravel(), minlength=n_bins)
+        for top, left, bottom, right in boxes
+    ]).reshape(len(boxes), n_bins)
+
+
+def compute_spatial_lbp(image_array: np.ndarray, radius: int = 1, n_points: int = 8, method: str = 'uniform',
+                        grid=(7, 7), rois=None) -> dict:
+    """
+    Spatially enhanced LBP: histograms per grid cell and per region of interest.
+
+    Builds an integral histogram of the label image once (when it fits in
+    INTEGRAL_HISTOGRAM_MAX_BYTES) so every cell and ROI is a constant-time
+    lookup; larger label sets fall back to a single bincount pass.
+
+    Args:
+        image_array: NumPy array of the image (RGB or grayscale)
+        radius, n_points, method: LBP parameters ('var' is not supported)
+        grid: (rows, cols) grid, or None
+        rois: Sequence of (top, left, bottom, right) boxes in pixels, or None
+
+    Returns:
+        Dictionary with normalized cell histograms, the concatenated grid
+        descriptor and normalized ROI histograms
+    """
+    if method == 'var':
+        raise ValueError("Spatial LBP needs integer labels; 'var' is not supported")
+
+    lbp = _lbp_labels(image_array, radius, n_points, method)
+    n_bins = n_labels(n_points, method)
+    integral = None
+    if IntegralHistogram.nbytes_for(lbp.shape, n_bins) <= INTEGRAL_HISTOGRAM_MAX_BYTES:
+        integral = IntegralHistogram(lbp, n_bins)
+
+    result = {"n_bins": n_bins, "shape": list(lbp.shape), "integral_histogram": integral is not None}
+
+    if grid is not None:
+        counts = grid_histograms(lbp, n_bins, grid[0], grid[1], integral).astype(np.float32)
+        counts /= np.maximum(counts.sum(axis=2, keepdims=True), 1)
+        result["grid"] = list(grid)
+        result["cell_histograms"] = counts
+        result["descriptor"] = counts.reshape(-1)
+
+    if rois:
+        boxes = np.asarray(rois, dtype=np.intp).reshape(-1, 4)
+        counts = roi_histograms(lbp, n_bins, boxes, integral).astype(np.float32)
+        pixels = counts.sum(axis=1)
+        result["roi_pixels"] = pixels.astype(np.int64)
+        result["roi_histograms"] = counts / np.maximum(pixels, 1)[:, None]
+
+    return result
 
 
 def compute_lbp(image_array: np.ndarray, radius: int = 1, n_points: int = 8, method: str = 'uniform') -> tuple[np.ndarray, dict]:
@@ -20,31 +399,25 @@ def compute_lbp(image_array: np.ndarray, radius: int = 1, n_points: int = 8, met
         image_array: NumPy array of the image (RGB or grayscale)
         radius: Radius of circle for neighbor sampling
         n_points: Number of circularly symmetric neighbor points
-        method: LBP method ('default', 'ror', 'uniform', 'var')
+        method: LBP method ('default', 'ror', 'uniform', 'nri_uniform', 'var')
     
     Returns:
         Tuple of (lbp_image, info_dict)
     """
-    # Convert to grayscale if needed
-    if len(image_array.shape) == 3:
-        img_gray = color.rgb2gray(image_array)
-        img_gray = (img_gray * 255).astype(np.uint8)
-    else:
-        img_gray = image_array.astype(np.uint8)
-    
-    # Compute LBP
-    lbp = local_binary_pattern(img_gray, n_points, radius, method=method)
-    
+    lbp = _lbp_labels(image_array, radius, n_points, method)
+    values, _ = pattern_counts(lbp)
+    lbp_min, lbp_max = values[0], values[-1]
+
     # Normalize LBP for visualization
-    lbp_normalized = ((lbp - lbp.min()) / (lbp.max() - lbp.min() + 1e-10) * 255).astype(np.uint8)
+    lbp_normalized = _normalize_for_display(lbp, lbp_min, lbp_max)
     
     info = {
         "radius": radius,
         "n_points": n_points,
         "method": method,
-        "unique_patterns": int(len(np.unique(lbp))),
-        "lbp_min": float(lbp.min()),
-        "lbp_max": float(lbp.max())
+        "unique_patterns": int(len(values)),
+        "lbp_min": float(lbp_min),
+        "lbp_max": float(lbp_max)
     }
     
     return lbp_normalized, lbp, info
@@ -61,6 +434,10 @@ def compute_lbp_histogram(lbp_array: np.ndarray, n_bins: int = 256) -> dict:
     Returns:
         Dictionary with histogram data
     """
+    if np.issubdtype(lbp_array.dtype, np.integer):
+        values, counts = pattern_counts(lbp_array)
+        return _histogram_from_counts(values, counts, lbp_array.size, n_bins)
+
     # Compute histogram
     hist, bin_edges = np.histogram(lbp_array.ravel(), bins=n_bins, range=(0, n_bins))
     
@@ -111,6 +488,109 @@ def compare_lbp_histograms(hist1: list, hist2: list, method: str = 'chi_square')
     }
 
 
+HISTOGRAM_METRICS = ('chi_square', 'intersection', 'bhattacharyya')
+
+
+def histogram_distances(histograms: np.ndarray, query: np.ndarray, metric: str = 'chi_square') -> np.ndarray:
+    """
+    Vectorized compare_lbp_histograms: one query against many histograms.
+
+    Args:
+        histograms: (n, d) array of normalized histograms
+        query: (d,) normalized histogram
+        metric: 'chi_square', 'intersection' or 'bhattacharyya'
+
+    Returns:
+        (n,) float32 scores, with the same formulas as compare_lbp_histograms
+        (intersection is a similarity, the others are distances)
+    """
+    histograms = np.asarray(histograms, dtype=np.float32)
+    query = np.asarray(query, dtype=np.float32)
+
+    if metric == 'chi_square':
+        diff = histograms - query
+        diff *= diff
+        denom = histograms + query
+        denom += np.float32(1e-10)
+        diff /= denom
+        return diff.sum(axis=1)
+    if metric == 'intersection':
+        return np.minimum(histograms, query).sum(axis=1)
+    if metric == 'bhattacharyya':
+        coefficient = np.sqrt(histograms) @ np.sqrt(query)
+        return -np.log(coefficient + np.float32(1e-10))
+    raise ValueError(f"metric must be one of {list(HISTOGRAM_METRICS)}")
+
+
+DISTANCE_MATRIX_METRICS = ('chi_square', 'intersection', 'bhattacharyya', 'euclidean')
+
+# Upper bound on the (rows, cols, bins) float32 temporaries of one block
+MATRIX_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def histogram_distance_matrices(hist_a: np.ndarray, hist_b: np.ndarray = None, metrics=DISTANCE_MATRIX_METRICS,
+                                block_bytes: int = MATRIX_BLOCK_BYTES) -> dict:
+    """
+    All-pairs compare_lbp_histograms between two sets of histograms.
+
+    Bhattacharyya and Euclidean reduce to matrix products; chi-square and
+    intersection broadcast over row blocks sized so the (rows, M, bins)
+    temporaries stay within block_bytes.
+
+    Args:
+        hist_a: (N, d) normalized histograms
+        hist_b: (M, d) normalized histograms (hist_a itself if None)
+        metrics: Any of 'chi_square', 'intersection', 'bhattacharyya', 'euclidean'
+        block_bytes: Memory budget for one broadcast block
+
+    Returns:
+        Dictionary of metric -> (N, M) float32 matrix
+    """
+    a = np.ascontiguousarray(hist_a, dtype=np.float32)
+    b = a if hist_b is None else np.ascontiguousarray(hist_b, dtype=np.float32)
+    if a.ndim != 2 or b.ndim != 2 or a.shape[1] != b.shape[1]:
+        raise ValueError(f"Histogram sets must be 2-D with the same number of bins, got {a.shape} and {b.shape}")
+    unknown = set(metrics) - set(DISTANCE_MATRIX_METRICS)
+    if unknown:
+        raise ValueError(f"Unknown metrics {sorted(unknown)}; choose from {list(DISTANCE_MATRIX_METRICS)}")
+
+    n, m = len(a), len(b)
+    result = {}
+
+    if 'bhattacharyya' in metrics:
+        coefficient = np.sqrt(a) @ np.sqrt(b).T
+        coefficient += np.float32(1e-10)
+        result['bhattacharyya'] = -np.log(coefficient)
+
+    if 'euclidean' in metrics:
+        # Expanded |a|^2 + |b|^2 - 2ab, in float64 so identical rows come out as ~0
+        a64, b64 = a.astype(np.float64), b.astype(np.float64)
+        squared = np.einsum('ij,ij->i', a64, a64)[:, None] + np.einsum('ij,ij->i', b64, b64)[None, :]
+        squared -= 2 * (a64 @ b64.T)
+        np.maximum(squared, 0, out=squared)
+        result['euclidean'] = np.sqrt(squared).astype(np.float32)
+
+    broadcast = [metric for metric in ('chi_square', 'intersection') if metric in metrics]
+    if broadcast:
+        for metric in broadcast:
+            result[metric] = np.empty((n, m), dtype=np.float32)
+        # Two float32 temporaries of shape (rows, M, bins) per block
+        rows = max(1, block_bytes // (2 * 4 * max(1, m * a.shape[1])))
+        for start in range(0, n, rows):
+            block = a[start:start + rows, None, :]
+            if 'chi_square' in broadcast:
+                diff = block - b
+                diff *= diff
+                denom = block + b
+                denom += np.float32(1e-10)
+                diff /= denom
+                result['chi_square'][start:start + rows] = diff.sum(axis=2)
+            if 'intersection' in broadcast:
+                result['intersection'][start:start + rows] = np.minimum(block, b).sum(axis=2)
+
+    return {metric: result[metric] for metric in metrics}
+
+
 def analyze_texture_uniformity(lbp_array: np.ndarray) -> dict:
     """
     Analyze texture uniformity using LBP patterns.
@@ -121,30 +601,5 @@ def analyze_texture_uniformity(lbp_array: np.ndarray) -> dict:
     Returns:
         Dictionary with uniformity metrics
     """
-    unique, counts = np.unique(lbp_array, return_counts=True)
-    total = lbp_array.size
-    
-    # Find dominant patterns
-    sorted_indices = np.argsort(counts)[::-1]
-    top_patterns = []
-    for i in range(min(5, len(unique))):
-        idx = sorted_indices[i]
-        top_patterns.append({
-            "pattern": int(unique[idx]),
-            "count": int(counts[idx]),
-            "percentage": float(counts[idx] / total * 100)
-        })
-    
-    # Calculate uniformity score (how concentrated the distribution is)
-    probs = counts / total
-    entropy = -np.sum(probs * np.log2(probs + 1e-10))
-    max_entropy = np.log2(len(unique)) if len(unique) > 1 else 1
-    uniformity_score = 1 - (entropy / max_entropy) if max_entropy > 0 else 1
-    
-    return {
-        "unique_patterns": len(unique),
-        "top_patterns": top_patterns,
-        "entropy": float(entropy),
-        "uniformity_score": float(uniformity_score),
-        "texture_type": "uniform" if uniformity_score > 0.7 else ("moderate" if uniformity_score > 0.4 else "complex")
-    }
+    values, counts = pattern_counts(lbp_array)
+    return _uniformity_from_counts(values, counts, lbp_array.size)
@@ -0,0 +1,181 @@
+"""
+Texture Batch Module
+
+Runs GLCM/LBP analysis for many images on a process pool and yields one
+result per image as soon as it finishes.
+"""
+
+import asyncio
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from skimage.feature import graycomatrix
+
+from .glcm_engine import decode_gray, quantize_gray, glcm_features
+from .lbp_module import analyze_lbp
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+
+_pool = None
+_workers = None  # Configured pool size, read once from TEXTURE_BATCH_WORKERS
+
+
+def glcm_worker(contents: bytes, params: dict) -> dict:
+    """Compute GLCM features (no matrices) for one encoded image"""
+    levels = params["levels"]
+    img_gray, resolution = decode_gray(contents)
+    img_gray = quantize_gray(img_gray, levels)
+    angles = [np.deg2rad(deg) for deg in params["degrees"]]
+
+    glcm = graycomatrix(
+        img_gray,
+        distances=[params["distance"]],
+        angles=angles,
+        levels=levels,
+        symmetric=True,
+        normed=True
+    )
+
+    return {
+        "image_shape": list(img_gray.shape),
+        "analysis_resolution": resolution,
+        "features": {
+            name: values[0].tolist()
+            for name, values in glcm_features(glcm, extended=params.get("extended", False)).items()
+        }
+    }
+
+
+def lbp_worker(contents: bytes, params: dict) -> dict:
+    """Compute LBP statistics (no image) for one encoded image"""
+    img_gray, resolution = decode_gray(contents)
+    analysis = analyze_lbp(img_gray, params["radius"], params["n_points"], params["method"])
+
+    return {
+        "image_shape": list(img_gray.shape),
+        "analysis_resolution": resolution,
+        "info": analysis["info"],
+        "histogram": analysis["histogram"],
+        "uniformity": analysis["uniformity"]
+    }
+
+
+WORKERS = {
+    "glcm": glcm_worker,
+    "lbp": lbp_worker
+}
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Return the shared batch process pool, sized to the available cores"""
+    global _pool, _workers
+    if _pool is None:
+        if _workers is None:
+            _workers = max(1, int(os.environ.get("TEXTURE_BATCH_WORKERS", os.cpu_count() or 1)))
+        _pool = ProcessPoolExecutor(max_workers=_workers)
+    return _pool
+
+
+def _replace_pool(broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+    """
+    The shared pool after `broken` failed, starting a fresh one only if
+    `broken` is still the shared pool. Every future of a broken pool fails,
+    possibly across several concurrent batches; only the first replaces it,
+    so a healthy successor (and its work) is never shut down.
+    """
+    global _pool
+    if _pool is broken:
+        _pool = None
+        broken.shutdown(wait=False)
+    return get_pool()
+
+
+def shutdown_pool():
+    """Shut down the batch process pool if it was started"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def iter_zip_images(fileobj):
+    """Yield (name, bytes) for every image member of a zip archive, one at a time"""
+    with zipfile.ZipFile(fileobj) as archive:
+        for member in archive.infolist():
+            if member.is_dir() or not member.filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            yield member.filename, archive.read(member)
+
+
+async def run_batch(items, analysis: str, params: dict, max_in_flight: int = None):
+    """
+    Analyze images on the process pool, yielding results in completion order.
+
+    Args:
+        items: Iterable of (name, image_bytes); consumed lazily so that at most
+               max_in_flight images are held in memory, and on a thread, since
+               producing an item may read a file or zip member
+        analysis: 'glcm' or 'lbp'
+        params: Parameters passed to the worker
+        max_in_flight: Upper bound on submitted but unfinished images
+                       (defaults to twice the pool size)
+
+    Yields:
+        One dictionary per image with index, filename and status
+    """
+    worker = WORKERS[analysis]
+    loop = asyncio.get_running_loop()
+    get_pool()  # Starts the pool and reads the configured worker count
+    limit = max_in_flight or 2 * _workers
+
+    items = iter(items)
+    pending = {}
+    index = 0
+    exhausted = False
+
+    while True:
+        while not exhausted and len(pending) < limit:
+            try:
+                item = await asyncio.to_thread(next, items, None)
+            except Exception as e:
+                # The input itself is unreadable (e.g. a corrupt archive); stop feeding
+                yield {"index": index, "filename": None, "status": "error", "detail": str(e)}
+                exhausted = True
+                break
+            if item is None:
+                exhausted = True
+                break
+
+            name, contents = item
+            # The shared pool may have been replaced (or broken) by another batch meanwhile
+            pool = get_pool()
+            try:
+                future = loop.run_in_executor(pool, worker, contents, params)
+            except BrokenProcessPool:
+                pool = _replace_pool(pool)
+                future = loop.run_in_executor(pool, worker, contents, params)
+            pending[future] = (index, name, pool)
+            index += 1
+
+        if not pending:
+            break
+
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            idx, name, future_pool = pending.pop(future)
+            try:
+                result = future.result()
+                yield {"index": idx, "filename": name, "status": "success", **result}
+            except BrokenProcessPool as e:
+                # A worker died; continue the remaining images on a fresh pool
+                _replace_pool(future_pool)
+                yield {"index": idx, "filename": name, "status": "error", "detail": f"Worker crashed: {e}"}
+            except asyncio.CancelledError:
+                # The pool was shut down under this image (e.g. at server shutdown)
+                yield {"index": idx, "filename": name, "status": "error", "detail": "Cancelled"}
+            except Exception as e:
+                yield {"index": idx, "filename": name, "status": "error", "detail": str(e)}
@@ -0,0 +1,225 @@
+"""
+Texture Gallery Module
+
+Persistent store of multi-scale LBP descriptors with top-k similarity
+search. Descriptors live in one contiguous float32 matrix on disk that is
+memory-mapped and scanned in blocks, so a query against a million stored
+textures touches each row once with vectorized distance kernels.
+
+Layout of the gallery directory:
+    config.json      Descriptor settings (scales, method, dimension)
+    histograms.f32   Row-major float32 matrix, grown by doubling
+    entries.jsonl    One line per added entry, plus tombstones for removals
+"""
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from .lbp_module import DEFAULT_SCALES, HISTOGRAM_METRICS, compute_multiscale_lbp, histogram_distances, n_labels
+
+
+GALLERY_DIR = os.environ.get(
+    "TEXTURE_GALLERY_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "texture_gallery")
+)
+
+# Rows scored per block during a search
+BLOCK_ROWS = 65536
+INITIAL_CAPACITY = 1024
+
+_gallery = None
+_gallery_lock = threading.Lock()
+
+
+def describe_image(image_array, scales, method):
+    """
+    Gallery descriptor of an image for the given settings; needs no open
+    gallery, so it can run in a compute worker process
+    """
+    return compute_multiscale_lbp(image_array, scales, method)["feature_vector"]
+
+
+class TextureGallery:
+    """Append-only descriptor matrix with tombstone removal and blockwise top-k search"""
+
+    def __init__(self, directory, scales=DEFAULT_SCALES, method='uniform', block_rows=BLOCK_ROWS):
+        self.directory = directory
+        self.block_rows = block_rows
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        config_path = os.path.join(directory, "config.json")
+        if os.path.exists(config_path):
+            # An existing gallery keeps the descriptor it was built with
+            with open(config_path) as f:
+                config = json.load(f)
+            self.scales = [tuple(scale) for scale in config["scales"]]
+            self.method = config["method"]
+        else:
+            self.scales = [tuple(scale) for scale in scales]
+            self.method = method
+            with open(config_path, "w") as f:
+                json.dump({"scales": self.scales, "method": self.method, "dim": self._dim()}, f)
+        self.dim = self._dim()
+
+        self._matrix_path = os.path.join(directory, "histograms.f32")
+        self._entries_path = os.path.join(directory, "entries.jsonl")
+        self._entries = []
+        self._deleted = np.zeros(0, dtype=bool)
+        self._load_entries()
+
+        row_bytes = self.dim * 4
+        existing_rows = os.path.getsize(self._matrix_path) // row_bytes if os.path.exists(self._matrix_path) else 0
+        self._capacity = 0
+        self._matrix = None
+        self._grow(max(existing_rows, len(self._entries), INITIAL_CAPACITY))
+
+    def _dim(self):
+        return sum(n_labels(n_points, self.method) for _, n_points in self.scales)
+
+    def _load_entries(self):
+        if not os.path.exists(self._entries_path):
+            return
+        deleted = set()
+        with open(self._entries_path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.get("deleted"):
+                    deleted.add(record["id"])
+                else:
+                    self._entries.append(record)
+        self._deleted = np.zeros(len(self._entries), dtype=bool)
+        self._deleted[[entry_id for entry_id in deleted if entry_id < len(self._entries)]] = True
+
+    def _grow(self, rows):
+        """Extend the backing file to hold at least `rows` rows and remap it"""
+        if rows <= self._capacity:
+            return
+        capacity = max(rows, 2 * self._capacity)
+        with open(self._matrix_path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        # Readers holding the previous map keep a valid view of the rows they saw
+        self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._capacity = capacity
+        if len(self._deleted) < capacity:
+            self._deleted = np.concatenate([self._deleted, np.zeros(capacity - len(self._deleted), dtype=bool)])
+
+    def __len__(self):
+        return len(self._entries) - int(self._deleted[:len(self._entries)].sum())
+
+    def describe(self, image_array):
+        """The descriptor this gallery stores for an image"""
+        return describe_image(image_array, self.scales, self.method)
+
+    def add(self, descriptor, name, metadata=None):
+        """Append a descriptor; returns the new entry"""
+        descriptor = np.asarray(descriptor, dtype=np.float32)
+        if descriptor.shape != (self.dim,):
+            raise ValueError(f"Descriptor must have {self.dim} values, got {descriptor.shape}")
+
+        with self._lock:
+            entry_id = len(self._entries)
+            self._grow(entry_id + 1)
+            self._matrix[entry_id] = descriptor
+            self._matrix.flush()
+
+            entry = {"id": entry_id, "name": name, "added_at": time.time(), **(metadata or {})}
+            # The entry line is written last, so a crash never exposes an unwritten row
+            with open(self._entries_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+            self._entries.append(entry)
+            return entry
+
+    def remove(self, entry_id):
+        """Exclude an entry from future searches; returns False if it does not exist"""
+        with self._lock:
+            if not 0 <= entry_id < len(self._entries) or self._deleted[entry_id]:
+                return False
+            with open(self._entries_path, "a") as f:
+                f.write(json.dumps({"id": entry_id, "deleted": True}) + "\n")
+            self._deleted[entry_id] = True
+            return True
+
+    def search(self, descriptor, k=5, metric='chi_square'):
+        """
+        Top-k most similar stored textures.
+
+        Args:
+            descriptor: Query descriptor (see describe)
+            k: Number of results
+            metric: 'chi_square', 'intersection' or 'bhattacharyya'
+
+        Returns:
+            List of entries with 'score' and 'rank', best match first
+            (lowest distance, or highest intersection)
+        """
+        if metric not in HISTOGRAM_METRICS:
+            raise ValueError(f"metric must be one of {list(HISTOGRAM_METRICS)}")
+        query = np.asarray(descriptor, dtype=np.float32)
+        if query.shape != (self.dim,):
+            raise ValueError(f"Descriptor must have {self.dim} values, got {query.shape}")
+
+        with self._lock:
+            matrix, count, deleted = self._matrix, len(self._entries), self._deleted[:len(self._entries)].copy()
+
+        candidates, candidate_keys = [], []
+        for start in range(0, count, self.block_rows):
+            stop = min(start + self.block_rows, count)
+            scores = histogram_distances(matrix[start:stop], query, metric)
+            # Rank on a "lower is better" key
+            keys = -scores if metric == 'intersection' else scores
+            keys[deleted[start:stop]] = np.inf
+
+            if len(keys) > k:
+                top = np.argpartition(keys, k - 1)[:k]
+            else:
+                top = np.arange(len(keys))
+            candidates.append(top + start)
+            candidate_keys.append(keys[top])
+
+        if not candidates:
+            return []
+        candidates = np.concatenate(candidates)
+        candidate_keys = np.concatenate(candidate_keys)
+        order = np.argsort(candidate_keys, kind="stable")[:k]
+
+        results = []
+        for rank, idx in enumerate(order, start=1):
+            if not np.isfinite(candidate_keys[idx]):
+                break
+            score = -candidate_keys[idx] if metric == 'intersection' else candidate_keys[idx]
+            results.append({**self._entries[candidates[idx]], "score": float(score), "rank": rank})
+        return results
+
+    def entries(self, offset=0, limit=100):
+        """Stored (not removed) entries, oldest first"""
+        live = [entry for entry in self._entries if not self._deleted[entry["id"]]]
+        return live[offset:offset + limit]
+
+    def stats(self):
+        """Size and configuration of the gallery"""
+        return {
+            "entries": len(self),
+            "rows": len(self._entries),
+            "capacity": self._capacity,
+            "dim": self.dim,
+            "scales": self.scales,
+            "method": self.method,
+            "matrix_bytes": self._capacity * self.dim * 4,
+            "directory": self.directory
+        }
+
+
+def get_gallery() -> TextureGallery:
+    """Return the shared gallery stored in TEXTURE_GALLERY_DIR, opening it on first use"""
+    global _gallery
+    with _gallery_lock:
+        if _gallery is None:
+            _gallery = TextureGallery(GALLERY_DIR)
+        return _gallery
@@ -0,0 +1,248 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+
+class Dataset:
+    """An encoded tabular dataset stored column by column, plus its label encoders"""
+
+    def __init__(self, dataset_id, columns, arrays, encoders, metadata, features=None, target=None):
+        self.dataset_id = dataset_id
+        self.columns = columns
+        self.arrays = arrays  # column name -> 1-D array (memory-mapped when loaded from disk)
+        self.encoders = encoders  # column name -> fitted LabelEncoder
+        self.metadata = metadata
+        # Matrix-layout datasets: (rows, features) float32 and (rows,) int32 target codes, memory-mapped
+        self.features = features
+        self.target = target
+
+    @property
+    def n_rows(self):
+        return self.metadata["rows"]
+
+    def frame(self, columns=None):
+        """The dataset (or a subset of its columns) as a DataFrame"""
+        return pd.DataFrame({col: self.arrays[col] for col in (columns or self.columns)}, copy=False)
+
+    def nbytes(self):
+        """Bytes held by the column arrays"""
+        if self.features is not None:
+            return self.features.nbytes + self.target.nbytes
+        return sum(array.nbytes for array in self.arrays.values())
+
+
+class DatasetRegistry:
+    """
+    Server-side store of uploaded datasets, referenced by ID.
+
+    Each dataset is written as one .npy file per column plus a meta.json
+    holding column order, dtypes and the label encoder classes, so training
+    reads binary columns (memory-mapped) instead of re-parsing JSON.
+    Out-of-core uploads are staged instead: reserve_matrix hands out an ID
+    and a staging directory, the caller (possibly another process) writes
+    one row-major float32 feature matrix (features.f32) plus int32 target
+    codes (target.i32) into it, and commit_matrix publishes the dataset.
+    Datasets idle for longer than ttl seconds are removed, and the least
+    recently used ones are evicted beyond max_entries.
+    """
+
+    def __init__(self, directory, ttl=3600, max_entries=16):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._loaded = {}  # dataset id -> Dataset
+        self._last_access = {}  # dataset id -> timestamp
+
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            meta_path = os.path.join(directory, name, "meta.json")
+            if os.path.exists(meta_path):
+                self._last_access[name] = os.path.getmtime(meta_path)
+
+    @classmethod
+    def from_env(cls, prefix, default_dir):
+        """Build a registry from <prefix>_DIR, <prefix>_TTL and <prefix>_MAX_ENTRIES"""
+        return cls(
+            directory=os.environ.get(f"{prefix}_DIR") or default_dir,
+            ttl=int(os.environ.get(f"{prefix}_TTL", 3600)),
+            max_entries=int(os.environ.get(f"{prefix}_MAX_ENTRIES", 16))
+        )
+
+    def put(self, df, encoders=None, **metadata):
+        """Store an all-numeric DataFrame and its encoders; returns the dataset ID"""
+        dataset_id = uuid.uuid4().hex
+        path = os.path.join(self.directory, dataset_id)
+        tmp_path = f"{path}.tmp"
+        os.makedirs(tmp_path)
+
+        columns = [str(col) for col in df.columns]
+        files = {}
+        for i, col in enumerate(df.columns):
+            array = df[col].to_numpy()
+            if array.dtype == object:
+                raise ValueError(f"Column '{col}' is not numeric; encode it before storing")
+            files[columns[i]] = f"col_{i}.npy"
+            np.save(os.path.join(tmp_path, files[columns[i]]), array)
+
+        meta = {
+            **metadata,
+            "columns": columns,
+            "files": files,
+            "dtypes": {col: str(df[col].dtype) for col in df.columns},
+            "rows": len(df),
+            "encoders": {col: le.classes_.tolist() for col, le in (encoders or {}).items()},
+            "created_at": time.time()
+        }
+        return self._commit(dataset_id, tmp_path, meta)
+
+    def reserve_matrix(self):
+        """
+        A new dataset ID and the staging directory to write its files into.
+
+        Lets the writing happen elsewhere (e.g. in a worker process) while
+        the registry itself is only touched by its owning process; finish
+        with commit_matrix, or discard on failure.
+        """
+        dataset_id = uuid.uuid4().hex
+        tmp_path = f"{os.path.join(self.directory, dataset_id)}.tmp"
+        os.makedirs(tmp_path)
+        return dataset_id, tmp_path
+
+    def commit_matrix(self, dataset_id, tmp_path, described, **metadata):
+        """
+        Publish a staged matrix dataset; returns the dataset ID.
+
+        described lists columns (features, then the target), feature_columns,
+        target, rows and encoders (column -> class list), as ingest_csv returns.
+        """
+        meta = {**metadata, **described, "layout": "matrix", "created_at": time.time()}
+        return self._commit(dataset_id, tmp_path, meta)
+
+    def discard(self, tmp_path):
+        """Remove a staging directory that will not be committed"""
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def _commit(self, dataset_id, tmp_path, meta):
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.directory, dataset_id))
+
+        with self._lock:
+            self._last_access[dataset_id] = time.time()
+        self.evict()
+        return dataset_id
+
+    def get(self, dataset_id):
+        """Return the Dataset for an ID, or None if it is unknown or expired"""
+        self.evict()
+        with self._lock:
+            if dataset_id not in self._last_access and not self._adopt(dataset_id):
+                return None
+            self._last_access[dataset_id] = time.time()
+            dataset = self._loaded.get(dataset_id)
+        try:
+            # The file mtime carries the last access across restarts
+            os.utime(os.path.join(self.directory, dataset_id, "meta.json"))
+        except OSError:
+            return None
+        if dataset is None:
+            dataset = self._load(dataset_id)
+            with self._lock:
+                self._loaded[dataset_id] = dataset
+        return dataset
+
+    def _adopt(self, dataset_id):
+        """
+        Track a dataset stored by another process sharing the directory
+        (caller holds the lock); False if there is none or it has expired.
+        """
+        if not re.fullmatch(r"[0-9a-f]{32}", dataset_id):
+            return False
+        try:
+            last = os.path.getmtime(os.path.join(self.directory, dataset_id, "meta.json"))
+        except OSError:
+            return False
+        if time.time() - last > self.ttl:
+            return False
+        self._last_access[dataset_id] = last
+        return True
+
+    def delete(self, dataset_id):
+        """Remove a dataset; returns False if it did not exist"""
+        with self._lock:
+            if dataset_id not in self._last_access and not self._adopt(dataset_id):
+                return False
+            self._last_access.pop(dataset_id)
+            self._loaded.pop(dataset_id, None)
+        shutil.rmtree(os.path.join(self.directory, dataset_id), ignore_errors=True)
+        return True
+
+    def evict(self):
+        """Drop expired datasets, then the least recently used beyond max_entries"""
+        now = time.time()
+        with self._lock:
+            by_age = sorted(self._last_access.items(), key=lambda item: item[1])
+            expired = [dataset_id for dataset_id, last in by_age if now - last > self.ttl]
+            alive = [dataset_id for dataset_id, _ in by_age if dataset_id not in expired]
+            expired += alive[:max(0, len(alive) - self.max_entries)]
+            for dataset_id in expired:
+                self._last_access.pop(dataset_id, None)
+                self._loaded.pop(dataset_id, None)
+        for dataset_id in expired:
+            shutil.rmtree(os.path.join(self.directory, dataset_id), ignore_errors=True)
+
+    def stats(self):
+        """Registry size and eviction settings"""
+        with self._lock:
+            return {
+                "datasets": len(self._last_access),
+                "loaded": len(self._loaded),
+                "ttl": self.ttl,
+                "max_entries": self.max_entries,
+                "directory": self.directory
+            }
+
+    def _load(self, dataset_id):
+        return load_dataset(self.directory, dataset_id)
+
+
+def load_dataset(directory, dataset_id):
+    """
+    Open a stored dataset without a registry (memory-mapped), e.g. in a
+    worker process given only the directory and ID instead of the arrays
+    """
+    path = os.path.join(directory, dataset_id)
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+
+    encoders = {}
+    for col, classes in meta["encoders"].items():
+        le = LabelEncoder()
+        le.classes_ = np.array(classes)
+        encoders[col] = le
+
+    if meta.get("layout") == "matrix":
+        rows, feature_columns = meta["rows"], meta["feature_columns"]
+        features = np.memmap(os.path.join(path, "features.f32"), dtype=np.float32, mode="r",
+                             shape=(rows, len(feature_columns)))
+        target = np.memmap(os.path.join(path, "target.i32"), dtype=np.int32, mode="r", shape=(rows,))
+        # Column views of the matrix keep frame() working for datasets that fit in memory
+        arrays = {col: features[:, j] for j, col in enumerate(feature_columns)}
+        arrays[meta["target"]] = target
+        return Dataset(dataset_id, meta["columns"], arrays, encoders, meta, features, target)
+
+    arrays = {
+        col: np.load(os.path.join(path, meta["files"][col]), mmap_mode="r")
+        for col in meta["columns"]
+    }
+    return Dataset(dataset_id, meta["columns"], arrays, encoders, meta)
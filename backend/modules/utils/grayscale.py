@@ -0,0 +1,138 @@
+import numpy as np
+
+
+# ITU-R BT.709 luma weights (same as skimage.color.rgb2gray) in 16-bit fixed point, summing to 2**16
+LUMA_WEIGHTS = (13926, 46885, 4725)
+LUMA_SHIFT = 16
+
+# Rows converted per chunk; bounds the temporary integer buffers
+CHUNK_ROWS = 512
+
+
+def _bit_depth(array):
+    """
+    8 or 16 for integer image data, None for floating point. Decided by the
+    dtype alone, never the pixel values: uint16 is 16-bit, other integer
+    types are taken as 8-bit (callers that know better pass bits)
+    """
+    if array.dtype == np.uint16:
+        return 16
+    if np.issubdtype(array.dtype, np.integer):
+        return 8
+    return None
+
+
+def mode_bit_depth(mode):
+    """Bits per channel of a PIL image mode's integer data, or None to go by the dtype"""
+    # PIL exposes 16-bit images as 'I;16*' or, once widened, as int32 'I'
+    if mode == "I" or mode.startswith("I;16"):
+        return 16
+    return None
+
+
+def _luma_block(block, bits):
+    """Fixed-point luma of an (rows, cols, 3 or 4) integer block, returned as uint8"""
+    max_val = (1 << bits) - 1
+    acc = np.uint32 if bits == 8 else np.uint64
+    rgb = block[..., :3].astype(acc)
+
+    if block.shape[-1] == 4:
+        # Composite over white, like skimage.color.rgba2rgb
+        alpha = np.clip(block[..., 3:4], 0, max_val).astype(acc)
+        rgb = (rgb * alpha + max_val * (max_val - alpha)) // max_val
+
+    y = rgb[..., 0] * LUMA_WEIGHTS[0]
+    y += rgb[..., 1] * LUMA_WEIGHTS[1]
+    y += rgb[..., 2] * LUMA_WEIGHTS[2]
+    return (y >> (LUMA_SHIFT + bits - 8)).astype(np.uint8)
+
+
+def _gray_block(block, bits):
+    """Single-channel (optionally with alpha) integer block scaled to uint8"""
+    max_val = (1 << bits) - 1
+    if block.ndim == 3:
+        acc = np.uint32 if bits == 8 else np.uint64
+        gray = np.clip(block[..., 0], 0, max_val).astype(acc)
+        alpha = np.clip(block[..., 1], 0, max_val).astype(acc)
+        block = (gray * alpha + max_val * (max_val - alpha)) // max_val
+    if bits == 8:
+        return np.clip(block, 0, 255).astype(np.uint8)
+    return (np.clip(block, 0, max_val) >> (bits - 8)).astype(np.uint8)
+
+
+def _float_block(block):
+    """Floating point block in [0, 1] (or [0, 255]) to uint8 luma"""
+    if block.ndim == 3 and block.shape[-1] >= 3:
+        rgb = block[..., :3].astype(np.float32)
+        if block.shape[-1] == 4:
+            alpha = block[..., 3:4].astype(np.float32)
+            rgb = rgb * alpha + (1 - alpha)
+        block = rgb @ (np.array(LUMA_WEIGHTS, dtype=np.float32) / (1 << LUMA_SHIFT))
+    elif block.ndim == 3:
+        block = block[..., 0]
+    return np.clip(block * 255, 0, 255).astype(np.uint8)
+
+
+def to_gray_uint8(img_array, chunk_rows=CHUNK_ROWS, bits=None):
+    """
+    Convert an image array to 8-bit grayscale using integer luma weights.
+
+    Handles grayscale, gray+alpha, RGB and RGBA data in 8 or 16 bits per
+    channel (and floating point in [0, 1]). Work is done in row chunks so
+    temporaries stay small; 8-bit grayscale input is returned unchanged.
+
+    Args:
+        img_array: (H, W) or (H, W, C) image array
+        chunk_rows: Rows converted per chunk
+        bits: Bits per channel of integer data (8 or 16); taken from the dtype if None
+
+    Returns:
+        uint8 array of shape (H, W)
+    """
+    array = np.asarray(img_array)
+    if array.ndim == 3 and array.shape[2] == 1:
+        array = array[:, :, 0]
+    if array.ndim not in (2, 3) or (array.ndim == 3 and array.shape[2] not in (2, 3, 4)):
+        raise ValueError(f"Unsupported image shape {array.shape}")
+
+    if array.dtype == np.bool_:
+        array = array.astype(np.uint8) * 255
+    if array.ndim == 2 and array.dtype == np.uint8:
+        return array
+
+    if bits is None or not np.issubdtype(array.dtype, np.integer):
+        bits = _bit_depth(array)
+    if bits is None and array.max(initial=0) > 1:
+        array = array / 255.0
+
+    out = np.empty(array.shape[:2], dtype=np.uint8)
+    for start in range(0, array.shape[0], chunk_rows):
+        block = array[start:start + chunk_rows]
+        if bits is None:
+            out[start:start + chunk_rows] = _float_block(block)
+        elif block.ndim == 3 and block.shape[-1] >= 3:
+            out[start:start + chunk_rows] = _luma_block(block, bits)
+        else:
+            out[start:start + chunk_rows] = _gray_block(block, bits)
+    return out
+
+
+def image_to_gray(image):
+    """
+    Convert a PIL image of any mode to an 8-bit grayscale array.
+
+    Palette images are expanded through their palette (keeping transparency),
+    other colour spaces go through RGB, and 16-bit modes keep their precision
+    until the final scaling, which follows the mode's bit depth whatever the
+    pixel values are.
+    """
+    if image.mode == "P":
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    elif image.mode == "PA":
+        image = image.convert("RGBA")
+    elif image.mode in ("CMYK", "YCbCr", "LAB", "HSV"):
+        image = image.convert("RGB")
+    elif image.mode == "1":
+        image = image.convert("L")
+    # np.array (not asarray) so the result is writable; downstream Cython code needs that
+    return to_gray_uint8(np.array(image), bits=mode_bit_depth(image.mode))
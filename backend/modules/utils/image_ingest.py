@@ -0,0 +1,137 @@
+import hashlib
+import io
+import math
+import os
+import tempfile
+
+from PIL import Image
+
+
+# Images above this many pixels are rejected outright (checked from the header, before decoding)
+MAX_INPUT_PIXELS = int(os.environ.get("IMAGE_MAX_INPUT_PIXELS", 100_000_000))
+
+# Images above this many pixels are downscaled on load before analysis
+MAX_ANALYSIS_PIXELS = int(os.environ.get("IMAGE_MAX_ANALYSIS_PIXELS", 2048 * 2048))
+
+# Directory for spooled uploads (system temp dir if unset)
+SPOOL_DIR = os.environ.get("IMAGE_SPOOL_DIR") or None
+
+CHUNK_SIZE = 1024 * 1024
+
+# Let our own limit decide; Pillow's bomb check would fire first for large but legitimate photos
+Image.MAX_IMAGE_PIXELS = max(Image.MAX_IMAGE_PIXELS or 0, MAX_INPUT_PIXELS)
+
+
+class ImageTooLargeError(ValueError):
+    """Raised when an image exceeds MAX_INPUT_PIXELS"""
+
+
+async def spool_upload(upload, chunk_size=CHUNK_SIZE):
+    """
+    Copy an uploaded file to a temporary file on disk in chunks.
+
+    Args:
+        upload: Object with an async read(size) method (e.g. fastapi.UploadFile)
+        chunk_size: Bytes per read
+
+    Returns:
+        tuple: (path, sha256 hex digest); the caller removes the file
+    """
+    digest = hashlib.sha256()
+    fd, path = tempfile.mkstemp(prefix="upload_", dir=SPOOL_DIR)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                f.write(chunk)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest()
+
+
+def remove_spooled(path):
+    """Delete a spooled upload, ignoring files that are already gone"""
+    try:
+        os.remove(path)
+    except (OSError, TypeError):
+        pass
+
+
+def analysis_budget(max_pixels=None):
+    """
+    The pixel budget load_image actually applies for a max_pixels request.
+
+    Results that depend on the analysis resolution should be keyed by this,
+    not by the raw request value (None means MAX_ANALYSIS_PIXELS, which is
+    configurable).
+    """
+    if max_pixels is not None and max_pixels < 1:
+        raise ValueError(f"max_pixels must be >= 1, got {max_pixels}")
+    return min(max_pixels or MAX_ANALYSIS_PIXELS, MAX_ANALYSIS_PIXELS)
+
+
+def load_image(source, max_pixels=None, mode=None):
+    """
+    Open an image, decoding it directly at (or near) the analysis resolution.
+
+    JPEGs use draft mode so the decoder itself scales by 1/2, 1/4 or 1/8;
+    other formats are reduced by an integer factor, and a final resize
+    brings the image within max_pixels.
+
+    Args:
+        source: Path, file-like object or raw bytes
+        max_pixels: Pixel budget for analysis (capped at MAX_ANALYSIS_PIXELS)
+        mode: Optional PIL mode to convert to (JPEG draft decodes straight into it)
+
+    Returns:
+        tuple: (PIL.Image, resolution info dict)
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    budget = analysis_budget(max_pixels)
+
+    image = Image.open(source)
+    width, height = image.size
+    if width * height > MAX_INPUT_PIXELS:
+        raise ImageTooLargeError(
+            f"Image is {width}x{height} ({width * height} pixels); the limit is {MAX_INPUT_PIXELS} pixels"
+        )
+
+    scale = min(1.0, math.sqrt(budget / float(width * height)))
+    target = (max(1, int(width * scale)), max(1, int(height * scale)))
+
+    if scale < 1.0:
+        if image.mode in ("P", "1"):
+            # Palette/bilevel images cannot be filtered; expand them first
+            image = image.convert("RGB" if image.mode == "P" else "L")
+        elif image.mode.startswith("I;16"):
+            # reduce() has no 16-bit packed mode support; widen to 32-bit integers
+            image = image.convert("I")
+        elif image.format == "JPEG":
+            draft_mode = mode if mode in ("L", "RGB") else image.mode
+            image.draft(draft_mode, target)
+
+        factor = min(image.size[0] // target[0], image.size[1] // target[1])
+        if factor >= 2:
+            image = image.reduce(factor)
+
+        if image.size != target:
+            image = image.resize(target, Image.BILINEAR)
+
+    if mode is not None and image.mode != mode:
+        image = image.convert(mode)
+
+    info = {
+        "original_width": width,
+        "original_height": height,
+        "width": image.size[0],
+        "height": image.size[1],
+        "scale": image.size[0] / float(width),
+        "downscaled": image.size != (width, height)
+    }
+    return image, info
@@ -0,0 +1,171 @@
+"""
+Metrics Module
+
+Classification metrics built from confusion matrices counted with a single
+bincount, shared by the KNN and decision tree routers and the Streamlit tabs.
+Bootstrap confidence intervals resample the confusion-matrix cells
+directly, so their cost does not grow with the number of predictions.
+"""
+
+import numpy as np
+
+
+# Bootstrap resamples drawn per batch (each is one C x C confusion matrix)
+BOOTSTRAP_BATCH = 65536
+
+
+def encode_labels(y_true, y_pred):
+    """Sorted union of the labels (as sklearn orders them) and both label arrays as codes into it"""
+    y_true, y_pred = np.asarray(y_true), np.asarray(y_pred)
+    classes, codes = np.unique(np.concatenate([y_true, y_pred]), return_inverse=True)
+    return classes, codes[:len(y_true)], codes[len(y_true):]
+
+
+def confusion_matrix(true_codes, pred_codes, n_classes):
+    """(n_classes, n_classes) counts, rows = actual, columns = predicted, in one bincount"""
+    true_codes = np.asarray(true_codes, dtype=np.int64)
+    pred_codes = np.asarray(pred_codes, dtype=np.int64)
+    return np.bincount(true_codes * n_classes + pred_codes, minlength=n_classes * n_classes).reshape(n_classes, n_classes)
+
+
+def _safe_divide(num, den):
+    return np.divide(num, den, out=np.zeros(np.broadcast(num, den).shape), where=den > 0)
+
+
+def scores(cm):
+    """
+    Every metric derived from one or a stack of confusion matrices.
+
+    Works on (..., C, C) arrays, so a batch of bootstrap matrices is scored
+    in the same operations as a single one. Undefined ratios count as 0
+    (sklearn's zero_division=0).
+
+    Returns:
+        dict of arrays: per-class precision/recall/f1/support (..., C) and
+        accuracy plus macro/weighted averages (...)
+    """
+    cm = np.asarray(cm, dtype=np.float64)
+    tp = np.diagonal(cm, axis1=-2, axis2=-1)
+    support = cm.sum(axis=-1)
+    predicted = cm.sum(axis=-2)
+    total = support.sum(axis=-1)
+
+    precision = _safe_divide(tp, predicted)
+    recall = _safe_divide(tp, support)
+    f1 = _safe_divide(2 * precision * recall, precision + recall)
+
+    def weighted(values):
+        return _safe_divide((values * support).sum(axis=-1), total)
+
+    return {
+        "accuracy": _safe_divide(tp.sum(axis=-1), total),
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "support": support,
+        "macro_precision": precision.mean(axis=-1),
+        "macro_recall": recall.mean(axis=-1),
+        "macro_f1": f1.mean(axis=-1),
+        "weighted_precision": weighted(precision),
+        "weighted_recall": weighted(recall),
+        "weighted_f1": weighted(f1)
+    }
+
+
+def classification_report(cm, labels):
+    """sklearn's classification_report(output_dict=True) layout, built from a confusion matrix"""
+    s = scores(cm)
+    report = {
+        str(label): {
+            "precision": float(s["precision"][i]),
+            "recall": float(s["recall"][i]),
+            "f1-score": float(s["f1"][i]),
+            "support": float(s["support"][i])
+        }
+        for i, label in enumerate(labels)
+    }
+    total = float(s["support"].sum())
+    report["accuracy"] = float(s["accuracy"])
+    report["macro avg"] = {
+        "precision": float(s["macro_precision"]),
+        "recall": float(s["macro_recall"]),
+        "f1-score": float(s["macro_f1"]),
+        "support": total
+    }
+    report["weighted avg"] = {
+        "precision": float(s["weighted_precision"]),
+        "recall": float(s["weighted_recall"]),
+        "f1-score": float(s["weighted_f1"]),
+        "support": total
+    }
+    return report
+
+
+def summary(cm):
+    """Accuracy and support-weighted precision/recall/F1 as floats (the app's headline metrics)"""
+    s = scores(cm)
+    return {
+        "accuracy": float(s["accuracy"]),
+        "precision": float(s["weighted_precision"]),
+        "recall": float(s["weighted_recall"]),
+        "f1_score": float(s["weighted_f1"])
+    }
+
+
+def bootstrap_intervals(cm, n_resamples=2000, confidence=0.95, random_state=42):
+    """
+    Percentile bootstrap confidence intervals for the headline metrics.
+
+    Resampling n predictions with replacement only changes how many fall
+    in each confusion-matrix cell, so each resample is drawn directly as a
+    multinomial over the cells: all resamples come from one rng call and
+    are scored together, at a cost independent of the number of rows.
+
+    Returns:
+        dict metric -> {"low", "high"}, plus the settings used
+    """
+    cm = np.asarray(cm, dtype=np.int64)
+    n = int(cm.sum())
+    n_classes = cm.shape[0]
+    if n == 0 or n_resamples <= 0:
+        return {}
+    rng = np.random.default_rng(random_state)
+
+    samples = {name: [] for name in ("accuracy", "precision", "recall", "f1_score")}
+    for start in range(0, n_resamples, BOOTSTRAP_BATCH):
+        size = min(BOOTSTRAP_BATCH, n_resamples - start)
+        cells = rng.multinomial(n, cm.ravel() / n, size=size).reshape(size, n_classes, n_classes)
+        s = scores(cells)
+        samples["accuracy"].append(s["accuracy"])
+        samples["precision"].append(s["weighted_precision"])
+        samples["recall"].append(s["weighted_recall"])
+        samples["f1_score"].append(s["weighted_f1"])
+
+    tail = (1 - confidence) / 2 * 100
+    intervals = {}
+    for name, parts in samples.items():
+        low, high = np.percentile(np.concatenate(parts), [tail, 100 - tail])
+        intervals[name] = {"low": float(low), "high": float(high)}
+    return {**intervals, "confidence": confidence, "n_resamples": int(n_resamples)}
+
+
+def evaluate(y_true, y_pred, n_resamples=0, confidence=0.95):
+    """
+    One-pass evaluation of predicted labels.
+
+    Returns:
+        dict with classes, confusion_matrix (ndarray), the headline metrics,
+        classification_report and, when n_resamples > 0, bootstrap
+        confidence_intervals
+    """
+    classes, true_codes, pred_codes = encode_labels(y_true, y_pred)
+    cm = confusion_matrix(true_codes, pred_codes, len(classes))
+    result = {
+        "classes": classes.tolist(),
+        "confusion_matrix": cm,
+        **summary(cm),
+        "classification_report": classification_report(cm, classes)
+    }
+    if n_resamples:
+        result["confidence_intervals"] = bootstrap_intervals(cm, n_resamples, confidence)
+    return result
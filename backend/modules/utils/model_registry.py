@@ -0,0 +1,305 @@
+import errno
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+from sklearn.preprocessing import LabelEncoder
+
+from ..knn_index import KNNIndexClassifier
+
+
+class RegisteredModel:
+    """A trained KNN model version: training arrays, encoders and the fitted estimator"""
+
+    def __init__(self, version, X_train, y_train, encoders, metadata, path=None, rebuild_threshold=1000):
+        self.version = version
+        self.X_train = X_train  # (n, d) float64, memory-mapped when loaded from disk
+        self.y_train = y_train
+        self.encoders = encoders  # column name -> LabelEncoder (features and target)
+        self.metadata = metadata
+        self.path = path
+        self.feature_columns = metadata["feature_columns"]
+        self.target = metadata["target"]
+        self._append_lock = threading.Lock()
+
+        # Rows appended after training are kept next to the saved arrays
+        appended_X, appended_y = self._read_appended()
+        self.appended_rows = len(appended_y)
+        if self.appended_rows:
+            X_train = np.concatenate([X_train, appended_X])
+            y_train = np.concatenate([y_train, appended_y])
+        # params: n_neighbors plus the scaling/index settings (older versions only stored n_neighbors)
+        self.estimator = KNNIndexClassifier(**metadata["params"], rebuild_threshold=rebuild_threshold).fit(X_train, y_train)
+
+    def _appended_paths(self):
+        return os.path.join(self.path, "appended_X.f64"), os.path.join(self.path, "appended_y.bin")
+
+    def _read_appended(self):
+        if self.path is None or not os.path.exists(self._appended_paths()[1]):
+            return None, np.zeros(0, dtype=self.y_train.dtype)
+        x_path, y_path = self._appended_paths()
+        y = np.fromfile(y_path, dtype=self.y_train.dtype)
+        X = np.fromfile(x_path, dtype=np.float64).reshape(-1, len(self.feature_columns))
+        # A crash between the two writes leaves extra feature rows; the label file is authoritative
+        return X[:len(y)], y
+
+    def is_stale(self):
+        """True if rows were appended to the version's files by another process since loading"""
+        if self.path is None:
+            return False
+        try:
+            stored = os.path.getsize(self._appended_paths()[1]) // self.y_train.dtype.itemsize
+        except OSError:
+            return False
+        return stored != self.appended_rows
+
+    def encode_labels(self, labels):
+        """Encode raw target values with the stored target encoder; unseen labels are an error"""
+        encoder = self.encoders.get(self.target)
+        if encoder is None:
+            return np.asarray(labels, dtype=self.y_train.dtype)
+        lookup = {label: code for code, label in enumerate(encoder.classes_)}
+        unknown = sorted({str(label) for label in labels if str(label) not in lookup})
+        if unknown:
+            raise ValueError(f"Unknown {self.target} labels: {unknown}")
+        return np.array([lookup[str(label)] for label in labels], dtype=self.y_train.dtype)
+
+    def append(self, rows):
+        """
+        Add labelled rows (feature columns plus the target) to this version.
+
+        Rows are encoded like /predict input, written to the version's
+        append files and searched immediately. Returns the estimator stats
+        and whether an index rebuild was started.
+        """
+        missing_target = [i for i, row in enumerate(rows) if row.get(self.target) is None]
+        if missing_target:
+            raise ValueError(f"Rows {missing_target[:10]} have no '{self.target}' value")
+        # Appended rows are stored for good, so unseen categories are rejected rather than guessed
+        X = self.encode_rows(rows, strict=True)
+        y = self.encode_labels([row[self.target] for row in rows])
+
+        with self._append_lock:
+            if self.path is not None:
+                x_path, y_path = self._appended_paths()
+                with open(x_path, "ab") as f:
+                    f.write(np.ascontiguousarray(X).tobytes())
+                with open(y_path, "ab") as f:
+                    f.write(np.ascontiguousarray(y).tobytes())
+            rebuild_started = self.estimator.partial_fit(X, y)
+            self.appended_rows += len(rows)
+        return {**self.estimator.stats(), "appended_rows": self.appended_rows, "rebuild_started": rebuild_started}
+
+    def encode_rows(self, rows, strict=False):
+        """
+        Turn raw feature rows (dicts of column -> value) into a float64 matrix.
+
+        Categorical values go through the stored LabelEncoders (unseen
+        labels map to the first class, as in utils.encoder, or are a
+        ValueError when strict); missing values use the per-column fill
+        values recorded at training time.
+        """
+        fill_values = self.metadata["fill_values"]
+        X = np.empty((len(rows), len(self.feature_columns)), dtype=np.float64)
+        for j, col in enumerate(self.feature_columns):
+            values = [row.get(col) for row in rows]
+            encoder = self.encoders.get(col)
+            if encoder is not None:
+                lookup = {label: code for code, label in enumerate(encoder.classes_)}
+                if strict:
+                    unknown = sorted({str(value) for value in values if value is not None and str(value) not in lookup})
+                    if unknown:
+                        raise ValueError(f"Unknown {col} values: {unknown}")
+                X[:, j] = [
+                    fill_values[col] if value is None else lookup.get(str(value), 0)
+                    for value in values
+                ]
+            else:
+                X[:, j] = [fill_values[col] if value is None else float(value) for value in values]
+        return X
+
+    def decode_labels(self, y):
+        """Map encoded target values back to the original labels"""
+        encoder = self.encoders.get(self.target)
+        if encoder is None:
+            return np.asarray(y).tolist()
+        return encoder.inverse_transform(np.asarray(y, dtype=np.intp)).tolist()
+
+    def predict(self, X):
+        """Predicted labels, class probabilities and neighbor-search time for an encoded matrix"""
+        proba = self.estimator.predict_proba(X)
+        predicted = self.estimator.classes_[np.argmax(proba, axis=1)]
+        return {
+            "predictions": self.decode_labels(predicted),
+            "classes": self.decode_labels(self.estimator.classes_),
+            "probabilities": proba.tolist(),
+            "query_ms": self.estimator.stats().get("query_ms")
+        }
+
+
+class ModelRegistry:
+    """
+    Versioned on-disk store of trained KNN models.
+
+    Each version is a directory holding X_train.npy / y_train.npy (loaded
+    memory-mapped, so opening a version costs little more than fitting the
+    neighbor index) and meta.json with the estimator parameters, feature
+    columns, encoder classes and training metrics. Recently used versions
+    stay loaded in an LRU of max_loaded entries. Rows appended to a version
+    later go to appended_X.f64 / appended_y.bin in its directory; a loaded
+    copy is reloaded once another process has appended to its version.
+    """
+
+    def __init__(self, directory, max_loaded=4, rebuild_threshold=1000):
+        self.directory = directory
+        self.max_loaded = max_loaded
+        self.rebuild_threshold = rebuild_threshold
+        self._lock = threading.Lock()
+        self._loaded = OrderedDict()  # version -> RegisteredModel
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, prefix, default_dir):
+        """Build a registry from <prefix>_DIR, <prefix>_MAX_LOADED and <prefix>_REBUILD_DELTA"""
+        return cls(
+            directory=os.environ.get(f"{prefix}_DIR") or default_dir,
+            max_loaded=int(os.environ.get(f"{prefix}_MAX_LOADED", 4)),
+            rebuild_threshold=int(os.environ.get(f"{prefix}_REBUILD_DELTA", 1000))
+        )
+
+    def versions(self):
+        """Saved versions, oldest first (rescanned so other workers' saves are seen)"""
+        names = [
+            name for name in os.listdir(self.directory)
+            if re.fullmatch(r"v\d+", name) and os.path.exists(os.path.join(self.directory, name, "meta.json"))
+        ]
+        return sorted(names, key=lambda name: int(name[1:]))
+
+    def _next_number(self):
+        """One past the highest version directory on disk"""
+        numbers = [int(name[1:]) for name in os.listdir(self.directory) if re.fullmatch(r"v\d+", name)]
+        return max(numbers, default=0) + 1
+
+    def latest(self):
+        """The newest version, or None if nothing has been saved"""
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def save(self, X_train, y_train, encoders, params, feature_columns, target, **metadata):
+        """Persist a trained model as a new version and keep it loaded; returns the RegisteredModel"""
+        X_train = np.ascontiguousarray(X_train, dtype=np.float64)
+        y_train = np.ascontiguousarray(y_train)
+        fill_values = {}
+        for j, col in enumerate(feature_columns):
+            column = X_train[:, j]
+            if col in encoders:
+                # Most frequent code for categorical columns, median for numeric ones
+                fill_values[col] = float(np.bincount(column.astype(np.intp)).argmax()) if len(column) else 0.0
+            else:
+                fill_values[col] = float(np.median(column)) if len(column) else 0.0
+
+        meta = {
+            **metadata,
+            "params": params,
+            "feature_columns": list(feature_columns),
+            "target": target,
+            "fill_values": fill_values,
+            "encoders": {col: le.classes_.tolist() for col, le in encoders.items()},
+            "n_samples": int(len(X_train)),
+            "created_at": time.time()
+        }
+
+        tmp_path = os.path.join(self.directory, f".save-{uuid.uuid4().hex}.tmp")
+        os.makedirs(tmp_path)
+        try:
+            np.save(os.path.join(tmp_path, "X_train.npy"), X_train)
+            np.save(os.path.join(tmp_path, "y_train.npy"), y_train)
+            # Claim the next free number by renaming the finished directory onto it. rename
+            # fails if another process (or thread) took that number first; then try the next.
+            while True:
+                version = f"v{self._next_number()}"
+                with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+                    json.dump({**meta, "version": version}, f)
+                try:
+                    os.rename(tmp_path, os.path.join(self.directory, version))
+                    break
+                except OSError as e:
+                    if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                        raise
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+        model = self._load(version)
+        self._remember(model)
+        return model
+
+    def get(self, version=None):
+        """A loaded model version (latest when version is None); KeyError if unknown"""
+        version = version or self.latest()
+        if version is None:
+            raise KeyError("No trained model available")
+
+        with self._lock:
+            model = self._loaded.get(version)
+            if model is not None and not model.is_stale():
+                self._loaded.move_to_end(version)
+                return model
+
+        if not re.fullmatch(r"v\d+", version) or not os.path.exists(os.path.join(self.directory, version, "meta.json")):
+            raise KeyError(f"Model version {version} not found")
+        model = self._load(version)
+        self._remember(model)
+        return model
+
+    def warm(self, count=None):
+        """Load the newest versions into memory (called at startup)"""
+        for version in self.versions()[-(count or self.max_loaded):]:
+            self.get(version)
+
+    def delete(self, version):
+        """Remove a version from disk; returns False if it does not exist"""
+        if version not in self.versions():
+            return False
+        with self._lock:
+            self._loaded.pop(version, None)
+        shutil.rmtree(os.path.join(self.directory, version), ignore_errors=True)
+        return True
+
+    def _remember(self, model):
+        with self._lock:
+            self._loaded[model.version] = model
+            self._loaded.move_to_end(model.version)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+
+    def _load(self, version):
+        path = os.path.join(self.directory, version)
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        X_train = np.load(os.path.join(path, "X_train.npy"), mmap_mode="r")
+        y_train = np.load(os.path.join(path, "y_train.npy"), mmap_mode="r")
+        encoders = {}
+        for col, classes in meta["encoders"].items():
+            le = LabelEncoder()
+            le.classes_ = np.array(classes)
+            encoders[col] = le
+        return RegisteredModel(version, X_train, y_train, encoders, meta, path, self.rebuild_threshold)
+
+    def stats(self):
+        """Saved and loaded versions"""
+        with self._lock:
+            loaded = list(self._loaded)
+        return {
+            "versions": self.versions(),
+            "loaded": loaded,
+            "max_loaded": self.max_loaded,
+            "rebuild_threshold": self.rebuild_threshold,
+            "directory": self.directory
+        }
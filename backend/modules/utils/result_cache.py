@@ -0,0 +1,206 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+# Salted into every key. The disk tier outlives deploys, so bump this whenever
+# a change to the analysis code alters results for the same input and params.
+CACHE_VERSION = 1
+
+
+class ResultCache:
+    """
+    Content-addressed LRU cache for JSON analysis results.
+
+    Keys are a hash of the input bytes plus the normalized parameters.
+    Results are stored already JSON-encoded so a hit can be returned as-is
+    without re-serializing. The in-memory tier is bounded by a byte budget;
+    an optional on-disk tier keeps results across restarts and is bounded
+    by its own byte budget.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, disk_dir=None, disk_max_bytes=1024 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> encoded JSON bytes
+        self._bytes = 0
+        self._disk_bytes = 0
+        self._stats = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+
+    @classmethod
+    def from_env(cls, prefix):
+        """Build a cache from <prefix>_MAX_BYTES, <prefix>_DIR and <prefix>_DISK_MAX_BYTES"""
+        return cls(
+            max_bytes=int(os.environ.get(f"{prefix}_MAX_BYTES", 256 * 1024 * 1024)),
+            disk_dir=os.environ.get(f"{prefix}_DIR") or None,
+            disk_max_bytes=int(os.environ.get(f"{prefix}_DISK_MAX_BYTES", 1024 * 1024 * 1024))
+        )
+
+    @staticmethod
+    def make_key(namespace, contents, params):
+        """Hash the raw input bytes together with the normalized parameters and CACHE_VERSION"""
+        digest = hashlib.sha256()
+        digest.update(f"v{CACHE_VERSION}:{namespace}".encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(json.dumps(params, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(contents)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached JSON bytes or None, promoting disk hits into memory"""
+        encoded = self._get_memory(key)
+        if encoded is not None:
+            return encoded
+        return self._get_disk(key)
+
+    async def get_async(self, key):
+        """get for the event loop: memory hits inline, the disk tier on a thread"""
+        encoded = self._get_memory(key)
+        if encoded is not None:
+            return encoded
+        return await asyncio.to_thread(self._get_disk, key)
+
+    def _get_memory(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                self._stats["memory_hits"] += 1
+                return self._entries[key]
+        return None
+
+    def _get_disk(self, key):
+        encoded = self._read_disk(key)
+        with self._lock:
+            if encoded is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            self._stats["disk_hits"] += 1
+
+        self._put_memory(key, encoded)
+        return encoded
+
+    def set(self, key, value):
+        """Encode a result, store it in memory and (if enabled) on disk, and return the bytes"""
+        encoded = json.dumps(value).encode("utf-8")
+        self._put_memory(key, encoded)
+        self._write_disk(key, encoded)
+        return encoded
+
+    async def set_async(self, key, value):
+        """set for the event loop: JSON encoding and the disk write run on a thread"""
+        return await asyncio.to_thread(self.set, key, value)
+
+    def clear(self):
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self.disk_dir:
+                for path, _, _ in self._scan_disk():
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                self._disk_bytes = 0
+
+    def stats(self):
+        """Counters and sizes for operators"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk_enabled": bool(self.disk_dir),
+                "disk_bytes": self._disk_bytes,
+                "disk_max_bytes": self.disk_max_bytes if self.disk_dir else 0,
+                "version": CACHE_VERSION
+            }
+
+    def _put_memory(self, key, encoded):
+        with self._lock:
+            if len(encoded) > self.max_bytes:
+                return
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = encoded
+            self._bytes += len(encoded)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._stats["evictions"] += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _scan_disk(self):
+        """Yield (path, size, mtime) for every stored result file"""
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, st.st_size, st.st_mtime
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                encoded = f.read()
+            os.utime(path)  # mtime doubles as last-access time for eviction
+            return encoded
+        except OSError:
+            return None
+
+    def _write_disk(self, key, encoded):
+        if not self.disk_dir or len(encoded) > self.disk_max_bytes:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(encoded)
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+
+        with self._lock:
+            self._disk_bytes += len(encoded) - replaced
+            if self._disk_bytes > self.disk_max_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        """Remove least recently used files until the disk tier fits its budget"""
+        files = sorted(self._scan_disk(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in files)
+        for path, size, _ in files:
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
@@ -6,10 +6,14 @@ import numpy as np
 from math import log2
 import io
 import base64
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from sklearn import tree
 from sklearn.preprocessing import LabelEncoder
 
+from backend.compute import run_compute
+from backend.modules.utils.metrics import evaluate
+
 router = APIRouter(prefix="/decision-tree", tags=["decision-tree"])
 
 # Golf dataset - hardcoded
@@ -184,70 +188,109 @@ def predict_with_tree(tree_dict, sample):
         # If value not in tree, return the most common value
         return "Unknown"
 
+def _train_golf_sync():
+    """CPU-bound part of /train-golf, run on the compute executor"""
+    df = pd.DataFrame(GOLF_DATA)
+
+    # Build decision tree using ID3
+    features = list(df.columns[:-1])
+    decision_tree = Id3(df, df, features)
+
+    # Calculate information gains
+    feature_importance = {}
+    for feature in features:
+        feature_importance[feature] = info_gain(df, feature)
+
+    # Convert tree to list format for visualization
+    nodes, edges = tree_to_list(decision_tree)
+
+    # Generate sklearn visualization
+    le = LabelEncoder()
+    df_encoded = df.apply(le.fit_transform)
+
+    X = df_encoded.drop(columns=['PlayGolf'])
+    y = df_encoded['PlayGolf']
+
+    clf = tree.DecisionTreeClassifier(criterion='entropy', random_state=42)
+    clf = clf.fit(X, y)
+
+    # Create visualization (object API instead of pyplot, which is not thread-safe)
+    fig = Figure(figsize=(14, 8))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    tree.plot_tree(clf, feature_names=list(X.columns), class_names=['No', 'Yes'], 
+                  filled=True, rounded=True, fontsize=10, ax=ax)
+    fig.tight_layout()
+
+    # Convert to base64
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
+    buffer.seek(0)
+    image_base64 = base64.b64encode(buffer.read()).decode()
+
+    evaluation = evaluate(y.to_numpy(), clf.predict(X))
+
+    return {
+        "tree_structure": decision_tree,
+        "nodes": nodes,
+        "edges": edges,
+        "feature_importance": feature_importance,
+        "accuracy": evaluation["accuracy"],
+        "confusion_matrix": evaluation["confusion_matrix"].tolist(),
+        "visualization": f"data:image/png;base64,{image_base64}",
+        "dataset_size": len(df)
+    }
+
 @router.post("/train-golf")
 async def train_golf():
     """Train Decision Tree on the Play Golf dataset"""
     try:
-        df = pd.DataFrame(GOLF_DATA)
-        
-        # Build decision tree using ID3
-        features = list(df.columns[:-1])
-        decision_tree = Id3(df, df, features)
-        
-        # Calculate information gains
-        feature_importance = {}
-        for feature in features:
-            feature_importance[feature] = info_gain(df, feature)
-        
-        # Convert tree to list format for visualization
-        nodes, edges = tree_to_list(decision_tree)
-        
-        # Generate sklearn visualization
-        le = LabelEncoder()
-        df_encoded = df.apply(le.fit_transform)
-        
-        X = df_encoded.drop(columns=['PlayGolf'])
-        y = df_encoded['PlayGolf']
-        
-        clf = tree.DecisionTreeClassifier(criterion='entropy', random_state=42)
-        clf = clf.fit(X, y)
-        
-        # Create visualization
-        plt.figure(figsize=(14, 8))
-        tree.plot_tree(clf, feature_names=list(X.columns), class_names=['No', 'Yes'], 
-                      filled=True, rounded=True, fontsize=10)
-        plt.tight_layout()
-        
-        # Convert to base64
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.read()).decode()
-        plt.close()
-        
-        accuracy = clf.score(X, y)
-        
-        return {
-            "tree_structure": decision_tree,
-            "nodes": nodes,
-            "edges": edges,
-            "feature_importance": feature_importance,
-            "accuracy": float(accuracy),
-            "visualization": f"data:image/png;base64,{image_base64}",
-            "dataset_size": len(df)
-        }
+        return await run_compute("decision_tree.train", _train_golf_sync)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _predict_sync(sample: dict):
+    """CPU-bound part of /predict, run on the compute executor"""
+    df = pd.DataFrame(GOLF_DATA)
+    features = list(df.columns[:-1])
+    decision_tree = Id3(df, df, features)
+
+    prediction = predict_with_tree(decision_tree, sample)
+
+    # Calculate confidence based on training data
+    matching_samples = df[
+        (df['Outlook'] == sample["Outlook"]) &
+        (df['Temperature'] == sample["Temperature"]) &
+        (df['Humidity'] == sample["Humidity"]) &
+        (df['Windy'] == sample["Windy"])
+    ]
+
+    if len(matching_samples) > 0:
+        confidence = len(matching_samples[matching_samples['PlayGolf'] == prediction]) / len(matching_samples)
+    else:
+        # Calculate partial matching confidence
+        partial_matches = df[
+            (df['Outlook'] == sample["Outlook"]) |
+            (df['Temperature'] == sample["Temperature"])
+        ]
+        if len(partial_matches) > 0:
+            confidence = len(partial_matches[partial_matches['PlayGolf'] == prediction]) / len(partial_matches)
+        else:
+            confidence = 0.5
+
+    return {
+        "prediction": prediction,
+        "confidence": round(float(confidence), 2),
+        "input_features": sample
+    }
+
 @router.post("/predict")
 async def predict(request: PredictRequest):
     """Predict PlayGolf outcome for given features"""
     try:
-        df = pd.DataFrame(GOLF_DATA)
-        features = list(df.columns[:-1])
-        decision_tree = Id3(df, df, features)
-        
         # Prepare sample
         sample = {
             "Outlook": request.Outlook,
@@ -256,34 +299,9 @@ async def predict(request: PredictRequest):
             "Windy": request.Windy
         }
         
-        prediction = predict_with_tree(decision_tree, sample)
-        
-        # Calculate confidence based on training data
-        matching_samples = df[
-            (df['Outlook'] == request.Outlook) &
-            (df['Temperature'] == request.Temperature) &
-            (df['Humidity'] == request.Humidity) &
-            (df['Windy'] == request.Windy)
-        ]
-        
-        if len(matching_samples) > 0:
-            confidence = len(matching_samples[matching_samples['PlayGolf'] == prediction]) / len(matching_samples)
-        else:
-            # Calculate partial matching confidence
-            partial_matches = df[
-                (df['Outlook'] == request.Outlook) |
-                (df['Temperature'] == request.Temperature)
-            ]
-            if len(partial_matches) > 0:
-                confidence = len(partial_matches[partial_matches['PlayGolf'] == prediction]) / len(partial_matches)
-            else:
-                confidence = 0.5
-        
-        return {
-            "prediction": prediction,
-            "confidence": round(float(confidence), 2),
-            "input_features": sample
-        }
+        return await run_compute("decision_tree.predict", _predict_sync, sample)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
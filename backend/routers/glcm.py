@@ -1,77 +1,387 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from typing import List
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+from typing import List, Optional
 import numpy as np
-from PIL import Image
-import io
-from skimage.feature import graycomatrix, graycoprops
-from skimage import color
+import asyncio
+import json
+import time
+from skimage.feature import graycomatrix
 import base64
 
+from backend.modules.glcm_engine import (
+    GLCM_LEVELS, GLCM_PROPERTIES, MATRIX_FORMATS, MATRIX_DTYPES, FEATURE_MAP_MAX_LEVELS,
+    decode_gray, quantize_gray, encode_glcm_matrices, glcm_features, glcm_feature_maps, glcm_sweep,
+    encode_array_base64, encode_array_png
+)
+
+from backend.modules.utils.result_cache import ResultCache
+from backend.modules.utils.image_ingest import ImageTooLargeError, analysis_budget, spool_upload, remove_spooled
+from backend.compute import run_compute
+
 router = APIRouter(prefix="/glcm", tags=["glcm"])
 
+# Shared result cache for the texture endpoints (TEXTURE_CACHE_MAX_BYTES / _DIR / _DISK_MAX_BYTES)
+result_cache = ResultCache.from_env("TEXTURE_CACHE")
+
+
+def _analyze_glcm_sync(path: str, degree_list: list, distance: int, levels: int,
+                       matrix_format: str, matrix_dtype: str, extended: bool, max_pixels: int) -> dict:
+    """CPU-bound part of /analyze, run on the compute executor"""
+    img_gray, resolution = decode_gray(path, max_pixels)
+
+    # Re-bin to the requested number of gray levels
+    img_gray = quantize_gray(img_gray, levels)
+    angles = [np.deg2rad(deg) for deg in degree_list]
+
+    # Calculate GLCM
+    glcm = graycomatrix(
+        img_gray,
+        distances=[distance],
+        angles=angles,
+        levels=levels,
+        symmetric=True,
+        normed=True
+    )
+
+    # Extract all features in a single pass
+    features = {
+        name: values[0].tolist()
+        for name, values in glcm_features(glcm, extended=extended).items()
+    }
+
+    # Prepare matrices for all angles in the requested format
+    glcm_matrices = encode_glcm_matrices(glcm, degree_list, matrix_format, matrix_dtype)
+
+    return {
+        "status": "success",
+        "features": features,
+        "degrees": degree_list,
+        "levels": levels,
+        "matrix_format": matrix_format,
+        "analysis_resolution": resolution,
+        "glcm_matrices": glcm_matrices
+    }
+
+
+def _check_max_pixels(max_pixels: Optional[int]):
+    """Reject pixel budgets that cannot hold an image (None keeps the default budget)"""
+    if max_pixels is not None and max_pixels < 1:
+        raise HTTPException(status_code=400, detail="max_pixels must be >= 1")
+
+
 @router.post("/analyze")
 async def analyze_glcm(
     file: UploadFile = File(...),
     degrees: str = Form(...), # Comma separated string: "0,45,90"
-    distance: int = Form(...)
+    distance: int = Form(...),
+    levels: int = Form(256),
+    matrix_format: str = Form("dense"), # dense | sparse | base64 | none (features only)
+    matrix_dtype: str = Form("float32"), # element type for base64 blobs: float32 | float16
+    extended: bool = Form(False), # also return entropy, variance, sum/difference stats and IMC
+    max_pixels: Optional[int] = Form(None) # downscale larger images to this many pixels before analysis
 ):
+    _check_max_pixels(max_pixels)
+    if levels not in GLCM_LEVELS:
+        raise HTTPException(status_code=400, detail=f"levels must be one of {list(GLCM_LEVELS)}")
+    if matrix_format not in MATRIX_FORMATS:
+        raise HTTPException(status_code=400, detail=f"matrix_format must be one of {list(MATRIX_FORMATS)}")
+    if matrix_dtype not in MATRIX_DTYPES:
+        raise HTTPException(status_code=400, detail=f"matrix_dtype must be one of {list(MATRIX_DTYPES)}")
+
+    path = None
     try:
-        # Read image
-        contents = await file.read()
-        image = Image.open(io.BytesIO(contents))
-        img_array = np.array(image)
-
-        # Convert to grayscale
-        if len(img_array.shape) == 3:
-            img_gray = color.rgb2gray(img_array)
-        else:
-            img_gray = img_array
-        
-        img_gray = (img_gray * 255).astype(np.uint8)
+        # Spool the upload to disk instead of holding it in memory
+        path, digest = await spool_upload(file)
 
         # Parse degrees
         degree_list = [int(d) for d in degrees.split(",")]
-        angles = [np.deg2rad(deg) for deg in degree_list]
-
-        # Calculate GLCM
-        glcm = graycomatrix(
-            img_gray,
-            distances=[distance],
-            angles=angles,
-            levels=256,
-            symmetric=True,
-            normed=True
+
+        cache_key = ResultCache.make_key("glcm", digest.encode(), {
+            "degrees": degree_list, "distance": distance, "levels": levels,
+            "matrix_format": matrix_format, "matrix_dtype": matrix_dtype, "extended": extended,
+            "max_pixels": analysis_budget(max_pixels)
+        })
+        cached = await result_cache.get_async(cache_key)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+
+        result = await run_compute(
+            "glcm.analyze", _analyze_glcm_sync,
+            path, degree_list, distance, levels, matrix_format, matrix_dtype, extended, max_pixels
         )
+        return Response(content=await result_cache.set_async(cache_key, result), media_type="application/json")
+
+    except HTTPException:
+        raise
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        remove_spooled(path)
+
+
+MAP_FORMATS = ("float32", "float16", "png")
+
+
+def _feature_map_sync(path: str, window: int, stride: int, distance: int, degree_list: list,
+                      levels: int, property_list: list, output_format: str, max_pixels: int) -> dict:
+    """CPU-bound part of /feature-map, run on the compute executor"""
+    img_gray, resolution = decode_gray(path, max_pixels)
+    img_gray = quantize_gray(img_gray, levels)
+    angles = [np.deg2rad(deg) for deg in degree_list]
+
+    maps = glcm_feature_maps(img_gray, levels, window, stride, distance, angles, property_list)
+
+    if output_format == "png":
+        encoded = {name: encode_array_png(values) for name, values in maps.items()}
+    else:
+        encoded = {name: encode_array_base64(values, output_format) for name, values in maps.items()}
+
+    return {
+        "status": "success",
+        "image_shape": list(img_gray.shape),
+        "window": window,
+        "stride": stride,
+        "distance": distance,
+        "degrees": degree_list,
+        "levels": levels,
+        "output_format": output_format,
+        "analysis_resolution": resolution,
+        "feature_maps": encoded
+    }
+
+
+@router.post("/feature-map")
+async def glcm_feature_map(
+    file: UploadFile = File(...),
+    window: int = Form(15),
+    stride: int = Form(4),
+    distance: int = Form(1),
+    degrees: str = Form("0,45,90,135"), # Angles are averaged into one map per property
+    levels: int = Form(16),
+    properties: str = Form(",".join(GLCM_PROPERTIES)),
+    output_format: str = Form("float32"), # float32 | float16 (base64 arrays) | png (8-bit preview)
+    max_pixels: Optional[int] = Form(None)
+):
+    """Compute sliding-window GLCM texture maps"""
+    _check_max_pixels(max_pixels)
+    if levels not in GLCM_LEVELS or levels > FEATURE_MAP_MAX_LEVELS:
+        allowed = [lv for lv in GLCM_LEVELS if lv <= FEATURE_MAP_MAX_LEVELS]
+        raise HTTPException(status_code=400, detail=f"levels must be one of {allowed}")
+    if output_format not in MAP_FORMATS:
+        raise HTTPException(status_code=400, detail=f"output_format must be one of {list(MAP_FORMATS)}")
+    property_list = [p.strip() for p in properties.split(",") if p.strip()]
+    unknown = [p for p in property_list if p not in GLCM_PROPERTIES]
+    if not property_list or unknown:
+        raise HTTPException(status_code=400, detail=f"properties must be a subset of {list(GLCM_PROPERTIES)}")
+    if window < 2 or stride < 1 or distance < 1:
+        raise HTTPException(status_code=400, detail="window must be >= 2, stride and distance >= 1")
+
+    path = None
+    try:
+        path, _ = await spool_upload(file)
+        degree_list = [int(d) for d in degrees.split(",")]
+
+        try:
+            return await run_compute(
+                "glcm.feature_map", _feature_map_sync,
+                path, window, stride, distance, degree_list, levels, property_list, output_format, max_pixels
+            )
+        except ImageTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        remove_spooled(path)
+
+
+# ============== Distance/Angle Sweep ==============
+
+MAX_SWEEP_DISTANCES = 64
+
+
+def _parse_int_list(spec: str, limit: int) -> list:
+    """
+    Parse "1-10", "1,2,4" or a mix such as "1-3,8" into a list of ints.
+
+    Stops at limit + 1 values, so an oversized range is rejected by the
+    caller's length check without ever being expanded.
+    """
+    values = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, stop = part.split("-", 1)
+            start, stop = int(start), int(stop)
+            values.extend(range(start, min(stop, start + limit) + 1))
+        else:
+            values.append(int(part))
+        if len(values) > limit:
+            return values[:limit + 1]
+    return values
 
-        # Extract features
-        features = {
-            'contrast': graycoprops(glcm, 'contrast')[0].tolist(),
-            'dissimilarity': graycoprops(glcm, 'dissimilarity')[0].tolist(),
-            'homogeneity': graycoprops(glcm, 'homogeneity')[0].tolist(),
-            'energy': graycoprops(glcm, 'energy')[0].tolist(),
-            'correlation': graycoprops(glcm, 'correlation')[0].tolist(),
-            'ASM': graycoprops(glcm, 'ASM')[0].tolist()
-        }
-
-        # Prepare matrices for all angles
-        glcm_matrices = {}
-        for i, deg in enumerate(degree_list):
-            glcm_matrices[str(deg)] = glcm[:, :, 0, i].tolist()
-
-        return {
-            "status": "success",
-            "features": features,
-            "degrees": degree_list,
-            "glcm_matrices": glcm_matrices
-        }
 
+def _sweep_sync(path: str, distance_list: list, degree_list: list, levels: int,
+                extended: bool, max_pixels: int) -> dict:
+    """CPU-bound part of /sweep, run on the compute executor"""
+    img_gray, resolution = decode_gray(path, max_pixels)
+    img_gray = quantize_gray(img_gray, levels)
+    angles = [np.deg2rad(deg) for deg in degree_list]
+
+    glcm = glcm_sweep(img_gray, levels, distance_list, angles)
+    features = glcm_features(glcm, extended=extended)
+
+    return {
+        "status": "success",
+        "distances": distance_list,
+        "degrees": degree_list,
+        "levels": levels,
+        "analysis_resolution": resolution,
+        # Each property is a [distance][angle] curve table
+        "features": {name: values.tolist() for name, values in features.items()}
+    }
+
+
+@router.post("/sweep")
+async def glcm_distance_sweep(
+    file: UploadFile = File(...),
+    distances: str = Form("1-10"), # Range "1-10" and/or list "1,2,4"
+    degrees: str = Form("0,45,90,135"),
+    levels: int = Form(256),
+    extended: bool = Form(False),
+    max_pixels: Optional[int] = Form(None)
+):
+    """GLCM features for every (distance, angle) pair from a single decode"""
+    _check_max_pixels(max_pixels)
+    if levels not in GLCM_LEVELS:
+        raise HTTPException(status_code=400, detail=f"levels must be one of {list(GLCM_LEVELS)}")
+    try:
+        distance_list = _parse_int_list(distances, MAX_SWEEP_DISTANCES)
+        degree_list = [int(d) for d in degrees.split(",")]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="distances and degrees must be integers or ranges")
+    if not distance_list or not degree_list:
+        raise HTTPException(status_code=400, detail="At least one distance and one degree are required")
+    if len(distance_list) > MAX_SWEEP_DISTANCES or min(distance_list) < 1:
+        raise HTTPException(status_code=400, detail=f"Use between 1 and {MAX_SWEEP_DISTANCES} positive distances")
+
+    path = None
+    try:
+        path, digest = await spool_upload(file)
+        cache_key = ResultCache.make_key("glcm_sweep", digest.encode(), {
+            "distances": distance_list, "degrees": degree_list, "levels": levels,
+            "extended": extended, "max_pixels": analysis_budget(max_pixels)
+        })
+        cached = await result_cache.get_async(cache_key)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+
+        result = await run_compute(
+            "glcm.sweep", _sweep_sync, path, distance_list, degree_list, levels, extended, max_pixels
+        )
+        return Response(content=await result_cache.set_async(cache_key, result), media_type="application/json")
+
+    except HTTPException:
+        raise
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        remove_spooled(path)
+
+
+# ============== Batch Endpoint ==============
+
+from backend.modules.texture_batch import WORKERS, iter_zip_images, run_batch
+
+
+@router.post("/batch")
+async def batch_analyze(
+    files: List[UploadFile] = File(None),
+    archive: UploadFile = File(None), # zip archive of images, alternative to files
+    analysis: str = Form("glcm"), # glcm | lbp
+    degrees: str = Form("0,45,90,135"),
+    distance: int = Form(1),
+    levels: int = Form(256),
+    extended: bool = Form(False),
+    radius: int = Form(1),
+    n_points: int = Form(8),
+    method: str = Form("uniform")
+):
+    """Analyze many images with one parameter set, streaming one NDJSON line per image"""
+    if analysis not in WORKERS:
+        raise HTTPException(status_code=400, detail=f"analysis must be one of {list(WORKERS)}")
+    if not files and archive is None:
+        raise HTTPException(status_code=400, detail="Provide image files or a zip archive")
+    if levels not in GLCM_LEVELS:
+        raise HTTPException(status_code=400, detail=f"levels must be one of {list(GLCM_LEVELS)}")
+
+    try:
+        degree_list = [int(d) for d in degrees.split(",")]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="degrees must be comma separated integers")
+
+    if analysis == "glcm":
+        params = {"degrees": degree_list, "distance": distance, "levels": levels, "extended": extended}
+    else:
+        params = {"radius": radius, "n_points": n_points, "method": method}
+
+    def iter_items():
+        if archive is not None:
+            yield from iter_zip_images(archive.file)
+        for upload in files or []:
+            upload.file.seek(0)
+            yield upload.filename, upload.file.read()
+
+    async def stream():
+        async for result in run_batch(iter_items(), analysis, params):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 # ============== LBP (Local Binary Pattern) Endpoints ==============
 
-from backend.modules.lbp_module import compute_lbp, compute_lbp_histogram, analyze_texture_uniformity
+from backend.modules.lbp_module import (
+    analyze_lbp, compute_lbp, compute_multiscale_lbp, compute_spatial_lbp, encode_lbp_image,
+    histogram_distance_matrices,
+    LBP_IMAGE_FORMATS, MULTISCALE_METHODS, HISTOGRAM_METRICS, DISTANCE_MATRIX_METRICS
+)
+from backend.modules.texture_gallery import describe_image, get_gallery
+
+
+def _lbp_analyze_sync(path: str, radius: int, n_points: int, method: str, max_pixels: int,
+                      image_format: str = "png", max_edge: int = None) -> dict:
+    """CPU-bound part of /lbp/analyze, run on the compute executor"""
+    img_gray, resolution = decode_gray(path, max_pixels)
+
+    # LBP plus histogram and uniformity statistics from one pattern count
+    analysis = analyze_lbp(img_gray, radius, n_points, method)
+
+    # Encode the LBP image (base64 inside JSON; /lbp/image serves it as binary)
+    encoded, media_type, shape = encode_lbp_image(analysis["lbp_image"], image_format, max_edge)
+
+    return {
+        "status": "success",
+        "lbp_image": base64.b64encode(encoded).decode('utf-8') if encoded is not None else None,
+        "lbp_image_format": image_format,
+        "lbp_image_media_type": media_type,
+        "lbp_image_shape": shape,
+        "info": analysis["info"],
+        "histogram": analysis["histogram"],
+        "uniformity": analysis["uniformity"],
+        "analysis_resolution": resolution
+    }
 
 
 @router.post("/lbp/analyze")
@@ -79,36 +389,450 @@ async def lbp_analyze(
     file: UploadFile = File(...),
     radius: int = Form(1),
     n_points: int = Form(8),
-    method: str = Form("uniform")
+    method: str = Form("uniform"),
+    max_pixels: Optional[int] = Form(None),
+    image_format: str = Form("png"), # png, png_fast, webp, raw or none
+    max_edge: Optional[int] = Form(None) # Downscaled preview: longest edge in pixels
 ):
     """Compute LBP and return analysis results"""
+    _check_max_pixels(max_pixels)
+    if image_format not in LBP_IMAGE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"image_format must be one of {list(LBP_IMAGE_FORMATS)}")
+    if max_edge is not None and max_edge < 1:
+        raise HTTPException(status_code=400, detail="max_edge must be positive")
+
+    path = None
+    try:
+        # Spool the upload to disk instead of holding it in memory
+        path, digest = await spool_upload(file)
+        cache_key = ResultCache.make_key("lbp", digest.encode(), {
+            "radius": radius, "n_points": n_points, "method": method, "max_pixels": analysis_budget(max_pixels),
+            "image_format": image_format, "max_edge": max_edge
+        })
+        cached = await result_cache.get_async(cache_key)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+
+        result = await run_compute(
+            "lbp.analyze", _lbp_analyze_sync, path, radius, n_points, method, max_pixels, image_format, max_edge
+        )
+        return Response(content=await result_cache.set_async(cache_key, result), media_type="application/json")
+    except HTTPException:
+        raise
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        remove_spooled(path)
+
+
+def _lbp_image_sync(path: str, radius: int, n_points: int, method: str, max_pixels: int,
+                    image_format: str, max_edge: int) -> tuple:
+    """CPU-bound part of /lbp/image: the encoded LBP visualization only"""
+    img_gray, _ = decode_gray(path, max_pixels)
+    lbp_normalized, _, _ = compute_lbp(img_gray, radius, n_points, method)
+    return encode_lbp_image(lbp_normalized, image_format, max_edge)
+
+
+@router.post("/lbp/image")
+async def lbp_image(
+    file: UploadFile = File(...),
+    radius: int = Form(1),
+    n_points: int = Form(8),
+    method: str = Form("uniform"),
+    max_pixels: Optional[int] = Form(None),
+    image_format: str = Form("png_fast"), # png, png_fast, webp or raw
+    max_edge: Optional[int] = Form(None)
+):
+    """LBP image as a binary response body (no base64, no JSON)"""
+    _check_max_pixels(max_pixels)
+    if image_format not in LBP_IMAGE_FORMATS or image_format == "none":
+        raise HTTPException(status_code=400, detail="image_format must be one of png, png_fast, webp, raw")
+    if max_edge is not None and max_edge < 1:
+        raise HTTPException(status_code=400, detail="max_edge must be positive")
+
+    path = None
+    try:
+        path, _ = await spool_upload(file)
+        encoded, media_type, (height, width) = await run_compute(
+            "lbp.image", _lbp_image_sync, path, radius, n_points, method, max_pixels, image_format, max_edge
+        )
+        # Raw output needs the shape to be decoded; the headers carry it for every format
+        return Response(content=encoded, media_type=media_type, headers={
+            "X-Image-Width": str(width),
+            "X-Image-Height": str(height)
+        })
+    except HTTPException:
+        raise
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        remove_spooled(path)
+
+
+MAX_LBP_SCALES = 6
+MAX_LBP_POINTS = 24
+
+
+def _parse_scales(spec: str) -> list:
+    """Parse "1,8;2,16;3,24" into [(1, 8), (2, 16), (3, 24)]"""
+    scales = []
+    for item in spec.split(";"):
+        if item.strip():
+            radius, n_points = item.split(",")
+            scales.append((int(radius), int(n_points)))
+    return scales
+
+
+def _lbp_multiscale_sync(path: str, scales: list, method: str, max_pixels: int) -> dict:
+    """CPU-bound part of /lbp/multiscale, run on the compute executor"""
+    img_gray, resolution = decode_gray(path, max_pixels)
+    descriptor = compute_multiscale_lbp(img_gray, scales, method)
+
+    return {
+        "status": "success",
+        "method": method,
+        "scales": [
+            {**scale, "histogram": scale["histogram"].tolist()}
+            for scale in descriptor["scales"]
+        ],
+        "feature_vector": descriptor["feature_vector"].tolist(),
+        "feature_length": len(descriptor["feature_vector"]),
+        "analysis_resolution": resolution
+    }
+
+
+@router.post("/lbp/multiscale")
+async def lbp_multiscale(
+    file: UploadFile = File(...),
+    scales: str = Form("1,8;2,16;3,24"), # "radius,n_points" pairs separated by ';'
+    method: str = Form("uniform"),
+    max_pixels: Optional[int] = Form(None)
+):
+    """Concatenated LBP histograms over several (radius, n_points) scales"""
+    _check_max_pixels(max_pixels)
+    if method not in MULTISCALE_METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of {list(MULTISCALE_METHODS)}")
+    try:
+        scale_list = _parse_scales(scales)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="scales must look like '1,8;2,16;3,24'")
+    if not 1 <= len(scale_list) <= MAX_LBP_SCALES:
+        raise HTTPException(status_code=400, detail=f"Provide between 1 and {MAX_LBP_SCALES} scales")
+    if any(radius < 1 or not 4 <= n_points <= MAX_LBP_POINTS for radius, n_points in scale_list):
+        raise HTTPException(status_code=400, detail=f"radius must be >= 1 and n_points between 4 and {MAX_LBP_POINTS}")
+
+    path = None
+    try:
+        path, digest = await spool_upload(file)
+        cache_key = ResultCache.make_key("lbp_multiscale", digest.encode(), {
+            "scales": scale_list, "method": method, "max_pixels": analysis_budget(max_pixels)
+        })
+        cached = await result_cache.get_async(cache_key)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+
+        result = await run_compute("lbp.multiscale", _lbp_multiscale_sync, path, scale_list, method, max_pixels)
+        return Response(content=await result_cache.set_async(cache_key, result), media_type="application/json")
+    except HTTPException:
+        raise
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        remove_spooled(path)
+
+
+MAX_GRID_SIZE = 64
+MAX_ROIS = 10_000
+
+
+def _parse_grid(spec: str):
+    """Parse "7x7" into (7, 7); an empty string means no grid"""
+    if not spec.strip():
+        return None
+    grid_rows, grid_cols = spec.lower().split("x")
+    return int(grid_rows), int(grid_cols)
+
+
+def _scale_rois(rois: list, resolution: dict) -> list:
+    """Map [x, y, width, height] boxes in original pixels to clipped analysis-resolution boxes"""
+    scale = resolution["scale"]
+    height, width = resolution["height"], resolution["width"]
+    boxes = []
+    for x, y, w, h in rois:
+        top, left = max(0, int(np.floor(y * scale))), max(0, int(np.floor(x * scale)))
+        bottom, right = min(height, int(np.ceil((y + h) * scale))), min(width, int(np.ceil((x + w) * scale)))
+        if bottom <= top or right <= left:
+            raise ValueError(f"ROI {[x, y, w, h]} lies outside the image")
+        boxes.append((top, left, bottom, right))
+    return boxes
+
+
+def _lbp_grid_sync(path: str, radius: int, n_points: int, method: str, grid, rois: list, max_pixels: int) -> dict:
+    """CPU-bound part of /lbp/grid, run on the compute executor"""
+    img_gray, resolution = decode_gray(path, max_pixels)
+    boxes = _scale_rois(rois, resolution) if rois else None
+    spatial = compute_spatial_lbp(img_gray, radius, n_points, method, grid, boxes)
+
+    result = {
+        "status": "success",
+        "radius": radius,
+        "n_points": n_points,
+        "method": method,
+        "n_bins": spatial["n_bins"],
+        "analysis_resolution": resolution
+    }
+    if grid is not None:
+        result["grid"] = spatial["grid"]
+        result["descriptor"] = spatial["descriptor"].tolist()
+        result["descriptor_length"] = len(spatial["descriptor"])
+    if boxes:
+        result["rois"] = [
+            {"roi": roi, "box": list(box), "pixels": int(pixels), "histogram": histogram.tolist()}
+            for roi, box, pixels, histogram in zip(rois, boxes, spatial["roi_pixels"], spatial["roi_histograms"])
+        ]
+    return result
+
+
+@router.post("/lbp/grid")
+async def lbp_grid(
+    file: UploadFile = File(...),
+    radius: int = Form(1),
+    n_points: int = Form(8),
+    method: str = Form("uniform"),
+    grid: Optional[str] = Form(None), # "rows x cols"; omitted/empty: 7x7 without rois, none with rois
+    rois: Optional[str] = Form(None), # JSON list of [x, y, width, height] in original pixels
+    max_pixels: Optional[int] = Form(None)
+):
+    """Spatially enhanced LBP: concatenated grid-cell histograms and ROI histograms"""
+    _check_max_pixels(max_pixels)
+    # Per-cell histograms need a bounded label set; 'default'/'ror' have 2^P labels per cell
+    if method not in MULTISCALE_METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of {list(MULTISCALE_METHODS)}")
+    if radius < 1 or not 4 <= n_points <= MAX_LBP_POINTS:
+        raise HTTPException(status_code=400, detail=f"radius must be >= 1 and n_points between 4 and {MAX_LBP_POINTS}")
+    try:
+        grid_shape = _parse_grid(grid or ("" if rois else "7x7"))
+        roi_list = json.loads(rois) if rois else []
+        if any(len(roi) != 4 for roi in roi_list):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="grid must look like '7x7' and rois like [[x, y, width, height], ...]")
+    if grid_shape is None and not roi_list:
+        raise HTTPException(status_code=400, detail="Provide a grid, rois or both")
+    if grid_shape is not None and not all(1 <= n <= MAX_GRID_SIZE for n in grid_shape):
+        raise HTTPException(status_code=400, detail=f"Grid dimensions must be between 1 and {MAX_GRID_SIZE}")
+    if len(roi_list) > MAX_ROIS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_ROIS} ROIs per request")
+
+    path = None
+    try:
+        path, digest = await spool_upload(file)
+        cache_key = ResultCache.make_key("lbp_grid", digest.encode(), {
+            "radius": radius, "n_points": n_points, "method": method,
+            "grid": grid_shape, "rois": roi_list, "max_pixels": analysis_budget(max_pixels)
+        })
+        cached = await result_cache.get_async(cache_key)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+
+        result = await run_compute(
+            "lbp.grid", _lbp_grid_sync, path, radius, n_points, method, grid_shape, roi_list, max_pixels
+        )
+        return Response(content=await result_cache.set_async(cache_key, result), media_type="application/json")
+    except HTTPException:
+        raise
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        remove_spooled(path)
+
+
+MAX_MATRIX_CELLS = 25_000_000
+
+
+class CompareMatrixRequest(BaseModel):
+    histograms_a: List[List[float]]
+    histograms_b: Optional[List[List[float]]] = None  # Compare histograms_a with itself if omitted
+    metrics: List[str] = list(DISTANCE_MATRIX_METRICS)
+    normalize: bool = True  # L1-normalize every histogram first
+    output_format: str = "json"  # "json" (nested lists) or "base64" (float32 blobs)
+
+
+def _compare_matrix_sync(request: CompareMatrixRequest) -> dict:
+    """CPU-bound part of /lbp/compare-matrix, run on the compute executor"""
+    hist_a = np.asarray(request.histograms_a, dtype=np.float32)
+    hist_b = None if request.histograms_b is None else np.asarray(request.histograms_b, dtype=np.float32)
+    if request.normalize:
+        hist_a /= hist_a.sum(axis=1, keepdims=True) + np.float32(1e-10)
+        if hist_b is not None:
+            hist_b /= hist_b.sum(axis=1, keepdims=True) + np.float32(1e-10)
+
+    matrices = histogram_distance_matrices(hist_a, hist_b, request.metrics)
+    if request.output_format == "base64":
+        encoded = {metric: encode_array_base64(matrix) for metric, matrix in matrices.items()}
+    else:
+        encoded = {metric: matrix.tolist() for metric, matrix in matrices.items()}
+
+    return {
+        "status": "success",
+        "shape": [len(hist_a), len(hist_a) if hist_b is None else len(hist_b)],
+        "output_format": request.output_format,
+        "matrices": encoded
+    }
+
+
+@router.post("/lbp/compare-matrix")
+async def lbp_compare_matrix(request: CompareMatrixRequest):
+    """All-pairs histogram distances between two sets of LBP histograms"""
+    if request.output_format not in ("json", "base64"):
+        raise HTTPException(status_code=400, detail="output_format must be 'json' or 'base64'")
+    unknown = set(request.metrics) - set(DISTANCE_MATRIX_METRICS)
+    if unknown or not request.metrics:
+        raise HTTPException(status_code=400, detail=f"metrics must be a non-empty subset of {list(DISTANCE_MATRIX_METRICS)}")
+
+    other = request.histograms_a if request.histograms_b is None else request.histograms_b
+    if not request.histograms_a or not other:
+        raise HTTPException(status_code=400, detail="Histogram sets must not be empty")
+    bins = {len(hist) for hist in request.histograms_a} | {len(hist) for hist in other}
+    if len(bins) != 1:
+        raise HTTPException(status_code=400, detail="All histograms must have the same number of bins")
+    if len(request.histograms_a) * len(other) > MAX_MATRIX_CELLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_MATRIX_CELLS} histogram pairs per request")
+
     try:
-        # Read image
-        contents = await file.read()
-        image = Image.open(io.BytesIO(contents)).convert("RGB")
-        img_array = np.array(image)
-        
-        # Compute LBP
-        lbp_normalized, lbp_raw, info = compute_lbp(img_array, radius, n_points, method)
-        
-        # Get histogram
-        histogram_data = compute_lbp_histogram(lbp_raw, n_bins=n_points + 2 if method == 'uniform' else 256)
-        
-        # Get uniformity analysis
-        uniformity = analyze_texture_uniformity(lbp_raw)
-        
-        # Convert LBP image to base64
-        lbp_img = Image.fromarray(lbp_normalized)
-        buffer = io.BytesIO()
-        lbp_img.save(buffer, format="PNG")
-        lbp_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        
-        return {
-            "status": "success",
-            "lbp_image": lbp_base64,
-            "info": info,
-            "histogram": histogram_data,
-            "uniformity": uniformity
-        }
+        return await run_compute("lbp.compare_matrix", _compare_matrix_sync, request)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ============== Texture Gallery ==============
+
+MAX_GALLERY_K = 100
+
+
+def _gallery_describe_sync(path: str, scales: list, method: str, max_pixels: int) -> tuple:
+    """CPU-bound part of /gallery/add and /gallery/search: decode and describe one image"""
+    img_gray, resolution = decode_gray(path, max_pixels)
+    return describe_image(img_gray, scales, method), resolution
+
+
+def _gallery_search_sync(gallery, descriptor, k: int, metric: str) -> dict:
+    """Rank the gallery against a query descriptor"""
+    start = time.perf_counter()
+    matches = gallery.search(descriptor, k, metric)
+    return {
+        "status": "success",
+        "metric": metric,
+        "matches": matches,
+        "gallery_size": len(gallery),
+        "search_time_ms": (time.perf_counter() - start) * 1000
+    }
+
+
+# The gallery itself is only opened and changed in the serving process (on threads):
+# gallery instances in several worker processes would hand out the same entry IDs
+# and overwrite each other's rows. Workers only compute descriptors.
+
+@router.post("/gallery/add")
+async def gallery_add(
+    files: List[UploadFile] = File(...),
+    max_pixels: Optional[int] = Form(None)
+):
+    """Add one or more images to the texture gallery (named by filename)"""
+    _check_max_pixels(max_pixels)
+    gallery = await asyncio.to_thread(get_gallery)
+    added = []
+    for upload in files:
+        path = None
+        try:
+            path, _ = await spool_upload(upload)
+            descriptor, resolution = await run_compute(
+                "gallery.add", _gallery_describe_sync, path, gallery.scales, gallery.method, max_pixels
+            )
+            added.append(await asyncio.to_thread(
+                gallery.add, descriptor, upload.filename, {"analysis_resolution": resolution}
+            ))
+        except HTTPException:
+            raise
+        except ImageTooLargeError as e:
+            raise HTTPException(status_code=413, detail=f"{upload.filename}: {e}")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"{upload.filename}: {e}")
+        finally:
+            remove_spooled(path)
+
+    return {"status": "success", "added": added, "gallery_size": len(gallery)}
+
+
+@router.post("/gallery/search")
+async def gallery_search(
+    file: UploadFile = File(...),
+    k: int = Form(5),
+    metric: str = Form("chi_square"),
+    max_pixels: Optional[int] = Form(None)
+):
+    """Top-k most similar gallery textures for a query image"""
+    _check_max_pixels(max_pixels)
+    if metric not in HISTOGRAM_METRICS:
+        raise HTTPException(status_code=400, detail=f"metric must be one of {list(HISTOGRAM_METRICS)}")
+    if not 1 <= k <= MAX_GALLERY_K:
+        raise HTTPException(status_code=400, detail=f"k must be between 1 and {MAX_GALLERY_K}")
+
+    path = None
+    try:
+        gallery = await asyncio.to_thread(get_gallery)
+        path, _ = await spool_upload(file)
+        descriptor, _ = await run_compute(
+            "gallery.search", _gallery_describe_sync, path, gallery.scales, gallery.method, max_pixels
+        )
+        return await asyncio.to_thread(_gallery_search_sync, gallery, descriptor, k, metric)
+    except HTTPException:
+        raise
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        remove_spooled(path)
+
+
+@router.get("/gallery")
+async def gallery_info(offset: int = 0, limit: int = 100):
+    """Gallery configuration, size and a page of its entries"""
+    gallery = get_gallery()
+    return {"status": "success", **gallery.stats(), "items": gallery.entries(offset, limit)}
+
+
+@router.delete("/gallery/{entry_id}")
+async def gallery_remove(entry_id: int):
+    """Remove an entry from future searches"""
+    if not get_gallery().remove(entry_id):
+        raise HTTPException(status_code=404, detail=f"Gallery entry {entry_id} not found")
+    return {"status": "success", "removed": entry_id}
+
+
+# ============== Cache Administration ==============
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters and sizes of the texture result cache"""
+    return result_cache.stats()
+
+
+@router.delete("/cache")
+async def cache_clear():
+    """Drop all cached texture results"""
+    result_cache.clear()
+    return {"status": "success"}
@@ -1,125 +1,503 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 import pandas as pd
 import numpy as np
-from sklearn.neighbors import KNeighborsClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
+import asyncio
 import io
 import pickle
 import json
 
+import os
+
+from backend.compute import run_compute
+from backend.modules.knn_index import INDEX_BACKENDS, SCALERS, KNNIndexClassifier
+from backend.modules.knn_ooc import evaluate_holdout, ingest_csv
+from backend.modules.utils import metrics
+from backend.modules.utils.dataset_registry import DatasetRegistry, load_dataset
+from backend.modules.utils.image_ingest import spool_upload, remove_spooled
+from backend.modules.utils.model_registry import ModelRegistry
 
 router = APIRouter(prefix="/knn", tags=["knn"])
 
-# In-memory storage for the model (for simplicity in this session)
-# In a real app, use a database or file storage
-model_store = {
-    "model": None,
-    "encoders": {},
-    "X_train": None,
-    "y_train": None
-}
+# Uploaded datasets live on the server and are referenced by ID
+# (KNN_DATASET_DIR, KNN_DATASET_TTL, KNN_DATASET_MAX_ENTRIES)
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+dataset_registry = DatasetRegistry.from_env("KNN_DATASET", os.path.join(DATA_DIR, "knn_datasets"))
+
+# Trained models are saved as numbered versions (KNN_MODEL_DIR, KNN_MODEL_MAX_LOADED,
+# KNN_MODEL_REBUILD_DELTA: appended rows before the neighbor index is rebuilt)
+model_registry = ModelRegistry.from_env("KNN_MODEL", os.path.join(DATA_DIR, "knn_models"))
+
+TARGET_COLUMN = 'Loan_Status'
 
 class TrainRequest(BaseModel):
     k_value: int
     test_size: float
 
+def _upload_dataset_sync(contents: bytes) -> dict:
+    """CPU-bound part of /upload-dataset, run on the compute executor"""
+    df = pd.read_csv(io.BytesIO(contents))
+
+    # Basic preprocessing (encoding categorical variables)
+    encoders = {}
+    df_encoded = df.copy()
+
+    # Drop Loan_ID if exists
+    if 'Loan_ID' in df_encoded.columns:
+        df_encoded = df_encoded.drop('Loan_ID', axis=1)
+
+    # Fill NA (simple strategy for now)
+    df_encoded = df_encoded.ffill().bfill()
+    # Fill any remaining NaN with 0
+    df_encoded = df_encoded.fillna(0)
+
+    for col in df_encoded.select_dtypes(include=['object', 'string', 'category', 'bool']).columns:
+        le = LabelEncoder()
+        df_encoded[col] = le.fit_transform(df_encoded[col].astype(str))
+        encoders[col] = le
+
+    # Convert to native Python types to avoid NaN issues in JSON
+    preview_data = df.head().fillna(0).replace([np.inf, -np.inf], 0).to_dict(orient='records')
+    encoded_preview_data = df_encoded.head().fillna(0).replace([np.inf, -np.inf], 0).to_dict(orient='records')
+
+    return df_encoded, encoders, {
+        "rows": len(df_encoded),
+        "columns": df.columns.tolist(),
+        "preview": preview_data,
+        "encoded_preview": encoded_preview_data
+    }
+
+def _upload_dataset_ooc_sync(path: str, directory: str) -> tuple:
+    """Out-of-core /upload-dataset: stream the spooled CSV into a staged matrix dataset"""
+    described = ingest_csv(path, directory, TARGET_COLUMN)
+    preview = described.pop("preview")
+    encoded_preview = described.pop("encoded_preview")
+    return described, {
+        "rows": described["rows"],
+        "out_of_core": True,
+        "columns": preview.columns.tolist(),
+        "preview": preview.fillna(0).replace([np.inf, -np.inf], 0).to_dict(orient='records'),
+        "encoded_preview": encoded_preview.to_dict(orient='records')
+    }
+
+
+# The registry is only updated here on the serving process: workers (COMPUTE_MODE=process)
+# parse and encode, so IDs they would register could not be seen by later requests
 @router.post("/upload-dataset")
-async def upload_dataset(file: UploadFile = File(...)):
+async def upload_dataset(
+    file: UploadFile = File(...),
+    out_of_core: bool = Form(False) # Stream the CSV to disk instead of loading it; for larger-than-RAM files
+):
+    if out_of_core:
+        path = tmp_path = None
+        try:
+            path, _ = await spool_upload(file)
+            dataset_id, tmp_path = dataset_registry.reserve_matrix()
+            described, response = await run_compute("knn.upload", _upload_dataset_ooc_sync, path, tmp_path)
+            await asyncio.to_thread(dataset_registry.commit_matrix, dataset_id, tmp_path, described)
+            tmp_path = None
+            return {"dataset_id": dataset_id, "expires_in": dataset_registry.ttl, **response}
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            remove_spooled(path)
+            if tmp_path is not None:
+                dataset_registry.discard(tmp_path)
+
     try:
         contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
-        
-        # Basic preprocessing (encoding categorical variables)
-        encoders = {}
-        df_encoded = df.copy()
-        
-        # Drop Loan_ID if exists
-        if 'Loan_ID' in df_encoded.columns:
-            df_encoded = df_encoded.drop('Loan_ID', axis=1)
-            
-        # Fill NA (simple strategy for now)
-        df_encoded = df_encoded.ffill().bfill()
-        # Fill any remaining NaN with 0
-        df_encoded = df_encoded.fillna(0)
-
-        for col in df_encoded.select_dtypes(include=['object']).columns:
-            le = LabelEncoder()
-            df_encoded[col] = le.fit_transform(df_encoded[col].astype(str))
-            encoders[col] = le
-            
-        # Store data temporarily (in a real app, save to disk/db)
-        # For this demo, we'll just return the preview and columns
-        
-        # Convert to native Python types to avoid NaN issues in JSON
-        preview_data = df.head().fillna(0).replace([np.inf, -np.inf], 0).to_dict(orient='records')
-        encoded_preview_data = df_encoded.head().fillna(0).replace([np.inf, -np.inf], 0).to_dict(orient='records')
-        
-        return {
-            "columns": df.columns.tolist(),
-            "preview": preview_data,
-            "encoded_preview": encoded_preview_data,
-            "data_json": df_encoded.to_json() # Send back to client to hold state? Or keep on server?
-            # Better to keep on server if large, but for this demo we might need to send it back 
-            # or store in a global variable (not thread safe but ok for single user demo)
-        }
+        df_encoded, encoders, response = await run_compute("knn.upload", _upload_dataset_sync, contents)
+        # Keep the encoded data on the server; the client only holds its ID
+        dataset_id = await asyncio.to_thread(dataset_registry.put, df_encoded, encoders, target=TARGET_COLUMN)
+        return {"dataset_id": dataset_id, "expires_in": dataset_registry.ttl, **response}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def get_dataset(dataset_id: str):
+    """Look up an uploaded dataset, raising 404 if it is unknown or expired"""
+    dataset = dataset_registry.get(dataset_id)
+    if dataset is None:
+        raise HTTPException(status_code=404, detail=f"Dataset {dataset_id} not found or expired; upload it again")
+    return dataset
+
+
+def _split_dataset(dataset, test_size: float):
+    """Features/target split and the fixed-seed train/test split shared by /train and /sweep-k"""
+    df = dataset.frame()
+    if TARGET_COLUMN not in df.columns:
+        raise ValueError(f"Dataset has no '{TARGET_COLUMN}' column")
+
+    X = df.drop(TARGET_COLUMN, axis=1)
+    y = df[TARGET_COLUMN]
+
+    return train_test_split(X, y, test_size=test_size/100, random_state=42)
+
+
+MAX_IVF_LISTS = 65536
+
+
+def _index_params(k_value: int, scaling: str, index: str, n_lists: int, n_probe: int) -> dict:
+    """Validate the scaling/index form fields into KNNIndexClassifier parameters"""
+    if scaling not in SCALERS:
+        raise HTTPException(status_code=400, detail=f"scaling must be one of {list(SCALERS)}")
+    if index not in INDEX_BACKENDS:
+        raise HTTPException(status_code=400, detail=f"index must be one of {list(INDEX_BACKENDS)}")
+    if not 0 <= n_lists <= MAX_IVF_LISTS:
+        raise HTTPException(status_code=400, detail=f"n_lists must be between 0 (automatic) and {MAX_IVF_LISTS}")
+    if n_probe < 1:
+        raise HTTPException(status_code=400, detail="n_probe must be at least 1")
+
+    params = {"n_neighbors": k_value, "scaling": scaling, "index": index}
+    if index == 'ivf':
+        params.update(n_lists=n_lists or None, n_probe=n_probe)
+    return params
+
+
+def _train_model_sync(params: dict, test_size: float, dataset, bootstrap_resamples: int = 0):
+    """CPU-bound part of /train, run on the compute executor"""
+    X_train, X_test, y_train, y_test = _split_dataset(dataset, test_size)
+
+    knn = KNNIndexClassifier(**params)
+    knn.fit(X_train, y_train)
+
+    y_pred = knn.predict(X_test)
+    index_stats = knn.stats()
+
+    # Confusion matrix, headline metrics, report and bootstrap intervals from one pass
+    evaluation = metrics.evaluate(y_test.to_numpy(), y_pred, n_resamples=bootstrap_resamples)
+
+    return X_train, y_train, {
+        "feature_columns": X_train.columns.tolist(),
+        **{name: evaluation[name] for name in METRIC_NAMES},
+        "train_size": len(X_train),
+        "test_size": len(X_test),
+        "k_value": params["n_neighbors"],
+        "index": {**index_stats, "recall_at_k": knn.recall_at_k(X_test)},
+        "confusion_matrix": evaluation["confusion_matrix"].tolist(),
+        "classification_report": evaluation["classification_report"],
+        "confidence_intervals": evaluation.get("confidence_intervals", {})
+    }
+
+
+METRIC_NAMES = ("accuracy", "precision", "recall", "f1_score")
+MAX_BOOTSTRAP_RESAMPLES = 100_000
+
+
+MAX_CV_FOLDS = 20
+MAX_CV_REPEATS = 10
+
+
+def _train_cv_sync(params: dict, cv_folds: int, cv_repeats: int, dataset):
+    """
+    /train in cross-validation mode. Runs on a thread of the serving process, not the
+    compute executor: the folds already go to knn_cv's own process pool, which
+    must not be nested inside a compute worker process.
+    """
+    from backend.modules.knn_cv import cross_validate
+
+    df = dataset.frame()
+    if TARGET_COLUMN not in df.columns:
+        raise ValueError(f"Dataset has no '{TARGET_COLUMN}' column")
+    X = df.drop(TARGET_COLUMN, axis=1)
+    y = df[TARGET_COLUMN]
+    classes, y_codes = np.unique(y.to_numpy(), return_inverse=True)
+
+    folds = cross_validate(X.to_numpy(dtype=np.float64), y_codes, params, cv_folds, cv_repeats)
+    for fold in folds:
+        fold.update(metrics.summary(fold["confusion_matrix"]))
+    scores = {name: np.array([fold[name] for fold in folds]) for name in METRIC_NAMES}
+    total_cm = sum(fold["confusion_matrix"] for fold in folds)
+
+    # The saved model is fitted on every row; the metrics describe the folds
+    knn = KNNIndexClassifier(**params).fit(X, y)
+
+    return X, y, {
+        "feature_columns": X.columns.tolist(),
+        "mode": "cv",
+        **{name: float(values.mean()) for name, values in scores.items()},
+        "mean": {name: float(values.mean()) for name, values in scores.items()},
+        "std": {name: float(values.std(ddof=1)) if len(values) > 1 else 0.0 for name, values in scores.items()},
+        "cv_folds": cv_folds,
+        "cv_repeats": cv_repeats,
+        "classes": classes.tolist(),
+        "folds": [{**fold, "confusion_matrix": fold["confusion_matrix"].tolist()} for fold in folds],
+        "train_size": len(X),
+        "test_size": int(round(np.mean([fold["test_size"] for fold in folds]))),  # per fold
+        "k_value": params["n_neighbors"],
+        "index": knn.stats(),
+        "confusion_matrix": total_cm.tolist()
+    }
+
+
+def _train_ooc_sync(params: dict, test_size: float, directory: str, dataset_id: str, bootstrap_resamples: int = 0):
+    """
+    /train for out-of-core datasets: blockwise exact search within a fixed memory budget.
+
+    Takes the dataset's location rather than the Dataset, so a process-mode
+    worker maps the files itself instead of receiving the pickled matrix.
+    """
+    dataset = load_dataset(directory, dataset_id)
+    n_classes = len(dataset.encoders[TARGET_COLUMN].classes_)
+    evaluation = evaluate_holdout(
+        dataset.features, dataset.target, n_classes, params["n_neighbors"], test_size / 100, params["scaling"]
+    )
+    cm = evaluation.pop("confusion_matrix")
+    return {
+        "feature_columns": dataset.metadata["feature_columns"],
+        "mode": "out_of_core",
+        **metrics.summary(cm),
+        **evaluation,
+        "confidence_intervals": metrics.bootstrap_intervals(cm, bootstrap_resamples),
+        "index": {"index": "blockwise_brute", "scaling": params["scaling"], "query_ms": evaluation["search_ms"]},
+        "confusion_matrix": cm.tolist()
+    }
+
+
 @router.post("/train")
 async def train_model(
     k_value: int = Form(...),
     test_size: float = Form(...),
-    data_json: str = Form(...) # Receive the encoded data back
+    dataset_id: str = Form(...), # ID returned by /upload-dataset
+    cv_folds: int = Form(0), # > 1 switches to stratified k-fold cross-validation
+    cv_repeats: int = Form(1), # Repetitions of the k-fold split with reshuffling
+    scaling: str = Form('standard'), # 'none', 'standard' or 'minmax'
+    index: str = Form('auto'), # Neighbor search backend; 'ivf' is approximate
+    n_lists: int = Form(0), # IVF clusters (0 = sqrt of the training rows)
+    n_probe: int = Form(8), # IVF clusters scanned per query; higher = better recall, slower
+    bootstrap_resamples: int = Form(2000) # Resamples for the holdout metrics' 95% intervals (0 = off)
 ):
+    params = _index_params(k_value, scaling, index, n_lists, n_probe)
+    if not 0 <= bootstrap_resamples <= MAX_BOOTSTRAP_RESAMPLES:
+        raise HTTPException(status_code=400, detail=f"bootstrap_resamples must be between 0 and {MAX_BOOTSTRAP_RESAMPLES}")
+    if cv_folds and not 2 <= cv_folds <= MAX_CV_FOLDS:
+        raise HTTPException(status_code=400, detail=f"cv_folds must be 0 (holdout) or between 2 and {MAX_CV_FOLDS}")
+    if not 1 <= cv_repeats <= MAX_CV_REPEATS:
+        raise HTTPException(status_code=400, detail=f"cv_repeats must be between 1 and {MAX_CV_REPEATS}")
     try:
-        from sklearn.metrics import confusion_matrix, classification_report, precision_score, recall_score, f1_score
-        
-        df = pd.read_json(io.StringIO(data_json))
-        
-        X = df.drop('Loan_Status', axis=1)
-        y = df['Loan_Status']
-        
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=test_size/100, random_state=42
+        dataset = get_dataset(dataset_id)
+        if dataset.features is not None:
+            if cv_folds:
+                raise HTTPException(status_code=400, detail="Cross-validation is not available for out-of-core datasets")
+            # The training matrix is not copied into a model version; /predict keeps using in-memory models
+            result = await run_compute(
+                "knn.train", _train_ooc_sync, params, test_size, dataset_registry.directory, dataset_id, bootstrap_resamples
+            )
+            return {**result, "dataset_id": dataset_id, "model_version": None}
+        if cv_folds:
+            X_train, y_train, result = await asyncio.to_thread(
+                _train_cv_sync, params, cv_folds, cv_repeats, dataset
+            )
+        else:
+            X_train, y_train, result = await run_compute(
+                "knn.train", _train_model_sync, params, test_size, dataset, bootstrap_resamples
+            )
+
+        # Save as a new model version; in the serving process (on a thread), since the
+        # registry holds locks and its loaded models must live where /predict reads them
+        model = await asyncio.to_thread(
+            model_registry.save,
+            X_train.to_numpy(), y_train.to_numpy(), dataset.encoders,
+            params=params, feature_columns=result["feature_columns"], target=TARGET_COLUMN,
+            dataset_id=dataset_id, metrics={key: result[key] for key in METRIC_NAMES}
         )
-        
-        knn = KNeighborsClassifier(n_neighbors=k_value)
-        knn.fit(X_train, y_train)
-        
-        y_pred = knn.predict(X_test)
-        accuracy = knn.score(X_test, y_test)
-        
-        # Calculate detailed metrics
-        cm = confusion_matrix(y_test, y_pred)
-        
-        # For binary classification
-        precision = precision_score(y_test, y_pred, average='weighted')
-        recall = recall_score(y_test, y_pred, average='weighted')
-        f1 = f1_score(y_test, y_pred, average='weighted')
-        
-        # Classification report as dict
-        report = classification_report(y_test, y_pred, output_dict=True, zero_division=0)
-        
-        # Store model
-        model_store["model"] = knn
-        model_store["X_train"] = X_train
-        model_store["y_train"] = y_train
-        
-
-        
-        return {
-            "accuracy": float(accuracy),
-            "precision": float(precision),
-            "recall": float(recall),
-            "f1_score": float(f1),
-            "train_size": len(X_train),
-            "test_size": len(X_test),
-            "k_value": k_value,
-            "confusion_matrix": cm.tolist(),
-            "classification_report": report
-        }
+
+        return {**result, "dataset_id": dataset_id, "model_version": model.version}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        # e.g. a class with fewer members than cv_folds
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+MAX_SWEEP_K = 100
+
+
+def _sweep_k_sync(params: dict, test_size: float, dataset) -> dict:
+    """CPU-bound part of /sweep-k: one neighbor search at k_max, sliced for every k"""
+    X_train, X_test, y_train, y_test = _split_dataset(dataset, test_size)
+    k_max = min(params["n_neighbors"], len(X_train))
+
+    # Class codes in sorted label order, as the classifier uses (test-only labels included)
+    classes, codes = np.unique(np.concatenate([y_train.to_numpy(), y_test.to_numpy()]), return_inverse=True)
+    train_codes, test_codes = codes[:len(y_train)], codes[len(y_train):]
+    n_classes = len(classes)
+
+    knn = KNNIndexClassifier(**{**params, "n_neighbors": k_max}).fit(X_train, y_train)
+    neighbors = knn.kneighbors(X_test, return_distance=False)
+
+    # votes[:, k-1, c] = how many of the first k neighbors have class c
+    votes = np.zeros((len(X_test), k_max, n_classes), dtype=np.int32)
+    votes[np.arange(len(X_test))[:, None], np.arange(k_max)[None, :], train_codes[neighbors]] = 1
+    np.cumsum(votes, axis=1, out=votes)
+    # argmax keeps the first maximum, so ties go to the smallest label like sklearn's mode
+    predictions = votes.argmax(axis=2)
+
+    # One confusion matrix per k from a single bincount, scored as a stack
+    pairs = (np.arange(k_max)[:, None] * n_classes + test_codes[None, :]) * n_classes + predictions.T
+    cms = np.bincount(pairs.ravel(), minlength=k_max * n_classes * n_classes).reshape(k_max, n_classes, n_classes)
+    scores = metrics.scores(cms)
+    curves = {
+        "accuracy": scores["accuracy"].tolist(),
+        "precision": scores["weighted_precision"].tolist(),
+        "recall": scores["weighted_recall"].tolist(),
+        "f1_score": scores["weighted_f1"].tolist()
+    }
+
+    best = int(np.argmax(curves["accuracy"]))
+    return {
+        "k_values": list(range(1, k_max + 1)),
+        **curves,
+        "best_k": best + 1,
+        "best_accuracy": curves["accuracy"][best],
+        "index": knn.stats(),
+        "train_size": len(X_train),
+        "test_size": len(X_test)
+    }
+
+
+@router.post("/sweep-k")
+async def sweep_k(
+    k_max: int = Form(20),
+    test_size: float = Form(20),
+    dataset_id: str = Form(...),
+    scaling: str = Form('standard'),
+    index: str = Form('auto'),
+    n_lists: int = Form(0),
+    n_probe: int = Form(8)
+):
+    """Accuracy/precision/recall/F1 for every k from 1 to k_max from a single neighbor search"""
+    if not 1 <= k_max <= MAX_SWEEP_K:
+        raise HTTPException(status_code=400, detail=f"k_max must be between 1 and {MAX_SWEEP_K}")
+    if not 0 < test_size < 100:
+        raise HTTPException(status_code=400, detail="test_size must be a percentage between 0 and 100 (exclusive)")
+    params = _index_params(k_max, scaling, index, n_lists, n_probe)
+    try:
+        dataset = get_dataset(dataset_id)
+        if dataset.features is not None:
+            # Would load the whole matrix into memory, on a different split than out-of-core /train
+            raise HTTPException(status_code=400, detail="The k sweep is not available for out-of-core datasets")
+        return await run_compute("knn.sweep_k", _sweep_k_sync, params, test_size, dataset)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/datasets/stats")
+async def dataset_stats():
+    """Number of stored datasets and the eviction settings"""
+    return dataset_registry.stats()
+
+
+@router.delete("/datasets/{dataset_id}")
+async def delete_dataset(dataset_id: str):
+    """Drop an uploaded dataset before its TTL runs out"""
+    if not dataset_registry.delete(dataset_id):
+        raise HTTPException(status_code=404, detail=f"Dataset {dataset_id} not found")
+    return {"status": "success"}
+
+
+class PredictRequest(BaseModel):
+    rows: List[Dict[str, Any]]  # Raw feature values keyed by column name
+    version: Optional[str] = None  # Latest model if omitted
+
+
+def _predict_sync(request: PredictRequest) -> dict:
+    """CPU-bound part of /predict, run on the compute executor"""
+    model = model_registry.get(request.version)
+    missing = sorted({col for row in request.rows for col in model.feature_columns if col not in row})
+    if missing:
+        raise ValueError(f"Missing feature columns: {missing}")
+
+    return {
+        "model_version": model.version,
+        **model.predict(model.encode_rows(request.rows))
+    }
+
+
+@router.post("/predict")
+async def predict(request: PredictRequest):
+    """Predict one or more rows with a saved model version"""
+    if not request.rows:
+        raise HTTPException(status_code=400, detail="rows must not be empty")
+    try:
+        return await run_compute("knn.predict", _predict_sync, request)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class AppendRequest(BaseModel):
+    rows: List[Dict[str, Any]]  # Raw feature values plus the Loan_Status label
+    version: Optional[str] = None  # Latest model if omitted
+
+
+MAX_APPEND_ROWS = 100_000
+
+
+def _append_sync(request: AppendRequest) -> dict:
+    """
+    /append, run on a thread of the serving process: the rows must reach the model
+    loaded there, not a compute worker's copy (workers reload stale versions from disk)
+    """
+    model = model_registry.get(request.version)
+    missing = sorted({col for row in request.rows for col in model.feature_columns if col not in row})
+    if missing:
+        raise ValueError(f"Missing feature columns: {missing}")
+    return {"model_version": model.version, "added": len(request.rows), **model.append(request.rows)}
+
+
+@router.post("/append")
+async def append_rows(request: AppendRequest):
+    """Add labelled rows to a saved model version without retraining"""
+    if not request.rows:
+        raise HTTPException(status_code=400, detail="rows must not be empty")
+    if len(request.rows) > MAX_APPEND_ROWS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_APPEND_ROWS} rows per request")
+    try:
+        return await asyncio.to_thread(_append_sync, request)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/models")
+async def list_models():
+    """Saved model versions with their parameters and metrics"""
+    models = []
+    for version in model_registry.versions():
+        with open(os.path.join(model_registry.directory, version, "meta.json")) as f:
+            meta = json.load(f)
+        models.append({key: value for key, value in meta.items() if key not in ("encoders", "fill_values")})
+    return {"models": models, "latest": model_registry.latest(), **model_registry.stats()}
+
+
+@router.delete("/models/{version}")
+async def delete_model(version: str):
+    """Delete a saved model version"""
+    if not model_registry.delete(version):
+        raise HTTPException(status_code=404, detail=f"Model version {version} not found")
+    return {"status": "success"}
@@ -6,6 +6,8 @@ import pandas as pd
 import numpy as np
 from typing import List, Dict
 
+from backend.compute import run_compute
+
 router = APIRouter(prefix="/naive-bayes", tags=["naive-bayes"])
 
 class TrainingData(BaseModel):
@@ -70,83 +72,89 @@ def calculate_conditional_probabilities(df, target_col):
                 
     return conditional_probs
 
+def _train_and_predict_sync(request: PredictionRequest):
+    """CPU-bound part of /train-predict, run on the compute executor"""
+    # Convert to DataFrame
+    df = pd.DataFrame(request.training_data)
+
+    # Validasi
+    if request.target not in df.columns:
+        raise HTTPException(status_code=400, detail=f"Target column '{request.target}' not found")
+
+    for feature in request.features:
+        if feature not in df.columns:
+            raise HTTPException(status_code=400, detail=f"Feature '{feature}' not found")
+
+    # 1. Perhitungan Manual
+    posterior_manual, prior, likelihood = naive_bayes_manual(df, request.test_case, request.target)
+    prediction_manual = max(posterior_manual, key=posterior_manual.get)
+
+    # 2. Sklearn
+    encoders = {}
+    df_encoded = df.copy()
+
+    # Encode all columns
+    for col in df.columns:
+        le = LabelEncoder()
+        df_encoded[col] = le.fit_transform(df[col])
+        encoders[col] = le
+
+    X = df_encoded[request.features]
+    y = df_encoded[request.target]
+
+    # Train model
+    model = CategoricalNB()
+    model.fit(X, y)
+
+    # Encode test case
+    test_encoded = []
+    for feature in request.features:
+        try:
+            encoded_val = encoders[feature].transform([request.test_case[feature]])[0]
+            test_encoded.append(encoded_val)
+        except:
+            raise HTTPException(status_code=400, detail=f"Unknown value '{request.test_case[feature]}' for feature '{feature}'")
+
+    # Predict
+    test_df = pd.DataFrame([test_encoded], columns=request.features)
+    pred = model.predict(test_df)[0]
+    pred_label = encoders[request.target].inverse_transform([pred])[0]
+
+    # Probabilitas
+    probabilities = model.predict_proba(test_df)[0]
+    prob_sklearn = {}
+    for i, class_label in enumerate(encoders[request.target].classes_):
+        prob_sklearn[class_label] = float(probabilities[i])
+
+    # Get unique values for each feature
+    feature_values = {}
+    for col in df.columns:
+        feature_values[col] = df[col].unique().tolist()
+
+    return {
+        "conditional_probabilities": calculate_conditional_probabilities(df, request.target),
+        "dataset": request.training_data,
+        "test_case": request.test_case,
+        "manual_calculation": {
+            "prior": {k: float(v) for k, v in prior.items()},
+            "posterior": {k: float(v) for k, v in posterior_manual.items()},
+            "prediction": prediction_manual
+        },
+        "sklearn_calculation": {
+            "probabilities": prob_sklearn,
+            "prediction": pred_label
+        },
+        "feature_values": feature_values,
+        "num_samples": len(df)
+    }
+
 @router.post("/train-predict")
 async def train_and_predict(request: PredictionRequest):
     try:
-        # Convert to DataFrame
-        df = pd.DataFrame(request.training_data)
-        
-        # Validasi
-        if request.target not in df.columns:
-            raise HTTPException(status_code=400, detail=f"Target column '{request.target}' not found")
-        
-        for feature in request.features:
-            if feature not in df.columns:
-                raise HTTPException(status_code=400, detail=f"Feature '{feature}' not found")
-        
-        # 1. Perhitungan Manual
-        posterior_manual, prior, likelihood = naive_bayes_manual(df, request.test_case, request.target)
-        prediction_manual = max(posterior_manual, key=posterior_manual.get)
-        
-        # 2. Sklearn
-        encoders = {}
-        df_encoded = df.copy()
-        
-        # Encode all columns
-        for col in df.columns:
-            le = LabelEncoder()
-            df_encoded[col] = le.fit_transform(df[col])
-            encoders[col] = le
-        
-        X = df_encoded[request.features]
-        y = df_encoded[request.target]
-        
-        # Train model
-        model = CategoricalNB()
-        model.fit(X, y)
-        
-        # Encode test case
-        test_encoded = []
-        for feature in request.features:
-            try:
-                encoded_val = encoders[feature].transform([request.test_case[feature]])[0]
-                test_encoded.append(encoded_val)
-            except:
-                raise HTTPException(status_code=400, detail=f"Unknown value '{request.test_case[feature]}' for feature '{feature}'")
-        
-        # Predict
-        test_df = pd.DataFrame([test_encoded], columns=request.features)
-        pred = model.predict(test_df)[0]
-        pred_label = encoders[request.target].inverse_transform([pred])[0]
-        
-        # Probabilitas
-        probabilities = model.predict_proba(test_df)[0]
-        prob_sklearn = {}
-        for i, class_label in enumerate(encoders[request.target].classes_):
-            prob_sklearn[class_label] = float(probabilities[i])
-        
-        # Get unique values for each feature
-        feature_values = {}
-        for col in df.columns:
-            feature_values[col] = df[col].unique().tolist()
-        
-        return {
-            "conditional_probabilities": calculate_conditional_probabilities(df, request.target),
-            "dataset": request.training_data,
-            "test_case": request.test_case,
-            "manual_calculation": {
-                "prior": {k: float(v) for k, v in prior.items()},
-                "posterior": {k: float(v) for k, v in posterior_manual.items()},
-                "prediction": prediction_manual
-            },
-            "sklearn_calculation": {
-                "probabilities": prob_sklearn,
-                "prediction": pred_label
-            },
-            "feature_values": feature_values,
-            "num_samples": len(df)
-        }
+        return await run_compute("naive_bayes.train_predict", _train_and_predict_sync, request)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
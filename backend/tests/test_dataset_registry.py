@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+from backend.modules.utils.dataset_registry import DatasetRegistry, load_dataset
+
+
+def test_put_and_get_round_trip_through_another_registry(tmp_path):
+    df = pd.DataFrame({"Gender": [0, 1, 1], "ApplicantIncome": [5000.0, 3000.0, 4000.0]})
+    encoders = {"Gender": LabelEncoder().fit(["Female", "Male"])}
+    dataset_id = DatasetRegistry(str(tmp_path)).put(df, encoders, target="Gender")
+
+    # A second registry over the same directory (another worker) adopts it
+    dataset = DatasetRegistry(str(tmp_path)).get(dataset_id)
+    frame = dataset.frame()
+    assert frame.columns.tolist() == ["Gender", "ApplicantIncome"]
+    assert frame.dtypes.tolist() == df.dtypes.tolist()
+    assert frame.to_dict("list") == df.to_dict("list")
+    assert dataset.encoders["Gender"].classes_.tolist() == ["Female", "Male"]
+    assert dataset.metadata["target"] == "Gender"
+
+
+def test_committed_matrix_loads_without_a_registry(tmp_path):
+    registry = DatasetRegistry(str(tmp_path))
+    dataset_id, staging = registry.reserve_matrix()
+    features = np.arange(12, dtype=np.float32).reshape(4, 3)
+    features.tofile(os.path.join(staging, "features.f32"))
+    np.array([0, 1, 1, 0], dtype=np.int32).tofile(os.path.join(staging, "target.i32"))
+    described = {"columns": ["a", "b", "c", "y"], "feature_columns": ["a", "b", "c"], "target": "y",
+                 "rows": 4, "encoders": {"y": ["N", "Y"]}}
+
+    assert registry.get(dataset_id) is None
+    registry.commit_matrix(dataset_id, staging, described)
+
+    dataset = load_dataset(str(tmp_path), dataset_id)
+    np.testing.assert_array_equal(dataset.features, features)
+    assert dataset.target.tolist() == [0, 1, 1, 0]
+    assert dataset.frame(["b"])["b"].tolist() == [1, 4, 7, 10]
+    assert registry.get(dataset_id).n_rows == 4
+
+
+def test_least_recently_used_datasets_are_evicted(tmp_path):
+    registry = DatasetRegistry(str(tmp_path), max_entries=2)
+    df = pd.DataFrame({"x": [1.0]})
+    first, second = registry.put(df), registry.put(df)
+    registry.get(first)
+    third = registry.put(df)
+
+    assert registry.get(second) is None
+    assert registry.get(first) is not None and registry.get(third) is not None
+    assert not os.path.exists(os.path.join(str(tmp_path), second))
@@ -0,0 +1,49 @@
+import numpy as np
+from skimage.feature import graycomatrix, graycoprops
+
+from backend.modules.glcm_engine import glcm_feature_maps, glcm_features, glcm_sweep
+
+
+def _image(levels=8, shape=(40, 48), seed=0):
+    return np.random.default_rng(seed).integers(0, levels, shape).astype(np.uint8)
+
+
+def test_glcm_sweep_matches_graycomatrix_over_angle_distance_grid():
+    img = _image()
+    distances = list(range(1, 11))
+    angles = np.deg2rad(np.arange(180))
+
+    expected = graycomatrix(img, distances, angles, levels=8, symmetric=True)
+    np.testing.assert_array_equal(glcm_sweep(img, 8, distances, angles), expected)
+
+
+def test_feature_maps_match_graycoprops_per_window():
+    img = _image(shape=(24, 28))
+    window, stride = 9, 5
+    angles = np.deg2rad([0, 30, 45, 90, 150])
+    properties = ["contrast", "dissimilarity", "homogeneity", "correlation", "ASM", "energy"]
+
+    maps = glcm_feature_maps(img, 8, window, stride, distance=1, angles=angles, properties=properties)
+
+    for i, row in enumerate(range(0, img.shape[0] - window + 1, stride)):
+        for j, col in enumerate(range(0, img.shape[1] - window + 1, stride)):
+            tile = img[row:row + window, col:col + window]
+            glcm = graycomatrix(tile, [1], angles, levels=8, symmetric=True, normed=True)
+            for prop in properties:
+                expected = graycoprops(glcm, prop)[0].mean()
+                assert np.isclose(maps[prop][i, j], expected), (prop, row, col)
+
+
+def test_glcm_features_match_graycoprops():
+    img = _image(levels=16)
+    glcm = graycomatrix(img, [1, 2, 3], np.deg2rad([0, 45, 90, 135]), levels=16, symmetric=True, normed=True)
+
+    features = glcm_features(glcm, extended=True)
+
+    for prop in ["contrast", "dissimilarity", "homogeneity", "correlation", "ASM", "energy", "entropy", "variance"]:
+        np.testing.assert_allclose(features[prop], graycoprops(glcm, prop), rtol=1e-10, atol=1e-12, err_msg=prop)
+
+
+def test_glcm_features_of_a_constant_image_have_correlation_one():
+    glcm = graycomatrix(np.full((10, 10), 3, dtype=np.uint8), [1], [0.0], levels=8)
+    np.testing.assert_array_equal(glcm_features(glcm)["correlation"], [[1.0]])
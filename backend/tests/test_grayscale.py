@@ -0,0 +1,27 @@
+import numpy as np
+from PIL import Image
+from skimage.color import rgb2gray
+
+from backend.modules.utils.grayscale import image_to_gray, to_gray_uint8
+
+
+def test_16_bit_scaling_follows_the_mode_not_the_pixel_values():
+    # A dim exposure: every value fits in 8 bits, but the data is still 16-bit
+    dim = (np.arange(48 * 64).reshape(48, 64) % 256).astype(np.uint16)
+    bright = dim.copy()
+    bright[0, 0] = 65535
+
+    for to_image in (Image.fromarray, lambda a: Image.fromarray(a.astype(np.int32))):
+        gray_dim = image_to_gray(to_image(dim))
+        gray_bright = image_to_gray(to_image(bright))
+        np.testing.assert_array_equal(gray_dim[1:], gray_bright[1:])
+        np.testing.assert_array_equal(gray_dim, dim >> 8)
+        assert gray_bright[0, 0] == 255
+
+
+def test_rgb_luma_matches_rgb2gray():
+    rgb = np.random.default_rng(0).integers(0, 256, (40, 50, 3), dtype=np.uint8)
+    expected = rgb2gray(rgb) * 255
+    # Fixed-point weights truncate; the result is never more than one level below
+    diff = expected - to_gray_uint8(rgb)
+    assert diff.min() > -1e-6 and diff.max() < 1 + 1e-6
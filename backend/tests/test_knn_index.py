@@ -0,0 +1,80 @@
+import time
+
+import numpy as np
+import pytest
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.preprocessing import StandardScaler
+
+from backend.modules.knn_index import KNNIndexClassifier
+
+
+def _blobs(n=1500, d=6, centers=5, seed=0):
+    rng = np.random.default_rng(seed)
+    means = rng.normal(0, 6, (centers, d))
+    labels = rng.integers(0, centers, n)
+    return means[labels] + rng.normal(0, 1, (n, d)), labels
+
+
+def test_exact_backends_match_kneighbors_classifier():
+    X, y = _blobs()
+    queries, _ = _blobs(n=300, seed=1)
+    scaler = StandardScaler().fit(X)
+    reference = KNeighborsClassifier(n_neighbors=7).fit(scaler.transform(X), y)
+    expected_indices = reference.kneighbors(scaler.transform(queries), return_distance=False)
+
+    for backend in ("brute", "kd_tree", "ball_tree"):
+        model = KNNIndexClassifier(n_neighbors=7, scaling="standard", index=backend).fit(X, y)
+        np.testing.assert_array_equal(model.kneighbors(queries, return_distance=False), expected_indices)
+        np.testing.assert_array_equal(model.predict(queries), reference.predict(scaler.transform(queries)))
+
+
+def test_ivf_is_exact_when_every_list_is_probed_and_recall_stays_high_below_that():
+    X, y = _blobs()
+    queries, _ = _blobs(n=300, seed=1)
+    exact = KNNIndexClassifier(n_neighbors=5, index="brute").fit(X, y)
+
+    full = KNNIndexClassifier(n_neighbors=5, index="ivf", n_lists=16, n_probe=16).fit(X, y)
+    np.testing.assert_array_equal(full.kneighbors(queries, return_distance=False),
+                                  exact.kneighbors(queries, return_distance=False))
+    assert full.recall_at_k(queries) == 1.0
+
+    partial = KNNIndexClassifier(n_neighbors=5, index="ivf", n_lists=16, n_probe=4).fit(X, y)
+    assert partial.recall_at_k(queries) >= 0.9
+
+
+def test_appended_rows_are_searched_before_and_after_the_rebuild():
+    X, y = _blobs()
+    extra, extra_y = _blobs(n=400, seed=2)
+    queries, _ = _blobs(n=200, seed=3)
+    expected_before = KNNIndexClassifier(n_neighbors=5, index="brute").fit(
+        np.vstack([X, extra[:200]]), np.concatenate([y, extra_y[:200]])).kneighbors(queries, return_distance=False)
+    expected = KNNIndexClassifier(n_neighbors=5, index="brute").fit(
+        np.vstack([X, extra]), np.concatenate([y, extra_y])).kneighbors(queries)
+
+    for backend in ("brute", "ivf"):
+        kwargs = {"n_lists": 8, "n_probe": 8} if backend == "ivf" else {}
+        model = KNNIndexClassifier(n_neighbors=5, index=backend, rebuild_threshold=300, **kwargs).fit(X, y)
+
+        # Below the threshold: the new rows are scanned next to the index
+        assert not model.partial_fit(extra[:200], extra_y[:200])
+        assert model.stats()["pending_rows"] == 200
+        np.testing.assert_array_equal(model.kneighbors(queries, return_distance=False), expected_before)
+
+        assert model.partial_fit(extra[200:], extra_y[200:])
+        deadline = time.monotonic() + 30
+        while model.stats()["rebuilding"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stats = model.stats()
+        assert stats["rebuilds"] == 1 and stats["pending_rows"] == 0
+
+        distances, indices = model.kneighbors(queries)
+        np.testing.assert_array_equal(indices, expected[1])
+        np.testing.assert_allclose(distances, expected[0])
+
+
+def test_partial_fit_rejects_unknown_labels():
+    X, y = _blobs(n=100)
+    model = KNNIndexClassifier(n_neighbors=3).fit(X, y)
+    with pytest.raises(ValueError, match="99"):
+        model.partial_fit(X[:2], [0, 99])
+    assert model.n_samples_fit_ == 100
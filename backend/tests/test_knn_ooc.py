@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import NearestNeighbors
+
+from backend.modules.knn_ooc import blockwise_kneighbors, ingest_csv
+
+
+def test_ingest_csv_back_fills_leading_gap_in_categorical_column(tmp_path):
+    csv_path = tmp_path / "loans.csv"
+    csv_path.write_text(
+        "Loan_ID,Gender,ApplicantIncome,Loan_Status\n"
+        "LP1,,5000,Y\n"
+        "LP2,Male,3000,N\n"
+        "LP3,Female,4000,Y\n"
+        "LP4,,2500,N\n"
+    )
+    out = tmp_path / "out"
+    out.mkdir()
+
+    described = ingest_csv(str(csv_path), str(out), "Loan_Status", chunk_rows=2)
+
+    features = np.fromfile(out / "features.f32", dtype=np.float32).reshape(described["rows"], -1)
+    target = np.fromfile(out / "target.i32", dtype=np.int32)
+
+    # Same result as the in-memory upload: ffill, bfill, then LabelEncoder codes
+    expected = pd.read_csv(csv_path).drop(columns="Loan_ID").ffill().bfill()
+    assert described["encoders"]["Gender"] == ["Female", "Male"]
+    assert features[:, 0].tolist() == [1, 1, 0, 0]
+    assert features[:, 1].tolist() == expected["ApplicantIncome"].tolist()
+    assert target.tolist() == [1, 0, 1, 0]
+
+
+def test_blockwise_kneighbors_matches_nearest_neighbors(tmp_path):
+    rng = np.random.default_rng(0)
+    path = tmp_path / "features.f32"
+    rng.normal(0, 1, (5000, 5)).astype(np.float32).tofile(path)
+    features = np.memmap(path, dtype=np.float32, mode="r").reshape(5000, 5)
+    offset, scale = features.mean(axis=0, dtype=np.float64), features.std(axis=0, dtype=np.float64)
+    scaled = (np.asarray(features, dtype=np.float64) - offset) / scale
+    queries = scaled[rng.choice(5000, 50, replace=False)] + rng.normal(0, 0.1, (50, 5))
+
+    # A tiny budget splits the matrix into several blocks whose results must merge exactly
+    distances, indices = blockwise_kneighbors(features, queries, 7, offset, scale, memory_budget=1)
+    expected_distances, expected_indices = NearestNeighbors(n_neighbors=7).fit(scaled).kneighbors(queries)
+    np.testing.assert_array_equal(indices, expected_indices)
+    np.testing.assert_allclose(distances, expected_distances, atol=1e-9)
+
+    # A row mask restricts the search to the rows it keeps
+    _, masked = blockwise_kneighbors(features, queries, 7, offset, scale,
+                                     row_mask=lambda start, stop: np.arange(start, stop) % 2 == 0, memory_budget=1)
+    even = np.arange(0, 5000, 2)
+    expected_masked = even[NearestNeighbors(n_neighbors=7).fit(scaled[even]).kneighbors(queries, return_distance=False)]
+    np.testing.assert_array_equal(masked, expected_masked)
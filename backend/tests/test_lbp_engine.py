@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from skimage.feature import local_binary_pattern
+
+from backend.modules.lbp_engine import NATIVE_CONFIGS, NATIVE_METHODS, lbp_codes, supports_native
+
+
+@pytest.mark.parametrize("n_points,radius", sorted(NATIVE_CONFIGS))
+@pytest.mark.parametrize("method", NATIVE_METHODS)
+def test_lbp_codes_match_local_binary_pattern(n_points, radius, method):
+    if not supports_native(n_points, radius, method):
+        pytest.skip("no native path for this configuration")
+    img = np.random.default_rng(n_points * 10 + radius).integers(0, 256, (37, 45)).astype(np.uint8)
+    # Flat patches exercise the ties (neighbor == center) that the comparison must count as set bits
+    img[5:15, 5:15] = 128
+
+    expected = local_binary_pattern(img, n_points, radius, method)
+    # A small chunk size forces the off-grid path across several chunk boundaries
+    np.testing.assert_array_equal(lbp_codes(img, n_points, radius, method, chunk_rows=7), expected)
+
+
+def test_unsupported_configuration_is_rejected():
+    img = np.zeros((8, 8), dtype=np.uint8)
+    with pytest.raises(ValueError):
+        lbp_codes(img, 12, 1.5, "uniform")
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from sklearn import metrics as sk
+
+from backend.modules.utils.metrics import bootstrap_intervals, evaluate
+
+
+def test_evaluate_matches_sklearn():
+    rng = np.random.default_rng(0)
+    y_true = rng.choice(["N", "Y", "maybe"], 500)
+    # One label is only ever predicted, never true, so some ratios are undefined
+    y_pred = np.where(rng.random(500) < 0.7, y_true, rng.choice(["N", "Y", "never"], 500))
+
+    result = evaluate(y_true, y_pred)
+
+    np.testing.assert_array_equal(result["confusion_matrix"], sk.confusion_matrix(y_true, y_pred))
+    assert result["accuracy"] == pytest.approx(sk.accuracy_score(y_true, y_pred))
+    for ours, theirs in (("precision", sk.precision_score), ("recall", sk.recall_score), ("f1_score", sk.f1_score)):
+        assert result[ours] == pytest.approx(theirs(y_true, y_pred, average="weighted", zero_division=0))
+
+    expected = sk.classification_report(y_true, y_pred, output_dict=True, zero_division=0)
+    assert result["classification_report"].keys() == expected.keys()
+    for key, value in expected.items():
+        assert result["classification_report"][key] == pytest.approx(value), key
+
+
+def test_bootstrap_intervals_bracket_the_point_estimate():
+    rng = np.random.default_rng(1)
+    y_true = rng.integers(0, 2, 400)
+    y_pred = np.where(rng.random(400) < 0.8, y_true, 1 - y_true)
+
+    result = evaluate(y_true, y_pred, n_resamples=500)
+    intervals = result["confidence_intervals"]
+
+    assert intervals["n_resamples"] == 500 and intervals["confidence"] == 0.95
+    for name in ("accuracy", "precision", "recall", "f1_score"):
+        assert intervals[name]["low"] <= result[name] <= intervals[name]["high"], name
+    assert intervals["accuracy"]["high"] - intervals["accuracy"]["low"] < 0.15
+
+
+def test_bootstrap_intervals_of_an_empty_matrix_are_empty():
+    assert bootstrap_intervals(np.zeros((2, 2), dtype=np.int64)) == {}
+    assert "confidence_intervals" not in evaluate(["a"], ["a"])
@@ -0,0 +1,68 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from sklearn.preprocessing import LabelEncoder
+
+from backend.modules.utils.model_registry import ModelRegistry
+
+FEATURES = ["Gender", "ApplicantIncome"]
+
+
+def _training_set(n=60, seed=0):
+    rng = np.random.default_rng(seed)
+    gender = LabelEncoder().fit(["Female", "Male"])
+    status = LabelEncoder().fit(["N", "Y"])
+    X = np.column_stack([rng.integers(0, 2, n), rng.normal(4000, 800, n)])
+    y = rng.integers(0, 2, n)
+    return X, y, {"Gender": gender, "Loan_Status": status}
+
+
+def _save(directory, seed=0):
+    X, y, encoders = _training_set(seed=seed)
+    model = ModelRegistry(directory).save(X, y, encoders, {"n_neighbors": 3}, FEATURES, "Loan_Status")
+    return model.version
+
+
+def test_concurrent_saves_claim_distinct_versions(tmp_path):
+    directory = str(tmp_path)
+    with ProcessPoolExecutor(max_workers=3) as processes, ThreadPoolExecutor(max_workers=3) as threads:
+        futures = [processes.submit(_save, directory, seed) for seed in range(6)]
+        futures += [threads.submit(_save, directory, seed) for seed in range(6, 12)]
+        versions = [future.result() for future in futures]
+
+    assert sorted(versions, key=lambda v: int(v[1:])) == [f"v{i}" for i in range(1, 13)]
+    registry = ModelRegistry(directory)
+    assert registry.versions() == [f"v{i}" for i in range(1, 13)]
+    # Each directory kept the arrays of the save that claimed it
+    for seed, version in enumerate(versions):
+        np.testing.assert_array_equal(registry.get(version).X_train, _training_set(seed=seed)[0])
+
+
+def test_append_rejects_unseen_categories_and_labels(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    model = registry.get(_save(str(tmp_path)))
+
+    with pytest.raises(ValueError, match="Other"):
+        model.append([{"Gender": "Other", "ApplicantIncome": 3000, "Loan_Status": "Y"}])
+    with pytest.raises(ValueError, match="Maybe"):
+        model.append([{"Gender": "Male", "ApplicantIncome": 3000, "Loan_Status": "Maybe"}])
+    assert model.appended_rows == 0
+    assert not model.is_stale()
+
+
+def test_a_copy_loaded_elsewhere_reloads_after_an_append(tmp_path):
+    version = _save(str(tmp_path))
+    here, elsewhere = ModelRegistry(str(tmp_path)), ModelRegistry(str(tmp_path))
+    stale = elsewhere.get(version)
+
+    rows = [{"Gender": "Male", "ApplicantIncome": 123456.0, "Loan_Status": "N"}] * 3
+    here.get(version).append(rows)
+
+    assert stale.is_stale()
+    fresh = elsewhere.get(version)
+    assert fresh is not stale and fresh.appended_rows == 3
+    assert fresh.estimator.n_samples_fit_ == 63
+    # The appended rows are the only neighbors that far out
+    X = fresh.encode_rows([{"Gender": "Male", "ApplicantIncome": 123456.0}])
+    assert fresh.predict(X)["predictions"] == ["N"]
@@ -0,0 +1,36 @@
+import asyncio
+import json
+
+from backend.modules.utils.result_cache import ResultCache
+
+
+def test_memory_tier_evicts_least_recently_used_within_its_budget():
+    cache = ResultCache(max_bytes=40)
+    keys = [ResultCache.make_key("glcm", bytes([i]), {"levels": 8}) for i in range(3)]
+    for key in keys[:2]:
+        cache.set(key, {"value": "x" * 5})
+    cache.get(keys[0])
+    cache.set(keys[2], {"value": "x" * 5})
+
+    assert cache.get(keys[1]) is None
+    assert json.loads(cache.get(keys[0])) == {"value": "xxxxx"}
+    assert cache.stats()["bytes"] <= 40
+
+
+def test_disk_tier_survives_a_restart_and_serves_async_lookups(tmp_path):
+    key = ResultCache.make_key("lbp", b"image", {"radius": 1, "max_pixels": 4_000_000})
+    asyncio.run(ResultCache(disk_dir=str(tmp_path)).set_async(key, {"histogram": [1, 2, 3]}))
+
+    restarted = ResultCache(disk_dir=str(tmp_path))
+    assert json.loads(asyncio.run(restarted.get_async(key))) == {"histogram": [1, 2, 3]}
+    # The disk hit was promoted into memory
+    restarted.get(key)
+    stats = restarted.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 0)
+
+
+def test_keys_depend_on_every_parameter():
+    base = ResultCache.make_key("glcm", b"image", {"levels": 8, "max_pixels": 1000})
+    assert base == ResultCache.make_key("glcm", b"image", {"max_pixels": 1000, "levels": 8})
+    assert base != ResultCache.make_key("glcm", b"image", {"levels": 8, "max_pixels": 2000})
+    assert base != ResultCache.make_key("lbp", b"image", {"levels": 8, "max_pixels": 1000})
@@ -0,0 +1,42 @@
+import asyncio
+import os
+import time
+
+from backend.modules import texture_batch
+
+
+def _crashing_worker(contents, params):
+    if contents == b"crash":
+        os._exit(1)
+    time.sleep(0.05)
+    return {"value": contents.decode()}
+
+
+def test_concurrent_batches_survive_a_worker_crash(monkeypatch):
+    monkeypatch.setitem(texture_batch.WORKERS, "test", _crashing_worker)
+    monkeypatch.setattr(texture_batch, "_pool", None)
+    monkeypatch.setattr(texture_batch, "_workers", 2)
+
+    first = [(f"a{i}", b"ok") for i in range(6)] + [("boom", b"crash")] + [(f"a{i}", b"ok") for i in range(6, 20)]
+    second = [(f"b{i}", b"ok") for i in range(20)]
+
+    async def collect(items):
+        return [result async for result in texture_batch.run_batch(items, "test", {})]
+
+    async def run_both():
+        return await asyncio.gather(collect(first), collect(second))
+
+    try:
+        results = asyncio.run(run_both())
+    finally:
+        texture_batch.shutdown_pool()
+
+    # Only the images in flight when the worker died fail; the rest run on the replacement pool
+    limit = 2 * texture_batch._workers
+    for items, batch in zip((first, second), results):
+        assert sorted(result["index"] for result in batch) == list(range(len(items)))
+        failed = [result for result in batch if result["status"] != "success"]
+        assert 0 < len(failed) <= limit
+        assert all(result["detail"].startswith("Worker crashed") for result in failed)
+        assert max(batch, key=lambda result: result["index"])["status"] == "success"
+    assert {result["status"] for result in results[0] if result["filename"] == "boom"} == {"error"}
@@ -0,0 +1,49 @@
+import asyncio
+import io
+
+import numpy as np
+from PIL import Image
+from starlette.datastructures import UploadFile
+
+import backend.compute
+from backend.compute import ComputeExecutor
+from backend.modules import texture_gallery
+from backend.modules.texture_gallery import TextureGallery
+from backend.routers import glcm
+
+
+def _png(seed):
+    pixels = np.random.default_rng(seed).integers(0, 256, (48, 64), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_concurrent_adds_from_worker_processes_get_unique_ids(tmp_path, monkeypatch):
+    gallery = TextureGallery(str(tmp_path / "gallery"))
+    monkeypatch.setattr(texture_gallery, "_gallery", gallery)
+    executor = ComputeExecutor(max_workers=2, mode="process")
+    monkeypatch.setattr(backend.compute, "compute", executor)
+
+    async def add_all():
+        requests = [
+            glcm.gallery_add(files=[UploadFile(io.BytesIO(_png(seed)), filename=f"{seed}.png")], max_pixels=None)
+            for seed in range(8)
+        ]
+        return await asyncio.gather(*requests)
+
+    try:
+        responses = asyncio.run(add_all())
+    finally:
+        executor.shutdown()
+
+    ids = [entry["id"] for response in responses for entry in response["added"]]
+    assert sorted(ids) == list(range(8))
+    assert len(gallery) == 8
+
+    # Every row holds the descriptor of the image its entry names, as a reopened gallery sees it
+    reopened = TextureGallery(str(tmp_path / "gallery"))
+    for entry in reopened.entries():
+        image = np.asarray(Image.open(io.BytesIO(_png(int(entry["name"].split(".")[0])))))
+        match = reopened.search(reopened.describe(image), k=1)[0]
+        assert match["id"] == entry["id"]
@@ -485,7 +485,7 @@ const GLCM = () => {
                                             <div className="glass-panel p-4">
                                                 <p className="text-sm font-medium text-gray-300 mb-2">Gambar LBP</p>
                                                 <img
-                                                    src={`data:image/png;base64,${lbpResult.lbp_image}`}
+                                                    src={`data:${lbpResult.lbp_image_media_type || 'image/png'};base64,${lbpResult.lbp_image}`}
                                                     alt="LBP Result"
                                                     className="w-full rounded-lg"
                                                 />
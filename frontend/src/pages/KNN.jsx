@@ -8,7 +8,7 @@ import VisualizationModal from '../components/visualizations/VisualizationModal'
 const KNN = () => {
     const [file, setFile] = useState(null)
     const [preview, setPreview] = useState(null)
-    const [encodedData, setEncodedData] = useState(null)
+    const [datasetId, setDatasetId] = useState(null)
     const [kValue, setKValue] = useState(3)
     const [testSize, setTestSize] = useState(20)
     const [results, setResults] = useState(null)
@@ -29,13 +29,13 @@ const KNN = () => {
                 const data = await knnService.uploadDataset(selectedFile)
                 console.log('Upload response:', data)
                 setPreview(data.preview)
-                setEncodedData(data.data_json)
+                setDatasetId(data.dataset_id)
                 setError(null)
             } catch (error) {
                 console.error("Upload failed:", error)
                 setError(`Gagal upload: ${error.response?.data?.detail || error.message}`)
                 setPreview(null)
-                setEncodedData(null)
+                setDatasetId(null)
             } finally {
                 setLoading(false)
             }
@@ -43,10 +43,10 @@ const KNN = () => {
     }
 
     const handleTrain = async () => {
-        if (!encodedData) return
+        if (!datasetId) return
         setLoading(true)
         try {
-            const data = await knnService.train(kValue, testSize, encodedData)
+            const data = await knnService.train(kValue, testSize, datasetId)
             setResults(data)
         } catch (error) {
             console.error("Training failed:", error)
@@ -3,11 +3,12 @@ import axios from 'axios'
 const API_URL = import.meta.env.PROD ? '/api' : 'http://localhost:8000/api'
 
 export const glcmService = {
-    analyze: async (file, degrees, distance) => {
+    analyze: async (file, degrees, distance, levels = 256) => {
         const formData = new FormData()
         formData.append('file', file)
         formData.append('degrees', degrees.join(','))
         formData.append('distance', distance)
+        formData.append('levels', levels)
 
         const response = await axios.post(`${API_URL}/glcm/analyze`, formData, {
             headers: { 'Content-Type': 'multipart/form-data' }
@@ -17,22 +18,36 @@ export const glcmService = {
 }
 
 export const knnService = {
-    uploadDataset: async (file) => {
+    uploadDataset: async (file, outOfCore = false) => {
         const formData = new FormData()
         formData.append('file', file)
+        formData.append('out_of_core', outOfCore)
         const response = await axios.post(`${API_URL}/knn/upload-dataset`, formData, {
             headers: { 'Content-Type': 'multipart/form-data' }
         })
         return response.data
     },
-    train: async (kValue, testSize, dataJson) => {
+    // indexOptions: { scaling, index, n_lists, n_probe }
+    train: async (kValue, testSize, datasetId, cvFolds = 0, cvRepeats = 1, indexOptions = {}) => {
         const formData = new FormData()
         formData.append('k_value', kValue)
         formData.append('test_size', testSize)
-        formData.append('data_json', dataJson)
+        formData.append('dataset_id', datasetId)
+        formData.append('cv_folds', cvFolds)
+        formData.append('cv_repeats', cvRepeats)
+        Object.entries(indexOptions).forEach(([key, value]) => formData.append(key, value))
 
         const response = await axios.post(`${API_URL}/knn/train`, formData)
         return response.data
+    },
+    predict: async (rows, version = null) => {
+        const response = await axios.post(`${API_URL}/knn/predict`, { rows, version })
+        return response.data
+    },
+    // rows carry the feature columns plus Loan_Status
+    append: async (rows, version = null) => {
+        const response = await axios.post(`${API_URL}/knn/append`, { rows, version })
+        return response.data
     }
 }
 
@@ -64,12 +79,13 @@ export const decisionTreeService = {
 }
 
 export const lbpService = {
-    analyze: async (file, radius = 1, nPoints = 8, method = 'uniform') => {
+    analyze: async (file, radius = 1, nPoints = 8, method = 'uniform', imageFormat = 'png_fast') => {
         const formData = new FormData()
         formData.append('file', file)
         formData.append('radius', radius)
         formData.append('n_points', nPoints)
         formData.append('method', method)
+        formData.append('image_format', imageFormat)
 
         const response = await axios.post(`${API_URL}/glcm/lbp/analyze`, formData, {
             headers: { 'Content-Type': 'multipart/form-data' }